@@ -1,14 +1,25 @@
-const API_ENDPOINT_BLOQUEADO = "/api/bloqueado";
-const API_ENDPOINT_CORTE = "/api/corte";
-const API_ENDPOINT_CORTE_MOTIVOS = "/api/corte/motivos";
-const API_ENDPOINT_CORTE_SETORES = "/api/corte/setores";
-const API_ENDPOINT_CORTE_TOP10 = "/api/corte/top10";
-const API_ENDPOINT_INVENTARIO = "/api/inventario";
-const API_ENDPOINT_AVARIA_MOTIVOS = "/api/avaria/motivos";
-const API_ENDPOINT_AVARIA_SETORES = "/api/avaria/setores";
-const API_ENDPOINT_AVARIA_TOP10 = "/api/avaria/top10";
-const API_ENDPOINT_AVARIA_DIRECIONADOS = "/api/avaria/direcionados";
-const API_ENDPOINT_AVARIA_TURNOS = "/api/avaria/turnos";
+const API_ENDPOINT_DASHBOARD = "/api/dashboard";
+const API_ENDPOINT_EVENTS = "/api/events";
+const API_ENDPOINT_CHANGES = "/api/changes";
+const EVENTS_RETRY_DELAY_MS = 60000;
+// Longest series the "Bloqueado por Mês" chart receives; longer histories are
+// downsampled by the server (FRONTEND_CHART_POINTS in main.py).
+const BLOQUEADO_CHART_POINTS = 240;
+const DASHBOARD_SECTIONS = [
+    "bloqueado",
+    "bloqueado_top10",
+    "corte",
+    "corte_motivos",
+    "corte_setores",
+    "corte_top10",
+    "avaria_setores",
+    "avaria_top10",
+    "avaria_motivos",
+    "avaria_direcionados",
+    "avaria_turnos",
+    "inventario",
+    "funnel",
+];
 
 const currencyFormatter = new Intl.NumberFormat("pt-BR", {
     style: "currency",
@@ -560,6 +571,27 @@ document.addEventListener("DOMContentLoaded", () => {
     initInventarioCanceladosToggle();
     initAvariaToggle();
 
+    dashboardSectionLoaders = {
+        bloqueado: () => loadBloqueadoDataset(bloqueadoStatusElement),
+        bloqueado_top10: () => loadBloqueadoTop10Dataset(bloqueadoTop10StatusElement),
+        corte: () => loadCorteDataset(corteStatusElement),
+        corte_motivos: () => loadCorteMotivosDataset(corteMotivosStatusElement),
+        corte_setores: () => loadCorteSetoresDataset(corteSetoresStatusElement),
+        corte_top10: () => loadCorteTop10Dataset(corteTop10StatusDOM),
+        avaria_setores: () => loadAvariaSetoresDataset(avariaSetoresStatusElement),
+        avaria_top10: () => loadAvariaTop10Dataset(avariaTop10StatusDOM),
+        avaria_motivos: () => loadAvariaMotivosDataset(avariaMotivosStatusElement),
+        avaria_direcionados: () => loadAvariaDirecionadosDataset(avariaDirecionadosStatusElement),
+        avaria_turnos: () => loadAvariaTurnosDataset(avariaTurnosStatusElement),
+        inventario: () => loadInventarioDataset(inventarioStatusElement),
+        // Defined in funnel.js, which loads its own section on start-up.
+        funnel: () => {
+            if (typeof loadFunnelDataset === "function") {
+                loadFunnelDataset();
+            }
+        },
+    };
+
     loadBloqueadoDataset(bloqueadoStatusElement);
     loadBloqueadoTop10Dataset(bloqueadoTop10StatusElement);
     loadCorteDataset(corteStatusElement);
@@ -572,16 +604,130 @@ document.addEventListener("DOMContentLoaded", () => {
     loadAvariaDirecionadosDataset(avariaDirecionadosStatusElement);
     loadAvariaTurnosDataset(avariaTurnosStatusElement);
     loadInventarioDataset(inventarioStatusElement);
+    subscribeToDashboardEvents();
 });
 
-function loadBloqueadoDataset(statusElement) {
-    fetch(API_ENDPOINT_BLOQUEADO)
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar os dados");
+let dashboardBundlePromise = null;
+let dashboardSectionLoaders = {};
+let dashboardSyncPromise = Promise.resolve();
+// Workbook version of the data on screen, and the newest one the server announced.
+let dashboardDataVersion = null;
+let announcedDataVersion = null;
+
+function fetchDashboardBundle() {
+    if (!dashboardBundlePromise) {
+        dashboardBundlePromise = fetch(`${API_ENDPOINT_DASHBOARD}?sections=${DASHBOARD_SECTIONS.join(",")}&points=${BLOQUEADO_CHART_POINTS}`)
+            .then((response) => {
+                if (!response.ok) {
+                    throw new Error("Falha ao carregar os dados do painel");
+                }
+                return response.json();
+            })
+            .then((bundle) => {
+                if (bundle?.version) {
+                    dashboardDataVersion = bundle.version;
+                }
+                // The workbook may have changed while the first bundle was in flight.
+                if (announcedDataVersion && dashboardDataVersion && announcedDataVersion !== dashboardDataVersion) {
+                    syncDashboardSections();
+                }
+                return bundle;
+            });
+    }
+    return dashboardBundlePromise;
+}
+
+function fetchDashboardChanges(since) {
+    const query = `since=${encodeURIComponent(since)}&sections=${DASHBOARD_SECTIONS.join(",")}&points=${BLOQUEADO_CHART_POINTS}`;
+    return fetch(`${API_ENDPOINT_CHANGES}?${query}`).then((response) => {
+        if (!response.ok) {
+            throw new Error("Falha ao carregar as atualizacoes do painel");
+        }
+        return response.json();
+    });
+}
+
+// Downloads only the sections changed since the version on screen and re-runs
+// their loaders. Syncs are chained, so a burst of events costs one download
+// per workbook version at most.
+function syncDashboardSections() {
+    dashboardSyncPromise = dashboardSyncPromise
+        .then(() => {
+            const since = dashboardDataVersion;
+            if (!since || since === announcedDataVersion) {
+                return;
             }
-            return response.json();
+            return fetchDashboardChanges(since).then((changes) => {
+                if (!changes?.version || changes.version === since) {
+                    return;
+                }
+                dashboardDataVersion = changes.version;
+                // Loaders read their section from the current bundle promise,
+                // so pointing it at the changes re-renders only those sections.
+                dashboardBundlePromise = Promise.resolve(changes);
+                Object.keys(changes.sections || {}).forEach((section) => {
+                    const loader = dashboardSectionLoaders[section];
+                    if (loader) {
+                        loader();
+                    }
+                });
+            });
         })
+        .catch((error) => {
+            console.error(error);
+        });
+    return dashboardSyncPromise;
+}
+
+function handleDashboardEvent(event) {
+    let data = null;
+    try {
+        data = JSON.parse(event.data);
+    } catch (error) {
+        console.error("Evento invalido recebido do servidor", error);
+        return;
+    }
+    if (!data?.version) {
+        return;
+    }
+    announcedDataVersion = data.version;
+    // Nothing on screen yet: the initial bundle already carries the latest data.
+    if (!dashboardDataVersion || dashboardDataVersion === data.version) {
+        return;
+    }
+    syncDashboardSections();
+}
+
+function subscribeToDashboardEvents() {
+    if (typeof EventSource === "undefined") {
+        return;
+    }
+
+    const source = new EventSource(API_ENDPOINT_EVENTS);
+    // Sent on every (re)connection: catch up on anything missed while disconnected.
+    source.addEventListener("version", handleDashboardEvent);
+    source.addEventListener("workbook", handleDashboardEvent);
+    source.addEventListener("error", () => {
+        // EventSource retries dropped connections by itself but gives up when
+        // the server refuses the stream (e.g. too many displays connected).
+        if (source.readyState === EventSource.CLOSED) {
+            setTimeout(subscribeToDashboardEvents, EVENTS_RETRY_DELAY_MS);
+        }
+    });
+}
+
+function fetchDashboardSection(section, errorMessage) {
+    return fetchDashboardBundle().then((bundle) => {
+        const payload = bundle?.sections?.[section];
+        if (!payload || payload.error) {
+            throw new Error(errorMessage);
+        }
+        return payload;
+    });
+}
+
+function loadBloqueadoDataset(statusElement) {
+    fetchDashboardSection("bloqueado", "Falha ao carregar os dados")
         .then((payload) => {
             if (!payload || !Array.isArray(payload.labels)) {
                 throw new Error("Formato de dados invalido");
@@ -606,13 +752,7 @@ function loadBloqueadoDataset(statusElement) {
 }
 
 function loadBloqueadoTop10Dataset(statusElement) {
-    fetch("/api/bloqueado/top10")
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar os dados do bloqueado top 10");
-            }
-            return response.json();
-        })
+    fetchDashboardSection("bloqueado_top10", "Falha ao carregar os dados do bloqueado top 10")
         .then((payload) => {
             const entries = normalizeBloqueadoTop10Rows(payload);
             renderBloqueadoTop10List(entries);
@@ -1147,13 +1287,7 @@ function initAvariaToggle() {
 }
 
 function loadCorteDataset(statusElement) {
-    fetch(API_ENDPOINT_CORTE)
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar os dados de corte");
-            }
-            return response.json();
-        })
+    fetchDashboardSection("corte", "Falha ao carregar os dados de corte")
         .then((payload) => {
             const dataset = prepareCorteDataset(payload);
             corteDatasetCache = dataset;
@@ -1176,13 +1310,7 @@ function loadCorteDataset(statusElement) {
 }
 
 function loadCorteMotivosDataset(statusElement) {
-    fetch(API_ENDPOINT_CORTE_MOTIVOS)
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar os motivos de corte");
-            }
-            return response.json();
-        })
+    fetchDashboardSection("corte_motivos", "Falha ao carregar os motivos de corte")
         .then((payload) => {
             corteMotivosSummary = normalizeMotivosRows(payload?.rows);
             populateMotivosTable(corteMotivosSummary);
@@ -1205,13 +1333,7 @@ function loadCorteMotivosDataset(statusElement) {
 }
 
 function loadCorteSetoresDataset(statusElement) {
-    fetch(API_ENDPOINT_CORTE_SETORES)
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar os dados de corte por setor");
-            }
-            return response.json();
-        })
+    fetchDashboardSection("corte_setores", "Falha ao carregar os dados de corte por setor")
         .then((payload) => {
             const normalizedRows = normalizeCorteSetoresRows(payload?.rows);
             corteSetoresDatasetCache = normalizedRows;
@@ -1239,13 +1361,7 @@ function loadCorteSetoresDataset(statusElement) {
 }
 
 function loadCorteTop10Dataset(statusElement) {
-    fetch(API_ENDPOINT_CORTE_TOP10)
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar o ranking de itens cortados");
-            }
-            return response.json();
-        })
+    fetchDashboardSection("corte_top10", "Falha ao carregar o ranking de itens cortados")
         .then((payload) => {
             corteTop10Dataset = normalizeCorteTop10Rows(payload);
             if (statusElement) {
@@ -1266,13 +1382,7 @@ function loadCorteTop10Dataset(statusElement) {
 }
 
 function loadAvariaSetoresDataset(statusElement) {
-    fetch(API_ENDPOINT_AVARIA_SETORES)
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar os dados de avarias por setor");
-            }
-            return response.json();
-        })
+    fetchDashboardSection("avaria_setores", "Falha ao carregar os dados de avarias por setor")
         .then((payload) => {
             const normalizedRows = normalizeAvariaSetoresRows(payload?.rows);
             avariaSetoresDatasetCache = normalizedRows;
@@ -1304,13 +1414,7 @@ function loadAvariaSetoresDataset(statusElement) {
 }
 
 function loadAvariaTop10Dataset(statusElement) {
-    fetch(API_ENDPOINT_AVARIA_TOP10)
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar o ranking de itens avariados");
-            }
-            return response.json();
-        })
+    fetchDashboardSection("avaria_top10", "Falha ao carregar o ranking de itens avariados")
         .then((payload) => {
             avariaTop10Dataset = normalizeAvariaTop10Rows(payload);
             if (statusElement) {
@@ -1331,13 +1435,7 @@ function loadAvariaTop10Dataset(statusElement) {
 }
 
 function loadAvariaMotivosDataset(statusElement) {
-    fetch(API_ENDPOINT_AVARIA_MOTIVOS)
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar os motivos de avaria");
-            }
-            return response.json();
-        })
+    fetchDashboardSection("avaria_motivos", "Falha ao carregar os motivos de avaria")
         .then((payload) => {
             avariaMotivosSummary = normalizeAvariaMotivosRows(payload?.rows);
             populateAvariaMotivosTable(avariaMotivosSummary);
@@ -1366,13 +1464,7 @@ function loadAvariaMotivosDataset(statusElement) {
 }
 
 function loadAvariaDirecionadosDataset(statusElement) {
-    fetch(API_ENDPOINT_AVARIA_DIRECIONADOS)
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar os direcionamentos de avaria");
-            }
-            return response.json();
-        })
+    fetchDashboardSection("avaria_direcionados", "Falha ao carregar os direcionamentos de avaria")
         .then((payload) => {
             avariaDirecionadosDataset = normalizeAvariaDirecionadosRows(payload?.rows);
             renderAvariaDirecionadosChart(avariaDirecionadosDataset);
@@ -1402,13 +1494,7 @@ function loadAvariaDirecionadosDataset(statusElement) {
 }
 
 function loadAvariaTurnosDataset(statusElement) {
-    fetch(API_ENDPOINT_AVARIA_TURNOS)
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar os turnos de avaria");
-            }
-            return response.json();
-        })
+    fetchDashboardSection("avaria_turnos", "Falha ao carregar os turnos de avaria")
         .then((payload) => {
             avariaTurnosDataset = normalizeAvariaTurnosRows(payload?.rows);
             renderAvariaTurnosChart(avariaTurnosDataset);
@@ -1461,14 +1547,13 @@ function renderCorteSetoresChart(rows) {
         return;
     }
 
-    if (corteSetoresChartInstance) {
-        corteSetoresChartInstance.destroy();
-        corteSetoresChartInstance = null;
-    }
-
     removeExistingTooltip(canvasElement);
 
     if (!Array.isArray(rows) || !rows.length) {
+        if (corteSetoresChartInstance) {
+            corteSetoresChartInstance.destroy();
+            corteSetoresChartInstance = null;
+        }
         const context = canvasElement.getContext("2d");
         if (context) {
             const width = canvasElement.width || canvasElement.clientWidth || 0;
@@ -1616,7 +1701,7 @@ function renderCorteSetoresChart(rows) {
         },
     };
 
-    corteSetoresChartInstance = new Chart(canvasElement, {
+    corteSetoresChartInstance = renderChartInPlace(corteSetoresChartInstance, canvasElement, {
         type: "bar",
         data: {
             labels,
@@ -1934,14 +2019,13 @@ function renderAvariaSetoresChart(rows) {
         return;
     }
 
-    if (avariaSetoresChartInstance) {
-        avariaSetoresChartInstance.destroy();
-        avariaSetoresChartInstance = null;
-    }
-
     removeExistingTooltip(canvasElement);
 
     if (!Array.isArray(rows) || !rows.length) {
+        if (avariaSetoresChartInstance) {
+            avariaSetoresChartInstance.destroy();
+            avariaSetoresChartInstance = null;
+        }
         const context = canvasElement.getContext("2d");
         if (context) {
             const width = canvasElement.width || canvasElement.clientWidth || 0;
@@ -2101,7 +2185,7 @@ function renderAvariaSetoresChart(rows) {
         },
     };
 
-    avariaSetoresChartInstance = new Chart(canvasElement, {
+    avariaSetoresChartInstance = renderChartInPlace(avariaSetoresChartInstance, canvasElement, {
         type: "bar",
         data: {
             labels,
@@ -2223,14 +2307,13 @@ function renderAvariaDirecionadosChart(rows) {
         return;
     }
 
-    if (avariaDirecionadosChartInstance) {
-        avariaDirecionadosChartInstance.destroy();
-        avariaDirecionadosChartInstance = null;
-    }
-
     removeExistingTooltip(canvasElement);
 
     if (!Array.isArray(rows) || !rows.length) {
+        if (avariaDirecionadosChartInstance) {
+            avariaDirecionadosChartInstance.destroy();
+            avariaDirecionadosChartInstance = null;
+        }
         const context = canvasElement.getContext("2d");
         if (context) {
             const width = canvasElement.width || canvasElement.clientWidth || 0;
@@ -2244,6 +2327,10 @@ function renderAvariaDirecionadosChart(rows) {
     const topEntries = visibleEntries.slice(0, 6);
 
     if (!topEntries.length) {
+        if (avariaDirecionadosChartInstance) {
+            avariaDirecionadosChartInstance.destroy();
+            avariaDirecionadosChartInstance = null;
+        }
         const context = canvasElement.getContext("2d");
         if (context) {
             const width = canvasElement.width || canvasElement.clientWidth || 0;
@@ -2364,7 +2451,7 @@ function renderAvariaDirecionadosChart(rows) {
         },
     };
 
-    avariaDirecionadosChartInstance = new Chart(canvasElement, {
+    avariaDirecionadosChartInstance = renderChartInPlace(avariaDirecionadosChartInstance, canvasElement, {
         type: "bar",
         data: {
             labels,
@@ -2452,14 +2539,13 @@ function renderAvariaTurnosChart(rows) {
         return;
     }
 
-    if (avariaTurnosChartInstance) {
-        avariaTurnosChartInstance.destroy();
-        avariaTurnosChartInstance = null;
-    }
-
     removeExistingTooltip(canvasElement);
 
     if (!Array.isArray(rows) || !rows.length) {
+        if (avariaTurnosChartInstance) {
+            avariaTurnosChartInstance.destroy();
+            avariaTurnosChartInstance = null;
+        }
         const context = canvasElement.getContext("2d");
         if (context) {
             const width = canvasElement.width || canvasElement.clientWidth || 0;
@@ -2560,7 +2646,7 @@ function renderAvariaTurnosChart(rows) {
         },
     };
 
-    avariaTurnosChartInstance = new Chart(canvasElement, {
+    avariaTurnosChartInstance = renderChartInPlace(avariaTurnosChartInstance, canvasElement, {
         type: "doughnut",
         data: {
             labels,
@@ -3124,13 +3210,7 @@ function updateCorteTop10StatusMessage(entries) {
 }
 
 function loadInventarioDataset(statusElement) {
-    fetch(API_ENDPOINT_INVENTARIO)
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar os dados de inventario");
-            }
-            return response.json();
-        })
+    fetchDashboardSection("inventario", "Falha ao carregar os dados de inventario")
         .then((payload) => {
             renderInventarioValoresCard(payload?.valores);
             renderInventarioCanceladosSection(payload?.cancelados);
@@ -4047,12 +4127,11 @@ function renderInventarioCanceladosSection(canceladosPayload) {
     const values = summary.entries.map((entry) => entry.value);
     const shares = summary.entries.map((entry) => entry.share);
 
-    if (inventarioCanceladosChartInstance) {
-        inventarioCanceladosChartInstance.destroy();
-        inventarioCanceladosChartInstance = null;
-    }
-
     if (!dom.canvas) {
+        if (inventarioCanceladosChartInstance) {
+            inventarioCanceladosChartInstance.destroy();
+            inventarioCanceladosChartInstance = null;
+        }
         renderInventarioCanceladosLegend(summary.entries, colors);
         return;
     }
@@ -4061,6 +4140,10 @@ function renderInventarioCanceladosSection(canceladosPayload) {
 
     const context = dom.canvas.getContext("2d");
     if (!context) {
+        if (inventarioCanceladosChartInstance) {
+            inventarioCanceladosChartInstance.destroy();
+            inventarioCanceladosChartInstance = null;
+        }
         renderInventarioCanceladosLegend(summary.entries, colors);
         return;
     }
@@ -4120,7 +4203,7 @@ function renderInventarioCanceladosSection(canceladosPayload) {
         },
     };
 
-    inventarioCanceladosChartInstance = new Chart(context, {
+    inventarioCanceladosChartInstance = renderChartInPlace(inventarioCanceladosChartInstance, context, {
         type: "pie",
         data: {
             labels,
@@ -4522,13 +4605,12 @@ function renderInventarioChart(dataset) {
     toggleInventarioEmptyState(false);
     updateInventarioLegendState(indicadoresLegenda);
 
-    if (inventarioChartInstance) {
-        inventarioChartInstance.destroy();
-        inventarioChartInstance = null;
-    }
-
     const context = canvas.getContext("2d");
     if (!context) {
+        if (inventarioChartInstance) {
+            inventarioChartInstance.destroy();
+            inventarioChartInstance = null;
+        }
         console.error("Contexto 2D do canvas indisponivel para o grafico de inventario.");
         toggleInventarioEmptyState(true);
         updateInventarioLegendState({ semMeta: false, atingiu: false, naoAtingiu: false });
@@ -4536,7 +4618,7 @@ function renderInventarioChart(dataset) {
     }
 
     try {
-        inventarioChartInstance = new Chart(context, config);
+        inventarioChartInstance = renderChartInPlace(inventarioChartInstance, context, config);
     } catch (error) {
         console.error("Falha ao renderizar grafico de inventario.", error);
         toggleInventarioEmptyState(true);
@@ -4560,10 +4642,6 @@ function renderBloqueadoChart(payload) {
         return;
     }
 
-    if (bloqueadoChartInstance) {
-        bloqueadoChartInstance.destroy();
-    }
-
     removeExistingTooltip(canvasElement);
 
     const styles = getComputedStyle(document.documentElement);
@@ -5094,7 +5172,7 @@ function renderBloqueadoChart(payload) {
         icons: tooltipIcons,
     };
 
-    bloqueadoChartInstance = new Chart(canvasElement, {
+    bloqueadoChartInstance = renderChartInPlace(bloqueadoChartInstance, canvasElement, {
         type: "bar",
         data: {
             labels: payload.labels,
@@ -5277,10 +5355,6 @@ function renderCorteChart(dataset) {
         throw new Error("Dados de corte indisponiveis");
     }
 
-    if (corteChartInstance) {
-        corteChartInstance.destroy();
-    }
-
     const context = canvasElement.getContext("2d");
     const styles = getComputedStyle(document.documentElement);
     const colors = {
@@ -5778,7 +5852,7 @@ function renderCorteChart(dataset) {
         },
     };
 
-    corteChartInstance = new Chart(canvasElement, {
+    corteChartInstance = renderChartInPlace(corteChartInstance, canvasElement, {
         type: "bar",
         data: {
             labels: sanitizedLabels,
@@ -7121,6 +7195,28 @@ function scheduleAvariaSecondaryResize() {
     });
 }
 
+// Re-renders reuse the existing Chart when it is drawn on the same canvas with
+// the same type, so refreshed data animates in place instead of the chart
+// being torn down and rebuilt.
+function renderChartInPlace(chartInstance, item, config) {
+    const canvasElement = item && item.canvas ? item.canvas : item;
+    if (!chartInstance || chartInstance.canvas !== canvasElement || chartInstance.config.type !== config.type) {
+        if (chartInstance) {
+            chartInstance.destroy();
+        }
+        return new Chart(item, config);
+    }
+
+    chartInstance.data = config.data;
+    chartInstance.options = config.options || {};
+    const plugins = chartInstance.config.plugins;
+    if (Array.isArray(plugins)) {
+        plugins.splice(0, plugins.length, ...(config.plugins || []));
+    }
+    chartInstance.update();
+    return chartInstance;
+}
+
 function removeExistingTooltip(canvasElement) {
     if (!canvasElement || !canvasElement.parentNode) {
         return;
@@ -1,5 +1,3 @@
-const FUNNEL_ENDPOINT = "/api/funnel";
-
 const funnelCurrencyFormatter = new Intl.NumberFormat("pt-BR", {
     style: "currency",
     currency: "BRL",
@@ -38,13 +36,7 @@ document.addEventListener("DOMContentLoaded", () => {
 });
 
 function loadFunnelDataset() {
-    fetch(FUNNEL_ENDPOINT)
-        .then((response) => {
-            if (!response.ok) {
-                throw new Error("Falha ao carregar os dados de funnel");
-            }
-            return response.json();
-        })
+    fetchDashboardSection("funnel", "Falha ao carregar os dados de funnel")
         .then((payload) => {
             const dataset = prepareFunnelEntries(payload);
             renderFunnelSummary(dataset);
@@ -0,0 +1,4 @@
+"""Benchmarks for the dashboard's data pipeline.
+
+Run them from the repository root, e.g. ``python -m benchmarks.parallel_parsing``.
+"""
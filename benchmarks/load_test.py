@@ -0,0 +1,468 @@
+"""Load test a running server with many simulated kiosk displays.
+
+Each display replays what a browser does when it opens the dashboard:
+index.html, then in parallel the stylesheet, scripts, background and icon,
+the /api/dashboard bundle app.js requests and the two senha iframes, then the
+images those pages reference. Like a browser it keeps connections alive,
+asks for compressed bodies and revalidates with If-None-Match, and it can
+hold an /api/events stream open the whole time. The request pattern is read
+from Components/index.html, style.css and app.js, so it follows the frontend.
+
+Start the server separately (in the mode and with the settings under test),
+then e.g.:
+
+    python -m benchmarks.load_test --displays 20 --duration 60
+    python -m benchmarks.load_test --displays 50 --interval 5 --processes 2 --json prod.json
+
+Throughput, p50/p95/p99 latency and error rate are reported per endpoint.
+Only the standard library is used, so it runs anywhere Python does.
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import random
+import re
+import select
+import socket
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+COMPONENTS_DIR = Path(__file__).resolve().parent.parent / "Components"
+
+# Browsers open up to six connections per host.
+BROWSER_CONNECTIONS = 6
+REQUEST_TIMEOUT = 30.0
+ACCEPT_ENCODING = "gzip, deflate, br"
+
+_LOCAL_REFERENCE = re.compile(r"""(?:src|href)\s*=\s*["']([^"'#]+)["']""")
+_CSS_URL = re.compile(r"""url\(\s*["']?(/[^"')]+)["']?\s*\)""")
+_ARRAY = r"const {name}\s*=\s*\[(.*?)\];"
+_STRING = r"""const {name}\s*=\s*["']([^"']+)["']"""
+
+
+def _is_local(reference: str) -> bool:
+    return not reference.startswith(("http:", "https:", "//", "data:", "javascript:", "mailto:"))
+
+
+def _absolute(reference: str) -> str:
+    return reference if reference.startswith("/") else "/" + reference
+
+
+def page_pattern(components_dir: Path = COMPONENTS_DIR):
+    """Return (assets, api requests, frames) a display requests after index.html."""
+    html = (components_dir / "index.html").read_text(encoding="utf-8")
+    app_js = (components_dir / "app.js").read_text(encoding="utf-8")
+    css = (components_dir / "style.css").read_text(encoding="utf-8")
+
+    references = [_absolute(ref) for ref in _LOCAL_REFERENCE.findall(html) if _is_local(ref)]
+    frames = [ref for ref in references if not Path(ref).suffix]
+    assets = [ref for ref in references if Path(ref).suffix]
+    assets += [ref for ref in _CSS_URL.findall(css)]
+    assets.append("/favicon.ico")
+
+    endpoint = re.search(_STRING.format(name="API_ENDPOINT_DASHBOARD"), app_js).group(1)
+    sections_source = re.search(_ARRAY.format(name="DASHBOARD_SECTIONS"), app_js, re.S).group(1)
+    sections = re.findall(r"""["']([^"']+)["']""", sections_source)
+    points = re.search(r"const BLOQUEADO_CHART_POINTS\s*=\s*(\d+)", app_js)
+    query = f"sections={','.join(sections)}" + (f"&points={points.group(1)}" if points else "")
+    api = [f"{endpoint}?{query}"]
+    return list(dict.fromkeys(assets)), api, list(dict.fromkeys(frames))
+
+
+def endpoint_label(path: str) -> str:
+    return urllib.parse.urlsplit(path).path
+
+
+class _Client:
+    """One keep-alive connection with a browser-like ETag cache."""
+
+    def __init__(self, host: str, port: int, cache, revalidate: bool) -> None:
+        self._host = host
+        self._port = port
+        self._cache = cache
+        self._revalidate = revalidate
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            self._connection = http.client.HTTPConnection(self._host, self._port, timeout=REQUEST_TIMEOUT)
+        return self._connection
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def get(self, path: str):
+        """Return (status, body, seconds); body is the cached one on a 304."""
+        headers = {"Accept-Encoding": ACCEPT_ENCODING, "Connection": "keep-alive"}
+        cached = self._cache.get(path) if self._revalidate else None
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+
+        started = time.perf_counter()
+        for attempt in (1, 2):
+            try:
+                connection = self._connect()
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closed an idle keep-alive connection; browsers
+                # retry those transparently on a new one.
+                self.close()
+                if attempt == 2:
+                    raise
+                started = time.perf_counter()
+            except Exception:
+                self.close()
+                raise
+        elapsed = time.perf_counter() - started
+
+        if response.getheader("Connection", "").lower() == "close":
+            self.close()
+        etag = response.getheader("ETag")
+        if response.status == 304 and cached is not None:
+            body = cached[1]
+        elif response.status == 200 and etag:
+            self._cache[path] = (etag, body)
+        return response.status, body, elapsed
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.bytes = defaultdict(int)
+        self.page_loads = []
+        self.streams = {"opened": 0, "rejected": 0, "failed": 0, "events": 0}
+
+    def record(self, label: str, status, seconds: float, size: int = 0) -> None:
+        with self._lock:
+            self.samples[label].append(seconds)
+            self.statuses[label][str(status)] += 1
+            self.bytes[label] += size
+            if not isinstance(status, int) or status >= 400:
+                self.errors[label] += 1
+
+    def count_stream(self, outcome: str, amount: int = 1) -> None:
+        with self._lock:
+            self.streams[outcome] += amount
+
+    def add_page_load(self, seconds: float) -> None:
+        with self._lock:
+            self.page_loads.append(seconds)
+
+    def export(self):
+        return {
+            "samples": {label: list(values) for label, values in self.samples.items()},
+            "statuses": {label: dict(counts) for label, counts in self.statuses.items()},
+            "errors": dict(self.errors),
+            "bytes": dict(self.bytes),
+            "page_loads": list(self.page_loads),
+            "streams": dict(self.streams),
+        }
+
+
+class Display:
+    """A kiosk that reloads the dashboard every ``interval`` seconds until ``deadline``."""
+
+    def __init__(self, options, pattern, recorder: _Recorder, deadline: float, seed: int) -> None:
+        self._options = options
+        self._assets, self._api, self._frames = pattern
+        self._recorder = recorder
+        self._deadline = deadline
+        self._random = random.Random(seed)
+        self._cache = {}
+        self._local = threading.local()
+        self._clients = []
+        self._clients_lock = threading.Lock()
+
+    def _client(self) -> _Client:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = _Client(self._options.host, self._options.port, self._cache, self._options.revalidate)
+            self._local.client = client
+            with self._clients_lock:
+                self._clients.append(client)
+        return client
+
+    def _fetch(self, path: str):
+        label = endpoint_label(path)
+        started = time.perf_counter()
+        try:
+            status, body, seconds = self._client().get(path)
+        except (OSError, http.client.HTTPException) as error:
+            self._recorder.record(label, type(error).__name__, time.perf_counter() - started)
+            return None
+        self._recorder.record(label, status, seconds, len(body))
+        return body
+
+    def _frame_resources(self, body):
+        if not body:
+            return []
+        html = body.decode("utf-8", errors="replace")
+        return [_absolute(ref) for ref in _LOCAL_REFERENCE.findall(html) if _is_local(ref)]
+
+    def page_load(self, pool: ThreadPoolExecutor) -> None:
+        started = time.perf_counter()
+        self._fetch("/")
+        frame_futures = [pool.submit(self._fetch, frame) for frame in self._frames]
+        others = [pool.submit(self._fetch, path) for path in self._assets + self._api]
+        resources = []
+        for future in frame_futures:
+            resources.extend(self._frame_resources(future.result()))
+        others += [pool.submit(self._fetch, path) for path in dict.fromkeys(resources)]
+        for future in others:
+            future.result()
+        self._recorder.add_page_load(time.perf_counter() - started)
+
+    def _hold_event_stream(self) -> None:
+        request = (
+            f"GET /api/events HTTP/1.1\r\nHost: {self._options.host}:{self._options.port}\r\n"
+            "Accept: text/event-stream\r\nCache-Control: no-cache\r\n\r\n"
+        ).encode("ascii")
+        while time.monotonic() < self._deadline:
+            try:
+                stream = socket.create_connection((self._options.host, self._options.port), timeout=5.0)
+            except OSError:
+                self._recorder.count_stream("failed")
+                time.sleep(1.0)
+                continue
+            try:
+                stream.sendall(request)
+                self._read_events(stream)
+            except OSError:
+                self._recorder.count_stream("failed")
+                time.sleep(1.0)
+            finally:
+                stream.close()
+
+    def _read_events(self, stream: socket.socket) -> None:
+        # Read with select() rather than a file object so the display can stop
+        # at its deadline between the server's keep-alive comments.
+        received = b""
+        status = None
+        while time.monotonic() < self._deadline:
+            readable, _, _ = select.select([stream], [], [], 1.0)
+            if not readable:
+                continue
+            chunk = stream.recv(65536)
+            if not chunk:
+                return
+            received += chunk
+            if status is None:
+                if b"\r\n" not in received:
+                    continue
+                status_line = received.split(b"\r\n", 1)[0].split()
+                status = int(status_line[1]) if len(status_line) > 1 and status_line[1].isdigit() else 0
+                if status != 200:
+                    self._recorder.count_stream("rejected")
+                    time.sleep(min(5.0, max(0.0, self._deadline - time.monotonic())))
+                    return
+                self._recorder.count_stream("opened")
+            events = received.count(b"\nevent:")
+            if events:
+                self._recorder.count_stream("events", events)
+            received = received[received.rfind(b"\n") + 1:]
+
+    def run(self) -> None:
+        stream = None
+        if self._options.events:
+            stream = threading.Thread(target=self._hold_event_stream, name="display-events", daemon=True)
+            stream.start()
+        # Spread the first page loads over the ramp-up so displays do not start in lockstep.
+        time.sleep(self._random.uniform(0, self._options.ramp_up))
+        with ThreadPoolExecutor(max_workers=BROWSER_CONNECTIONS) as pool:
+            while time.monotonic() < self._deadline:
+                self.page_load(pool)
+                if self._options.interval:
+                    pause = self._options.interval * self._random.uniform(0.8, 1.2)
+                    time.sleep(max(0.0, min(pause, self._deadline - time.monotonic())))
+        with self._clients_lock:
+            for client in self._clients:
+                client.close()
+        if stream is not None:
+            stream.join()
+
+
+def _run_displays(options, display_ids):
+    pattern = page_pattern()
+    recorder = _Recorder()
+    deadline = time.monotonic() + options.duration
+    threads = [
+        threading.Thread(
+            target=Display(options, pattern, recorder, deadline, options.seed + display_id).run,
+            name=f"display-{display_id}",
+        )
+        for display_id in display_ids
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.export()
+
+
+def _merge(parts):
+    merged = {
+        "samples": defaultdict(list),
+        "statuses": defaultdict(lambda: defaultdict(int)),
+        "errors": defaultdict(int),
+        "bytes": defaultdict(int),
+        "page_loads": [],
+        "streams": defaultdict(int),
+    }
+    for part in parts:
+        for label, values in part["samples"].items():
+            merged["samples"][label].extend(values)
+        for label, counts in part["statuses"].items():
+            for status, count in counts.items():
+                merged["statuses"][label][status] += count
+        for key in ("errors", "bytes", "streams"):
+            for label, value in part[key].items():
+                merged[key][label] += value
+        merged["page_loads"].extend(part["page_loads"])
+    return merged
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _summary(values, elapsed: float, errors: int = 0):
+    return {
+        "requests": len(values),
+        "per_second": len(values) / elapsed if elapsed else 0.0,
+        "error_rate": errors / len(values) if values else 0.0,
+        "p50_ms": _percentile(values, 0.50) * 1000,
+        "p95_ms": _percentile(values, 0.95) * 1000,
+        "p99_ms": _percentile(values, 0.99) * 1000,
+    }
+
+
+def wait_until_ready(host: str, port: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        connection = http.client.HTTPConnection(host, port, timeout=2.0)
+        try:
+            connection.request("GET", "/readyz")
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                return True
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            connection.close()
+        time.sleep(0.5)
+    return False
+
+
+def run(options):
+    displays = list(range(options.displays))
+    processes = max(1, min(options.processes, options.displays))
+    started = time.perf_counter()
+    if processes == 1:
+        parts = [_run_displays(options, displays)]
+    else:
+        shares = [displays[index::processes] for index in range(processes)]
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            parts = pool.starmap(_run_displays, [(options, share) for share in shares])
+    elapsed = time.perf_counter() - started
+    merged = _merge(parts)
+
+    endpoints = {}
+    for label, values in merged["samples"].items():
+        entry = _summary(values, elapsed, merged["errors"].get(label, 0))
+        entry["statuses"] = dict(merged["statuses"][label])
+        entry["bytes"] = merged["bytes"].get(label, 0)
+        endpoints[label] = entry
+    all_samples = [value for values in merged["samples"].values() for value in values]
+    return {
+        "target": f"http://{options.host}:{options.port}",
+        "displays": options.displays,
+        "processes": processes,
+        "duration_seconds": elapsed,
+        "interval_seconds": options.interval,
+        "revalidate": options.revalidate,
+        "events": options.events,
+        "total": _summary(all_samples, elapsed, sum(merged["errors"].values())),
+        "page_loads": _summary(merged["page_loads"], elapsed),
+        "event_streams": dict(merged["streams"]),
+        "endpoints": dict(sorted(endpoints.items(), key=lambda item: -item[1]["requests"])),
+    }
+
+
+def _print_report(results) -> None:
+    total = results["total"]
+    pages = results["page_loads"]
+    print(
+        f"{results['displays']} displays for {results['duration_seconds']:.1f}s against {results['target']}: "
+        f"{total['requests']} requests, {total['per_second']:.1f} req/s, "
+        f"{total['error_rate'] * 100:.2f}% errors"
+    )
+    print(
+        f"page loads: {pages['requests']} ({pages['per_second']:.2f}/s), "
+        f"p50 {pages['p50_ms']:.0f} ms, p95 {pages['p95_ms']:.0f} ms, p99 {pages['p99_ms']:.0f} ms"
+    )
+    if results["events"]:
+        streams = results["event_streams"]
+        print(
+            f"event streams: {streams.get('opened', 0)} opened, {streams.get('rejected', 0)} rejected, "
+            f"{streams.get('failed', 0)} failed"
+        )
+    print(f"{'endpoint':<28}{'requests':>10}{'req/s':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for label, entry in results["endpoints"].items():
+        print(
+            f"{label[:27]:<28}{entry['requests']:>10}{entry['per_second']:>9.1f}"
+            f"{entry['error_rate'] * 100:>7.1f}%{entry['p50_ms']:>9.1f}{entry['p95_ms']:>9.1f}{entry['p99_ms']:>9.1f}"
+        )
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="server to load (default %(default)s)")
+    parser.add_argument("--displays", type=int, default=10, help="simulated displays")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.0,
+        help="seconds between a display's page loads; 0 reloads back to back",
+    )
+    parser.add_argument("--ramp-up", type=float, default=2.0, help="seconds over which displays start")
+    parser.add_argument("--processes", type=int, default=1, help="client processes the displays are spread over")
+    parser.add_argument("--no-revalidate", dest="revalidate", action="store_false", help="never send If-None-Match")
+    parser.add_argument("--no-events", dest="events", action="store_false", help="do not hold /api/events streams")
+    parser.add_argument("--wait", type=float, default=0.0, help="wait up to this many seconds for /readyz first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    options = parser.parse_args()
+
+    target = urllib.parse.urlsplit(options.url)
+    options.host = target.hostname or "127.0.0.1"
+    options.port = target.port or 80
+    if options.wait and not wait_until_ready(options.host, options.port, options.wait):
+        parser.exit(1, f"{options.url} did not become ready within {options.wait:g}s\n")
+
+    results = run(options)
+    _print_report(results)
+    if options.json:
+        options.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,80 @@
+"""Serial vs. process-pool parsing of a synthetic workbook.
+
+    python -m benchmarks.parallel_parsing --rows 20000 --workers 2 4 5
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import main
+from benchmarks.synthetic import generate_workbook
+from parsing import SheetPool, load_sheets
+
+
+def _time_serial(content: bytes, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        load_sheets(io.BytesIO(content), main.REGISTERED_SHEETS, main.SHEET_CONVERSION_PLANS, main.STRICT_SCHEMA_SHEETS)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _time_pool(content: bytes, workers: int, repeat: int):
+    pool = SheetPool(workers, main.SHEET_GROUPS, main.SHEET_CONVERSION_PLANS, main.STRICT_SCHEMA_SHEETS)
+    try:
+        # The first call pays for spawning the workers, which the server does
+        # only once; time the steady state.
+        pool.load(content)
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            pool.load(content)
+            samples.append(time.perf_counter() - started)
+        return samples
+    finally:
+        pool.shutdown()
+
+
+def run(rows: int, workers, repeat: int, workbook=None):
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(workbook) if workbook else generate_workbook(Path(directory) / "Apresentação.xlsx", rows)
+        content = path.read_bytes()
+
+    results = {"rows": rows, "workbook_bytes": len(content), "cpus": os.cpu_count(), "runs": []}
+    serial = statistics.median(_time_serial(content, repeat))
+    results["runs"].append({"workers": 1, "seconds": serial, "speedup": 1.0})
+    for count in workers:
+        seconds = statistics.median(_time_pool(content, count, repeat))
+        results["runs"].append({"workers": count, "seconds": seconds, "speedup": serial / seconds})
+    return results
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 3, 5])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workbook", type=Path, help="benchmark this workbook instead of a synthetic one")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    options = parser.parse_args()
+
+    results = run(options.rows, options.workers, options.repeat, options.workbook)
+    print(
+        f"{results['workbook_bytes'] / 1e6:.1f} MB workbook, {options.rows} rows per sheet, "
+        f"{results['cpus']} CPU(s)"
+    )
+    for entry in results["runs"]:
+        print(f"  {entry['workers']:>2} worker(s): {entry['seconds']:8.3f}s  x{entry['speedup']:.2f}")
+    if options.json:
+        options.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,315 @@
+"""Stage-by-stage benchmark of the data pipeline on synthetic workbooks.
+
+For each row count a workbook is generated and timed through every stage a
+request can depend on: parsing the sheets, running their conversion plans,
+writing and reading a snapshot, building and encoding every section payload,
+and the end-to-end latency of every /api endpoint through the Flask test
+client. Results are written as JSON; pass a previous result file to
+--compare to flag stages that got slower.
+
+    python -m benchmarks.pipeline --rows 100 1000 10000 --output run.json
+    python -m benchmarks.pipeline --rows 100 1000 10000 --compare run.json
+
+Generating and parsing 1M-row workbooks takes a long time with openpyxl;
+--cache-dir keeps generated workbooks between runs.
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import main
+from benchmarks.synthetic import generate_workbook
+from parsing import LoadWorkbook, convert_sheet
+from serialization import COLUMNAR, ROWS
+from snapshots import SnapshotStore
+from workbook import StaticWorkbook, WorkbookVersion, read_workbook_bytes
+
+DEFAULT_ROWS = (100, 1000, 10000)
+# Stages faster than this are dominated by timer noise and never flagged.
+COMPARE_FLOOR_SECONDS = 0.002
+
+
+def _median(samples) -> float:
+    return statistics.median(samples) if samples else 0.0
+
+
+def _percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _read_workbook(rows: int, seed: int, cache_dir):
+    """Return (identity, content, generate seconds) of the synthetic workbook of ``rows`` rows."""
+    with tempfile.TemporaryDirectory(prefix="painel-bench-") as directory:
+        if cache_dir is not None:
+            path = Path(cache_dir) / f"synthetic-{rows}-{seed}.xlsx"
+            path.parent.mkdir(parents=True, exist_ok=True)
+        else:
+            path = Path(directory) / "Apresentação.xlsx"
+        generate_seconds = 0.0
+        if not path.is_file():
+            started = time.perf_counter()
+            generate_workbook(path, rows, seed)
+            generate_seconds = time.perf_counter() - started
+        identity, content = read_workbook_bytes(path)
+    return identity, content, generate_seconds
+
+
+def _time_load(content: bytes, repeat: int):
+    """Parse every sheet ``repeat`` times; return per-sheet medians and the last parse."""
+    samples = {sheet_name: [] for sheet_name in main.REGISTERED_SHEETS}
+    totals = []
+    sheets = None
+    for _ in range(repeat):
+        timings = {}
+        started = time.perf_counter()
+        sheets = LoadWorkbook(io.BytesIO(content), main.REGISTERED_SHEETS, timings)
+        totals.append(time.perf_counter() - started)
+        for sheet_name, seconds in timings.items():
+            samples[sheet_name].append(seconds)
+    return {
+        "seconds": _median(totals),
+        "sheets": {sheet_name: _median(values) for sheet_name, values in samples.items() if values},
+    }, sheets
+
+
+def _time_conversion(parsed, repeat: int):
+    samples = {sheet_name: [] for sheet_name in parsed}
+    converted = {}
+    for _ in range(repeat):
+        for sheet_name, dataframe in parsed.items():
+            if dataframe is None:
+                converted[sheet_name] = None
+                continue
+            # Conversion works in place, so every run starts from a fresh copy.
+            frame = dataframe.copy(deep=True)
+            started = time.perf_counter()
+            converted[sheet_name] = convert_sheet(
+                sheet_name,
+                frame,
+                main.SHEET_CONVERSION_PLANS[sheet_name],
+                sheet_name in main.STRICT_SCHEMA_SHEETS,
+            )
+            samples[sheet_name].append(time.perf_counter() - started)
+    per_sheet = {sheet_name: _median(values) for sheet_name, values in samples.items() if values}
+    return {"seconds": sum(per_sheet.values()), "sheets": per_sheet}, converted
+
+
+def _time_snapshot(identity, sheets, repeat: int):
+    with tempfile.TemporaryDirectory(prefix="painel-bench-snapshots-") as directory:
+        store = SnapshotStore(Path(directory), "benchmark")
+        started = time.perf_counter()
+        store.save(identity.digest, sheets)
+        save_seconds = time.perf_counter() - started
+        loads = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            store.load(identity.digest)
+            loads.append(time.perf_counter() - started)
+    return {"save_seconds": save_seconds, "load_seconds": _median(loads)}
+
+
+def _time_serialization(identity, sheets, repeat: int):
+    results = {}
+    for layout in (ROWS, COLUMNAR):
+        per_section = {}
+        for section in main.API_SECTIONS:
+            builds, encodes, size = [], [], 0
+            for _ in range(repeat):
+                version = WorkbookVersion(identity, sheets)
+                started = time.perf_counter()
+                payload = main.API_SECTIONS[section](version, layout)
+                builds.append(time.perf_counter() - started)
+                if payload is None:
+                    continue
+                started = time.perf_counter()
+                encoded = main.encode_json(main.app, payload)
+                encodes.append(time.perf_counter() - started)
+                size = len(encoded.body)
+            per_section[section] = {
+                "build_seconds": _median(builds),
+                "encode_seconds": _median(encodes),
+                "bytes": size,
+            }
+        results[layout] = per_section
+    return results
+
+
+def _api_paths():
+    paths = [
+        rule.rule
+        for rule in main.app.url_map.iter_rules()
+        if rule.rule.startswith("/api/") and not rule.arguments and rule.rule not in ("/api/events",)
+    ]
+    return sorted(paths)
+
+
+def _time_endpoints(identity, sheets, repeat: int):
+    client = main.app.test_client()
+    previous = main.WORKBOOK
+    results = {}
+    try:
+        for path in _api_paths():
+            # Cold: the first request against a freshly published revision,
+            # which builds and encodes the payload.
+            main.WORKBOOK = StaticWorkbook(WorkbookVersion(identity, sheets))
+            started = time.perf_counter()
+            response = client.get(path, headers={"Accept-Encoding": "gzip"})
+            cold = time.perf_counter() - started
+            server_timing = response.headers.get("Server-Timing", "")
+            warm = []
+            for _ in range(max(repeat, 1) * 10):
+                started = time.perf_counter()
+                client.get(path, headers={"Accept-Encoding": "gzip"})
+                warm.append(time.perf_counter() - started)
+            results[path] = {
+                "status": response.status_code,
+                "bytes": len(response.get_data()),
+                "cold_seconds": cold,
+                "cold_server_timing": server_timing,
+                "warm_p50_seconds": _percentile(warm, 0.50),
+                "warm_p95_seconds": _percentile(warm, 0.95),
+            }
+    finally:
+        main.WORKBOOK = previous
+    return results
+
+
+def run_size(rows: int, repeat: int, seed: int = 0, cache_dir=None):
+    identity, content, generate_seconds = _read_workbook(rows, seed, cache_dir)
+    print(f"{rows} rows: {len(content) / 1e6:.1f} MB workbook")
+
+    load, parsed = _time_load(content, repeat)
+    print(f"  load        {load['seconds']:9.3f}s")
+    conversion, sheets = _time_conversion(parsed, repeat)
+    print(f"  conversion  {conversion['seconds']:9.3f}s")
+    snapshot = _time_snapshot(identity, sheets, repeat)
+    print(f"  snapshot    {snapshot['save_seconds']:9.3f}s save, {snapshot['load_seconds']:.3f}s load")
+    serialization = _time_serialization(identity, sheets, repeat)
+    for layout, sections in serialization.items():
+        total = sum(entry["build_seconds"] + entry["encode_seconds"] for entry in sections.values())
+        print(f"  serialize   {total:9.3f}s ({layout})")
+    endpoints = _time_endpoints(identity, sheets, repeat)
+    slowest = max(endpoints.items(), key=lambda item: item[1]["cold_seconds"])
+    print(f"  endpoints   {slowest[1]['cold_seconds']:9.3f}s slowest cold ({slowest[0]})")
+
+    return {
+        "rows": rows,
+        "workbook_bytes": len(content),
+        "generate_seconds": generate_seconds,
+        "load": load,
+        "conversion": conversion,
+        "snapshot": snapshot,
+        "serialization": serialization,
+        "endpoints": endpoints,
+    }
+
+
+def _git_revision():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run(rows, repeat: int = 3, seed: int = 0, cache_dir=None):
+    return {
+        "meta": {
+            "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "runs": [run_size(count, repeat, seed, cache_dir) for count in rows],
+    }
+
+
+def _timings(results):
+    """Flatten every ``*seconds`` value of a result file into {metric path: seconds}."""
+    flat = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, child in value.items():
+                walk(f"{prefix}/{key}" if prefix else str(key), child)
+        elif isinstance(value, (int, float)) and prefix.endswith("seconds") and "generate_seconds" not in prefix:
+            flat[prefix] = float(value)
+
+    for entry in results.get("runs", []):
+        walk(f"rows={entry['rows']}", {key: value for key, value in entry.items() if key != "rows"})
+    return flat
+
+
+def compare(previous, current, threshold: float):
+    """Return (metric, before, after) for every timing that grew by more than ``threshold``."""
+    before = _timings(previous)
+    after = _timings(current)
+    regressions = []
+    for metric, old in sorted(before.items()):
+        new = after.get(metric)
+        if new is None or max(old, new) < COMPARE_FLOOR_SECONDS:
+            continue
+        if new > old * (1 + threshold):
+            regressions.append((metric, old, new))
+    return regressions
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-dir", type=Path, help="keep generated workbooks here between runs")
+    parser.add_argument("--output", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="a previous result file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="relative slowdown reported as a regression (default 0.25)",
+    )
+    options = parser.parse_args()
+
+    results = run(options.rows, options.repeat, options.seed, options.cache_dir)
+    if options.output:
+        options.output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if options.compare:
+        previous = json.loads(options.compare.read_text(encoding="utf-8"))
+        regressions = compare(previous, results, options.threshold)
+        if not regressions:
+            print(f"No regressions against {options.compare}")
+            return
+        print(f"{len(regressions)} regression(s) against {options.compare}:")
+        for metric, old, new in regressions:
+            print(f"  {metric}: {old * 1000:.1f} ms -> {new * 1000:.1f} ms (x{new / old:.2f})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,126 @@
+"""The old iterrows() serializer vs. serialize_dataframe, in both layouts.
+
+Frames are built from the synthetic workbook's cell generators and run
+through the sheets' conversion plans, so they have the dtypes a parsed
+workbook has, without writing and parsing a large .xlsx first.
+
+    python -m benchmarks.serialization --rows 10000 100000
+    python -m benchmarks.serialization --rows 10000 --sheets Corte "Senha 167" --output serialization.json
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+import main
+from benchmarks.synthetic import CELLS, SHEET_COLUMNS
+from parsing import convert_sheet
+from serialization import COLUMNAR, ROWS, serialize_dataframe
+
+DEFAULT_ROWS = (10000, 100000)
+# Text and floats, dates next to integers, and text with missing cells.
+DEFAULT_SHEETS = (main.DATA_SHEET_CORTE, main.DATA_SHEET_SENHA_167, main.DATA_SHEET_FUNNEL)
+
+
+def _legacy_coerce_value(value: Any):
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if pd.isna(value):
+        return None
+    if isinstance(value, (float, int, str, bool)):
+        return value
+    return str(value)
+
+
+def legacy_serialize_dataframe(dataframe: pd.DataFrame):
+    """The serializer main.py used before serialization.py, kept as the baseline."""
+    return {
+        "columns": list(dataframe.columns),
+        "rows": [
+            {column: _legacy_coerce_value(row[column]) for column in dataframe.columns}
+            for _, row in dataframe.iterrows()
+        ],
+    }
+
+
+def synthetic_frame(sheet_name: str, rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = random.Random(seed)
+    columns = SHEET_COLUMNS[sheet_name]
+    cells = [CELLS[kind] for _, kind in columns]
+    frame = pd.DataFrame(
+        [[cell(rng, index) for cell in cells] for index in range(rows)],
+        columns=[column for column, _ in columns],
+    )
+    return convert_sheet(
+        sheet_name,
+        frame,
+        main.SHEET_CONVERSION_PLANS[sheet_name],
+        sheet_name in main.STRICT_SCHEMA_SHEETS,
+    )
+
+
+def _median_seconds(function, repeat: int):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+
+def run_sheet(sheet_name: str, rows: int, repeat: int, seed: int = 0):
+    frame = synthetic_frame(sheet_name, rows, seed)
+    legacy, expected = _median_seconds(lambda: legacy_serialize_dataframe(frame), repeat)
+    rows_seconds, actual = _median_seconds(lambda: serialize_dataframe(frame, ROWS), repeat)
+    columnar_seconds, _ = _median_seconds(lambda: serialize_dataframe(frame, COLUMNAR), repeat)
+    return {
+        "sheet": sheet_name,
+        "rows": rows,
+        "dtypes": {str(column): str(dtype) for column, dtype in frame.dtypes.items()},
+        "identical": actual == expected,
+        "legacy_seconds": legacy,
+        "rows_seconds": rows_seconds,
+        "columnar_seconds": columnar_seconds,
+        "rows_speedup": legacy / rows_seconds if rows_seconds else None,
+        "columnar_speedup": legacy / columnar_seconds if columnar_seconds else None,
+    }
+
+
+def run(rows, sheets, repeat: int = 3, seed: int = 0):
+    results = []
+    for count in rows:
+        for sheet_name in sheets:
+            entry = run_sheet(sheet_name, count, repeat, seed)
+            print(
+                f"{count:>8} rows  {sheet_name:<12} iterrows {entry['legacy_seconds']:8.3f}s"
+                f"  rows {entry['rows_seconds']:7.3f}s (x{entry['rows_speedup']:.0f})"
+                f"  columnar {entry['columnar_seconds']:7.3f}s (x{entry['columnar_speedup']:.0f})"
+                + ("" if entry["identical"] else "  OUTPUT DIFFERS")
+            )
+            results.append(entry)
+    return results
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS))
+    parser.add_argument("--sheets", nargs="+", default=list(DEFAULT_SHEETS), choices=sorted(SHEET_COLUMNS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the results to this JSON file")
+    options = parser.parse_args()
+
+    results = run(options.rows, options.sheets, options.repeat, options.seed)
+    if options.output:
+        options.output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main_cli()
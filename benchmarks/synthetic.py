@@ -0,0 +1,112 @@
+"""Synthetic ``Apresentação.xlsx`` workbooks with every sheet main.py reads."""
+
+import argparse
+import datetime
+import random
+from pathlib import Path
+
+from openpyxl import Workbook
+
+import main
+
+MONTHS = ("Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+          "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro")
+MOTIVOS = ("Avaria", "Qualidade", "Vencido", "Falta", "Divergência", None)
+SETORES = ("Seco", "Frios", "Congelados", "Hortifruti", "Bazar")
+START_DATE = datetime.date(2024, 1, 1)
+
+
+def _brl(value: float) -> str:
+    text = f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"R$ {text}"
+
+
+# Cell generators, called with (random, row index). Values mix native numbers
+# and the pt-BR formatted text the real workbook contains, so the converters'
+# string paths are exercised too.
+CELLS = {
+    "month": lambda rng, i: MONTHS[(i // 31) % 12],
+    "day": lambda rng, i: i % 31 + 1,
+    "date_label": lambda rng, i: (START_DATE + datetime.timedelta(days=i)).strftime("%d/%m/%Y"),
+    "date": lambda rng, i: datetime.datetime.combine(START_DATE + datetime.timedelta(days=i), datetime.time()),
+    "currency": lambda rng, i: _brl(rng.uniform(1e3, 1e6)) if i % 2 else round(rng.uniform(1e3, 1e6), 2),
+    "signed": lambda rng, i: round(rng.uniform(-5e4, 5e4), 2),
+    "percent": lambda rng, i: f"{rng.uniform(-30, 30):.2f}%".replace(".", ",") if i % 2 else rng.uniform(0, 1),
+    "integer": lambda rng, i: f"{rng.randint(1, 5000):,}".replace(",", ".") if i % 3 == 0 else rng.randint(1, 5000),
+    "item": lambda rng, i: 100000 + i,
+    "motivo": lambda rng, i: rng.choice(MOTIVOS),
+    "setor": lambda rng, i: rng.choice(SETORES),
+    "text": lambda rng, i: f"Descrição {i}",
+    "note": lambda rng, i: rng.choice((None, "", "Revisar com o setor", "Aguardando NF")),
+}
+
+# (column, cell kind) of every sheet, named exactly as main.py expects them.
+SHEET_COLUMNS = {
+    main.DATA_SHEET: [("Mês", "month"), ("Dia", "day"), ("R$ Bloq. no ESTOQUE", "currency"),
+                      ("Acumulativo", "signed"), ("%", "percent")],
+    main.DATA_SHEET_BLOQ10: [("Item", "item"), ("Descrição", "text"), ("Qtd. Bloq. Estoque", "integer"),
+                             ("Valor Bloquado", "currency"), ("Motivo do Bloqueio", "motivo")],
+    main.DATA_SHEET_CORTE: [("Rótulos de Linha", "date_label"), ("Soma de Valor Total", "currency"),
+                            ("FATURAMENTO", "currency"), ("%", "percent"), ("META", "percent")],
+    main.DATA_SHEET_CORTE_2: [("Motivos", "motivo"), ("Soma de Valor Total", "currency")],
+    main.DATA_SHEET_CORTE_SETORES: [("Setor", "setor"), ("Soma de Valor Total", "currency")],
+    main.DATA_SHEET_CORTE_TOP10: [("Itens", "item"), ("Descrição", "text"),
+                                  ("Soma de Valor Total Corte/Pedido", "currency"), ("Soma de Qtde", "integer")],
+    main.DATA_SHEET_INVENTARIO: [("Mês", "month"), ("Realizado", "percent"), ("Meta", "percent")],
+    main.DATA_SHEET_INVENTARIO_2: [("Mês", "month"), ("Estoque Contado Acumulado", "currency"),
+                                   ("11 Ajuste Inv. Falta", "signed"), ("5 Ajuste Inv. Sobra", "signed"),
+                                   ("Valor Absoluto", "currency"), ("Valor Modular", "currency"),
+                                   ("% Ajuste", "percent")],
+    main.DATA_SHEET_INVENTARIO_CANCELADO: [("Motivo de Cancelamento", "motivo"),
+                                           ("Quantidade cancelado", "integer"), ("Valor cancelado", "currency")],
+    main.DATA_SHEET_INVENTARIO_MOTIVO_CANCELADO: [("Motivos", "motivo"), ("Observação", "note")],
+    main.DATA_SHEET_FUNNEL: [("Motivos Bloqueio", "motivo"), ("Soma de Valor (BRL)", "currency"),
+                             ("Observação", "note")],
+    main.DATA_SHEET_SENHA_167: [("Data", "date"), ("Pedido", "item"), ("Setor", "setor"), ("Valor", "signed")],
+    main.DATA_SHEET_SENHA_171: [("Data", "date"), ("Pedido", "item"), ("Setor", "setor")],
+    main.DATA_SHEET_AVARIA_SETORES: [("Setores", "setor"), ("Valor Avariado", "currency"), ("Quantidade", "integer")],
+    main.DATA_SHEET_AVARIA_ITENS: [("ITEM", "item"), ("DESCRIÇÃO DO ITEM", "text"), ("Valor", "currency"),
+                                   ("Quantidade", "integer")],
+    main.DATA_SHEET_AVARIA_MOTIVOS: [("Motivos", "motivo"), ("Valor Avariado", "currency"),
+                                     ("Contagem de UNID.", "integer")],
+    main.DATA_SHEET_AVARIA_DIRECIONADOS: [("Direcionados", "setor"), ("Avariado", "currency"),
+                                          ("Recuperado", "currency")],
+    main.DATA_SHEET_AVARIA_TURNOS: [("Setores", "setor"), ("Valor Avariado", "currency"), ("Quantidade", "integer")],
+}
+
+# Ranking sheets hold a fixed number of rows whatever the workbook size.
+TOP10_SHEETS = frozenset({main.DATA_SHEET_BLOQ10, main.DATA_SHEET_CORTE_TOP10, main.DATA_SHEET_AVARIA_ITENS})
+
+
+def generate_workbook(path, rows: int, seed: int = 0) -> Path:
+    """Write a workbook with ``rows`` rows in every growing sheet and return its path."""
+    missing = set(main.REGISTERED_SHEETS) - set(SHEET_COLUMNS)
+    if missing:
+        raise ValueError(f"No synthetic columns for sheets: {', '.join(sorted(missing))}")
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    for sheet_name, columns in SHEET_COLUMNS.items():
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append([column for column, _ in columns])
+        cells = [CELLS[kind] for _, kind in columns]
+        count = min(rows, 10) if sheet_name in TOP10_SHEETS else rows
+        for index in range(count):
+            worksheet.append([cell(rng, index) for cell in cells])
+
+    path = Path(path)
+    workbook.save(path)
+    return path
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args()
+    generate_workbook(options.output, options.rows, options.seed)
+
+
+if __name__ == "__main__":
+    main_cli()
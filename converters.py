@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+
+def converter_valor(valor):
+    try:
+        if isinstance(valor, str):
+            valor = valor.replace("R$", "").replace(".", "").replace(",", ".").strip()
+            return float(valor)
+        return float(valor)
+    except ValueError:
+        return 0.0
+
+
+def convert_percentage(valor):
+    try:
+        if isinstance(valor, str):
+            valor = valor.replace("%", "").replace(",", ".").strip()
+            valor_float = float(valor)
+        else:
+            valor_float = float(valor)
+
+        if valor_float > 1:
+            return valor_float / 100
+
+        return valor_float
+    except ValueError:
+        return 0.0
+
+
+def convert_integer(valor):
+    try:
+        if isinstance(valor, str):
+            cleaned = valor.replace(".", "").replace(",", ".").strip()
+            if cleaned == "":
+                return 0
+            return int(float(cleaned))
+        return int(valor)
+    except (ValueError, TypeError):
+        return 0
+
+
+_CURRENCY_REPLACEMENTS = (("R$", ""), (".", ""), (",", "."))
+_PERCENTAGE_REPLACEMENTS = (("%", ""), (",", "."))
+_INTEGER_REPLACEMENTS = ((".", ""), (",", "."))
+
+try:
+    _ARROW_STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    _ARROW_STRING_DTYPE = None
+
+# Largest magnitude for which int(float(x)) == int(x) for integral x.
+_EXACT_FLOAT_INT = 2**53
+
+
+def _clean_strings(strings: np.ndarray, replacements) -> np.ndarray:
+    """Apply the converters' replace/strip clean-up to an array of strings."""
+    if _ARROW_STRING_DTYPE is None:
+        cleaned = []
+        for value in strings:
+            for old, new in replacements:
+                value = value.replace(old, new)
+            cleaned.append(value.strip())
+        return np.array(cleaned, dtype=object)
+
+    column = pd.Series(strings, dtype=_ARROW_STRING_DTYPE)
+    for old, new in replacements:
+        column = column.str.replace(old, new, regex=False)
+    return column.str.strip().to_numpy(dtype=object)
+
+
+def _strings_to_floats(strings: np.ndarray):
+    """float() every cleaned string; cells float() may reject are flagged instead.
+
+    Object-to-float casts call float() on each element, so successful cells are
+    bit-identical to the scalar converters. Rejected cells ("", "-", stray text)
+    are left to the scalar converter so its error handling still applies.
+    """
+    try:
+        return strings.astype(float), np.zeros(len(strings), dtype=bool)
+    except ValueError:
+        pass
+
+    rejected = pd.to_numeric(pd.Series(strings, dtype=object), errors="coerce").isna().to_numpy(dtype=bool)
+    values = np.full(len(strings), np.nan, dtype=float)
+    try:
+        values[~rejected] = strings[~rejected].astype(float)
+    except ValueError:
+        rejected[:] = True
+    return values, rejected
+
+
+def _parse_floats(series: pd.Series, replacements):
+    """Return float(cell) for every cell plus a mask of cells that need the scalar path.
+
+    String cells go through the same replace/strip clean-up as the scalar
+    converters before parsing; other cells are passed to float() as-is.
+    """
+    size = len(series)
+    values = np.full(size, np.nan, dtype=float)
+
+    if series.dtype.kind in "biuf":
+        return series.to_numpy(dtype=float), np.zeros(size, dtype=bool)
+
+    fallback = np.zeros(size, dtype=bool)
+    raw = series.to_numpy(dtype=object)
+    if isinstance(series.dtype, pd.StringDtype):
+        is_string = series.notna().to_numpy(dtype=bool)
+    else:
+        is_string = np.fromiter((isinstance(value, str) for value in raw), dtype=bool, count=size)
+
+    if is_string.any():
+        strings = _clean_strings(raw[is_string], replacements)
+        string_values, rejected = _strings_to_floats(strings)
+        values[is_string] = string_values
+        fallback[np.flatnonzero(is_string)[rejected]] = True
+
+    # float(None) raises while NumPy silently maps None to NaN.
+    others = ~is_string
+    others_none = others & np.equal(raw, None)
+    fallback |= others_none
+    others &= ~others_none
+    if others.any():
+        try:
+            values[others] = raw[others].astype(float)
+        except (TypeError, ValueError):
+            fallback |= others
+
+    return values, fallback
+
+
+def _apply_fallback(series: pd.Series, result: np.ndarray, fallback: np.ndarray, scalar) -> pd.Series:
+    if fallback.any():
+        raw = series.to_numpy(dtype=object)
+        positions = np.flatnonzero(fallback)
+        converted = [scalar(raw[position]) for position in positions]
+        try:
+            result[positions] = converted
+        except (OverflowError, TypeError, ValueError):
+            result = result.astype(object)
+            result[positions] = converted
+            return pd.Series(result, index=series.index, name=series.name).infer_objects()
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+def convert_currency_column(series: pd.Series) -> pd.Series:
+    """Column-wise equivalent of ``series.apply(converter_valor)``."""
+    if series.empty:
+        return series.apply(converter_valor)
+    values, fallback = _parse_floats(series, _CURRENCY_REPLACEMENTS)
+    return _apply_fallback(series, values, fallback, converter_valor)
+
+
+def convert_percentage_column(series: pd.Series) -> pd.Series:
+    """Column-wise equivalent of ``series.apply(convert_percentage)``."""
+    if series.empty:
+        return series.apply(convert_percentage)
+    values, fallback = _parse_floats(series, _PERCENTAGE_REPLACEMENTS)
+    values = np.where(values > 1, values / 100, values)
+    return _apply_fallback(series, values, fallback, convert_percentage)
+
+
+def convert_integer_column(series: pd.Series) -> pd.Series:
+    """Column-wise equivalent of ``series.apply(convert_integer)``."""
+    if series.empty:
+        return series.apply(convert_integer)
+    if series.dtype.kind in "ib":
+        return pd.Series(series.to_numpy(dtype=np.int64), index=series.index, name=series.name)
+
+    values, fallback = _parse_floats(series, _INTEGER_REPLACEMENTS)
+    # NaN, infinities and integers too large to round-trip through float keep
+    # their scalar semantics (0, OverflowError and arbitrary precision).
+    fallback |= ~(np.abs(values) < _EXACT_FLOAT_INT)
+    result = np.zeros(len(values), dtype=np.int64)
+    exact = ~fallback
+    result[exact] = np.trunc(values[exact]).astype(np.int64)
+    return _apply_fallback(series, result, fallback, convert_integer)
+
+
+TEXT = "text"
+CURRENCY = "currency"
+PERCENT = "percent"
+INTEGER = "integer"
+
+
+def _convert_text_column(series: pd.Series) -> pd.Series:
+    return series.astype(str)
+
+
+COLUMN_CONVERTERS = {
+    TEXT: _convert_text_column,
+    CURRENCY: convert_currency_column,
+    PERCENT: convert_percentage_column,
+    INTEGER: convert_integer_column,
+}
+
+
+def compile_schema(schema):
+    """Turn a ``{column: kind}`` mapping into an ordered tuple of ``(column, converter)`` steps."""
+    plan = []
+    for column, kind in schema.items():
+        try:
+            plan.append((column, COLUMN_CONVERTERS[kind]))
+        except KeyError:
+            raise ValueError(f"Unknown column type '{kind}' for column '{column}'") from None
+    return tuple(plan)
+
+
+def apply_conversion_plan(dataframe: pd.DataFrame, plan, strict: bool = False) -> pd.DataFrame:
+    """Convert the planned columns of ``dataframe`` in place.
+
+    Columns absent from the sheet are skipped unless ``strict`` is set, in which
+    case a ``KeyError`` is raised. Columns converted before an error keep their
+    new values.
+    """
+    for column, converter in plan:
+        if column not in dataframe.columns:
+            if strict:
+                raise KeyError(column)
+            continue
+        dataframe[column] = converter(dataframe[column])
+    return dataframe
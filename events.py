@@ -0,0 +1,155 @@
+import hashlib
+import itertools
+import json
+import queue
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Milliseconds browsers wait before reconnecting a dropped stream.
+RECONNECT_DELAY_MS = 5000
+
+
+def format_event(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    lines.extend(f"data: {line}" for line in payload.splitlines())
+    return "\n".join(lines) + "\n\n"
+
+
+class _Stream:
+    """Iterable body of one text/event-stream response.
+
+    Holds one of the broker's client slots until the server closes the
+    response, which happens once a write to a disconnected client fails.
+    """
+
+    def __init__(self, broker: "EventBroker", initial: Sequence[str]) -> None:
+        self._broker = broker
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._pending = [f"retry: {RECONNECT_DELAY_MS}\n\n", *initial]
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self._closed:
+            raise StopIteration
+        if self._pending:
+            return self._pending.pop(0)
+        try:
+            return self._queue.get(timeout=self._broker.heartbeat)
+        except queue.Empty:
+            # Comment lines keep proxies from closing the idle connection and
+            # reveal disconnected clients, whose writes then fail.
+            return ": keep-alive\n\n"
+
+    def put(self, message: str) -> None:
+        self._queue.put(message)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._broker._release(self)
+
+
+class EventBroker:
+    """Fans server-sent events out to every connected dashboard.
+
+    Each open stream keeps a server thread busy, so at most ``max_clients``
+    streams are accepted at once; ``open_stream`` returns None beyond that.
+    """
+
+    def __init__(self, max_clients: int = 24, heartbeat: float = 15.0) -> None:
+        self.max_clients = max_clients
+        self.heartbeat = heartbeat
+        self._lock = threading.Lock()
+        self._streams: List[_Stream] = []
+        self._ids = itertools.count(1)
+
+    @property
+    def client_count(self) -> int:
+        return len(self._streams)
+
+    def open_stream(self, initial: Iterable[Tuple[str, Any]] = ()) -> Optional[_Stream]:
+        with self._lock:
+            if len(self._streams) >= self.max_clients:
+                return None
+            stream = _Stream(self, [format_event(event, data) for event, data in initial])
+            self._streams.append(stream)
+            return stream
+
+    def publish(self, event: str, data: Any) -> None:
+        with self._lock:
+            message = format_event(event, data, next(self._ids))
+            streams = list(self._streams)
+        for stream in streams:
+            stream.put(message)
+
+    def _release(self, stream: _Stream) -> None:
+        with self._lock:
+            if stream in self._streams:
+                self._streams.remove(stream)
+
+
+class SectionChangeTracker:
+    """Works out which API sections changed between published workbook versions.
+
+    ``section_sheets`` maps every section to the sheets its payload is built
+    from; a section changed when the content hash of any of them differs. The
+    sheet hashes of the last ``history`` versions are kept so clients holding
+    an older version can be told what changed since.
+    """
+
+    def __init__(self, section_sheets: Mapping[str, Sequence[str]], history: int = 32) -> None:
+        self._section_sheets = {section: tuple(sheets) for section, sheets in section_sheets.items()}
+        self._history_size = max(1, history)
+        self._lock = threading.Lock()
+        self._history: "OrderedDict[str, Dict[str, Optional[str]]]" = OrderedDict()
+
+    def changed_sections(self, old_digests, new_digests) -> List[str]:
+        return [
+            section
+            for section, sheets in self._section_sheets.items()
+            if any(old_digests.get(sheet) != new_digests.get(sheet) for sheet in sheets)
+        ]
+
+    def section_versions(self, digests) -> Dict[str, str]:
+        """Content hash of every section, derived from the hashes of its sheets."""
+        versions = {}
+        for section, sheets in self._section_sheets.items():
+            parts = "\0".join(f"{sheet}={digests.get(sheet)}" for sheet in sheets)
+            versions[section] = hashlib.sha256(parts.encode("utf-8")).hexdigest()[:16]
+        return versions
+
+    def changes_since(self, since: Optional[str], version) -> Optional[List[str]]:
+        """Sections that changed between ``since`` and ``version``, or None if ``since`` is unknown."""
+        if since == version.version:
+            return []
+        with self._lock:
+            old_digests = self._history.get(since) if since else None
+        if old_digests is None:
+            return None
+        return self.changed_sections(old_digests, version.sheet_digests)
+
+    def record(self, version) -> Dict[str, Any]:
+        """Register a newly published version and describe what changed since the previous one."""
+        digests = version.sheet_digests
+        with self._lock:
+            previous = next(reversed(self._history.items()), None)
+            self._history[version.version] = digests
+            self._history.move_to_end(version.version)
+            while len(self._history) > self._history_size:
+                self._history.popitem(last=False)
+        if previous is None:
+            return {"version": version.version, "previous": None, "sections": list(self._section_sheets)}
+        previous_version, previous_digests = previous
+        return {
+            "version": version.version,
+            "previous": previous_version,
+            "sections": self.changed_sections(previous_digests, digests),
+        }
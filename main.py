@@ -1,13 +1,35 @@
+import argparse
+import datetime
+import io
 import os
 import sys
-from functools import lru_cache
 from pathlib import Path
-from typing import Any
 
 import pandas as pd
-from flask import Flask, abort, jsonify, render_template, send_from_directory, url_for
+from flask import Flask, Response, abort, jsonify, render_template, request, send_from_directory, url_for
 from flask_cors import CORS
 
+from converters import (
+    CURRENCY,
+    INTEGER,
+    PERCENT,
+    TEXT,
+    compile_schema,
+)
+from events import EventBroker, SectionChangeTracker
+from metrics import CONTENT_TYPE, LOAD_BUCKETS, REGISTRY, Gauge, Histogram, instrument_app
+from parsing import SheetPool, load_sheets
+from profiling import RequestProfiler, timed
+from responses import PrecompressedAssets, encode_json, send_encoded
+from rollups import BUCKETS, Measure, RollupIndex, day_month_dates, label_dates
+from series import SOURCE_COLUMNS, IncrementalSeries
+from serialization import COLUMNAR, COLUMNAR_MEDIA_TYPE, ROWS, serialize_dataframe
+from serving import DEVELOPMENT, add_server_arguments, default_server_options, serve, stream_capacity
+from snapshots import SnapshotStore, schema_fingerprint
+from tables import IndexedTable, QueryError, is_table_query, parse_table_query
+from warmup import WarmUp
+from workbook import WorkbookCache
+
 
 def _is_frozen() -> bool:
     return getattr(sys, "frozen", False)
@@ -41,6 +63,8 @@ BASE_DIR = _get_resource_dir()
 DATA_FILE = _get_data_file()
 app = Flask(__name__, static_folder=str(BASE_DIR / "Components"), static_url_path="")
 CORS(app)
+instrument_app(app)
+STATIC_ASSETS = PrecompressedAssets(BASE_DIR / "Components")
 DATA_SHEET = "Bloqueado por Mês"
 DATA_SHEET_BLOQ10 = "Bloqueado-top10"
 DATA_SHEET_CORTE = "Corte"
@@ -60,6 +84,74 @@ DATA_SHEET_AVARIA_MOTIVOS = "Avaria - Motivos"
 DATA_SHEET_AVARIA_DIRECIONADOS = "Avaria - Direcionados"
 DATA_SHEET_AVARIA_TURNOS = "Avaria - Turnos"
 
+# Column types of every sheet read from the workbook. Each schema is compiled
+# once into a conversion plan that runs when the workbook is loaded, so the
+# cached frames are already typed. Columns absent from a sheet are skipped.
+SHEET_SCHEMAS = {
+    DATA_SHEET: {
+        "R$ Bloq. no ESTOQUE": CURRENCY,
+        "Acumulativo": CURRENCY,
+        "%": PERCENT,
+    },
+    DATA_SHEET_BLOQ10: {
+        "Item": TEXT,
+        "Descrição": TEXT,
+        "Qtd. Bloq. Estoque": CURRENCY,
+        "Valor Bloquado": CURRENCY,
+        "Motivo do Bloqueio": TEXT,
+    },
+    DATA_SHEET_CORTE: {
+        "Rótulos de Linha": TEXT,
+        "Soma de Valor Total": CURRENCY,
+        "FATURAMENTO": CURRENCY,
+        "%": PERCENT,
+        "META": PERCENT,
+    },
+    DATA_SHEET_CORTE_2: {"Motivos": TEXT, "Soma de Valor Total": CURRENCY},
+    DATA_SHEET_CORTE_SETORES: {"Setor": TEXT, "Soma de Valor Total": CURRENCY},
+    DATA_SHEET_CORTE_TOP10: {
+        "Itens": TEXT,
+        "Descrição": TEXT,
+        "Soma de Valor Total Corte/Pedido": CURRENCY,
+        "Soma de Qtde": CURRENCY,
+    },
+    DATA_SHEET_INVENTARIO: {"Realizado": PERCENT, "Meta": PERCENT},
+    DATA_SHEET_INVENTARIO_2: {
+        "Estoque Contado Acumulado": CURRENCY,
+        "11 Ajuste Inv. Falta": CURRENCY,
+        "5 Ajuste Inv. Sobra": CURRENCY,
+        "Valor Absoluto": CURRENCY,
+        "Valor Modular": CURRENCY,
+        "% Ajuste": PERCENT,
+    },
+    DATA_SHEET_INVENTARIO_CANCELADO: {
+        "Motivo de Cancelamento": TEXT,
+        "Quantidade cancelado": INTEGER,
+        "Valor cancelado": CURRENCY,
+    },
+    DATA_SHEET_INVENTARIO_MOTIVO_CANCELADO: {"Motivos": TEXT, "Observação": TEXT},
+    DATA_SHEET_FUNNEL: {"Motivos Bloqueio": TEXT, "Soma de Valor (BRL)": CURRENCY},
+    DATA_SHEET_SENHA_167: {},
+    DATA_SHEET_SENHA_171: {},
+    DATA_SHEET_AVARIA_SETORES: {"Setores": TEXT, "Valor Avariado": CURRENCY, "Quantidade": INTEGER},
+    DATA_SHEET_AVARIA_ITENS: {
+        "ITEM": TEXT,
+        "DESCRIÇÃO DO ITEM": TEXT,
+        "Valor": CURRENCY,
+        "Quantidade": INTEGER,
+    },
+    DATA_SHEET_AVARIA_MOTIVOS: {"Motivos": TEXT, "Valor Avariado": CURRENCY, "Contagem de UNID.": INTEGER},
+    DATA_SHEET_AVARIA_DIRECIONADOS: {"Direcionados": TEXT, "Avariado": CURRENCY, "Recuperado": CURRENCY},
+    DATA_SHEET_AVARIA_TURNOS: {"Setores": TEXT, "Valor Avariado": CURRENCY, "Quantidade": INTEGER},
+}
+
+# Sheets whose schema columns are mandatory: a missing or unconvertible column
+# makes the whole sheet unavailable instead of serving it half-converted.
+STRICT_SCHEMA_SHEETS = frozenset({DATA_SHEET})
+
+REGISTERED_SHEETS = tuple(SHEET_SCHEMAS)
+SHEET_CONVERSION_PLANS = {sheet_name: compile_schema(schema) for sheet_name, schema in SHEET_SCHEMAS.items()}
+
 SENHA_PLACEHOLDER_CONFIG = {
     "falta": {
         "title": "Senha Falta",
@@ -77,65 +169,6 @@ SENHA_PLACEHOLDER_CONFIG = {
     },
 }
 
-def LoadData(file_path, sheet_name):
-    try:
-        data = pd.read_excel(file_path, sheet_name=sheet_name)
-        return data
-    except Exception as e:
-        print(f"An error occurred while loading the data: {e}")
-        return None
-    
-def converter_valor(valor):
-    try:
-        if isinstance(valor, str):
-            valor = valor.replace("R$", "").replace(".", "").replace(",", ".").strip()
-            return float(valor)
-        return float(valor)
-    except ValueError:
-        return 0.0
-    
-def convert_percentage(valor):
-    try:
-        if isinstance(valor, str):
-            valor = valor.replace("%", "").replace(",", ".").strip()
-            valor_float = float(valor)
-        else:
-            valor_float = float(valor)
-
-        if valor_float > 1:
-            return valor_float / 100
-
-        return valor_float
-    except ValueError:
-        return 0.0
-
-
-def convert_integer(valor):
-    try:
-        if isinstance(valor, str):
-            cleaned = valor.replace(".", "").replace(",", ".").strip()
-            if cleaned == "":
-                return 0
-            return int(float(cleaned))
-        return int(valor)
-    except (ValueError, TypeError):
-        return 0
-
-
-def ProcessData(data):
-    try:
-        data = data.copy()
-        colunas_formatadas = ["R$ Bloq. no ESTOQUE", "Acumulativo", "%"]
-        for coluna in colunas_formatadas:
-            if coluna == "%":
-                data[coluna] = data[coluna].apply(convert_percentage)
-            else:
-                data[coluna] = data[coluna].apply(converter_valor)
-        return data
-    except Exception as e:
-        print(f"An error occurred while processing the data: {e}")
-        return None
-
 
 def _normalize_column_name(name: str) -> str:
     replacements = {
@@ -166,655 +199,878 @@ def _find_column(dataframe, target_keyword):
     raise KeyError(f"Column containing '{target_keyword}' not found in dataframe")
 
 
-@lru_cache(maxsize=None)
-def _load_sheet(sheet_name: str):
-    dataframe = LoadData(str(DATA_FILE), sheet_name)
-    if dataframe is None:
+# Sheets parsed together by one worker when PAINEL_PARSE_WORKERS enables the
+# process pool; any registered sheet left out is parsed on its own.
+SHEET_GROUPS = (
+    (DATA_SHEET, DATA_SHEET_BLOQ10, DATA_SHEET_FUNNEL),
+    (DATA_SHEET_CORTE, DATA_SHEET_CORTE_2, DATA_SHEET_CORTE_SETORES, DATA_SHEET_CORTE_TOP10),
+    (
+        DATA_SHEET_INVENTARIO,
+        DATA_SHEET_INVENTARIO_2,
+        DATA_SHEET_INVENTARIO_CANCELADO,
+        DATA_SHEET_INVENTARIO_MOTIVO_CANCELADO,
+    ),
+    (
+        DATA_SHEET_AVARIA_SETORES,
+        DATA_SHEET_AVARIA_ITENS,
+        DATA_SHEET_AVARIA_MOTIVOS,
+        DATA_SHEET_AVARIA_DIRECIONADOS,
+        DATA_SHEET_AVARIA_TURNOS,
+    ),
+    (DATA_SHEET_SENHA_167, DATA_SHEET_SENHA_171),
+)
+
+
+def _get_sheet_pool():
+    workers = int(os.environ.get("PAINEL_PARSE_WORKERS", "0"))
+    if workers < 2:
         return None
-    return dataframe
+    grouped = {sheet_name for group in SHEET_GROUPS for sheet_name in group}
+    groups = SHEET_GROUPS + tuple((sheet_name,) for sheet_name in REGISTERED_SHEETS if sheet_name not in grouped)
+    return SheetPool(workers, groups, SHEET_CONVERSION_PLANS, STRICT_SCHEMA_SHEETS)
+
+
+SHEET_POOL = _get_sheet_pool()
+
+
+SHEET_CONVERSION_SECONDS = Histogram(
+    "painel_sheet_conversion_seconds",
+    "Time spent running each sheet's conversion plan after parsing it.",
+    ("sheet",),
+    buckets=LOAD_BUCKETS,
+)
+SHEET_LOAD_SECONDS = Histogram(
+    "painel_sheet_load_seconds",
+    "Time to load each sheet: parse plus conversion from the workbook, or a snapshot read.",
+    ("sheet", "source"),
+    buckets=LOAD_BUCKETS,
+)
+WORKBOOK_LOAD_SECONDS = Histogram(
+    "painel_workbook_load_seconds",
+    "Time to load every sheet of a workbook revision.",
+    ("source",),
+    buckets=LOAD_BUCKETS,
+)
+
+
+def _load_registered_sheets(source, timings=None):
+    conversion_timings = {}
+    sheets = None
+    if SHEET_POOL is not None:
+        content = source.read()
+        sheets = SHEET_POOL.load(content, timings, conversion_timings)
+        if sheets is not None:
+            sheets = {sheet_name: sheets.get(sheet_name) for sheet_name in REGISTERED_SHEETS}
+        else:
+            source = io.BytesIO(content)
+    if sheets is None:
+        sheets = load_sheets(
+            source, REGISTERED_SHEETS, SHEET_CONVERSION_PLANS, STRICT_SCHEMA_SHEETS, timings, conversion_timings
+        )
+    for sheet_name, seconds in conversion_timings.items():
+        SHEET_CONVERSION_SECONDS.observe(seconds, sheet=sheet_name)
+    return sheets
 
 
-def load_processed_dataframe():
-    dataframe = _load_sheet(DATA_SHEET)
-    if dataframe is None:
-        return None
-    return ProcessData(dataframe)
+def _record_load_metrics(version):
+    if version.load_seconds is not None:
+        WORKBOOK_LOAD_SECONDS.observe(version.load_seconds, source=version.source)
+    for sheet_name, seconds in version.sheet_seconds.items():
+        SHEET_LOAD_SECONDS.observe(seconds, sheet=sheet_name, source=version.source)
 
 
-def load_corte_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_CORTE)
-    if dataframe is None:
+def _get_snapshot_store():
+    if os.environ.get("PAINEL_SNAPSHOTS", "1") == "0":
         return None
-    dataframe = dataframe.copy()
+    override = os.environ.get("PAINEL_SNAPSHOT_DIR")
+    directory = Path(override).expanduser() if override else _get_data_dir() / ".painel-cache"
+    fingerprint = schema_fingerprint(
+        sorted((sheet_name, sorted(schema.items())) for sheet_name, schema in SHEET_SCHEMAS.items()),
+        sorted(STRICT_SCHEMA_SHEETS),
+    )
+    return SnapshotStore(directory, fingerprint)
 
-    try:
-        if "Rótulos de Linha" in dataframe.columns:
-            dataframe["Rótulos de Linha"] = dataframe["Rótulos de Linha"].astype(str)
 
-        if "Soma de Valor Total" in dataframe.columns:
-            dataframe["Soma de Valor Total"] = dataframe["Soma de Valor Total"].apply(converter_valor)
+WORKBOOK = WorkbookCache(
+    DATA_FILE,
+    _load_registered_sheets,
+    check_interval=float(os.environ.get("PAINEL_RELOAD_INTERVAL", "2")),
+    snapshots=_get_snapshot_store(),
+)
+WORKBOOK.subscribe(_record_load_metrics)
 
-        if "FATURAMENTO" in dataframe.columns:
-            dataframe["FATURAMENTO"] = dataframe["FATURAMENTO"].apply(converter_valor)
 
-        if "%" in dataframe.columns:
-            dataframe["%"] = dataframe["%"].apply(convert_percentage)
+def _get_request_profiler():
+    # ?profile=1 costs a cProfile run per request, so it stays off unless the
+    # operator enables it.
+    enabled = os.environ.get("PAINEL_PROFILING", "0") == "1"
+    override = os.environ.get("PAINEL_PROFILE_DIR")
+    directory = Path(override).expanduser() if override else _get_data_dir() / ".painel-cache" / "profiles"
+    return RequestProfiler(enabled=enabled, directory=directory)
 
-        if "META" in dataframe.columns:
-            dataframe["META"] = dataframe["META"].apply(convert_percentage)
-    except Exception as error:
-        print(f"An error occurred while processing the Corte data: {error}")
 
-    return dataframe
+REQUEST_PROFILER = _get_request_profiler()
+REQUEST_PROFILER.install(app)
 
 
-def load_corte_motivos_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_CORTE_2)
-    if dataframe is None:
+def _available_sheet(version, sheet_name):
+    dataframe = version.sheets.get(sheet_name)
+    if dataframe is None or dataframe.empty:
         return None
-    dataframe = dataframe.copy()
-
-    try:
-        if "Motivos" in dataframe.columns:
-            dataframe["Motivos"] = dataframe["Motivos"].astype(str)
-
-        if "Soma de Valor Total" in dataframe.columns:
-            dataframe["Soma de Valor Total"] = dataframe["Soma de Valor Total"].apply(converter_valor)
-    except Exception as error:
-        print(f"An error occurred while processing the Corte Motivos data: {error}")
-
     return dataframe
 
 
-def load_corte_setores_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_CORTE_SETORES)
-    if dataframe is None:
-        return None
-    dataframe = dataframe.copy()
+def _sheet_payload_builder(sheet_name):
+    def build(version, layout=ROWS):
+        dataframe = _available_sheet(version, sheet_name)
+        if dataframe is None:
+            return None
+        return serialize_dataframe(dataframe, layout)
 
-    try:
-        if "Setor" in dataframe.columns:
-            dataframe["Setor"] = dataframe["Setor"].astype(str)
+    build.sheet_name = sheet_name
+    return build
 
-        if "Soma de Valor Total" in dataframe.columns:
-            dataframe["Soma de Valor Total"] = dataframe["Soma de Valor Total"].apply(converter_valor)
-    except Exception as error:
-        print(f"An error occurred while processing the Corte Setores data: {error}")
 
-    return dataframe
+# The daily series of the last revision built, extended in place of a full
+# rebuild when a reload only appends days.
+BLOQUEADO_SERIES = IncrementalSeries()
 
 
-def load_corte_top10_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_CORTE_TOP10)
+def _bloqueado_series(version):
+    dataframe = _available_sheet(version, DATA_SHEET)
     if dataframe is None:
         return None
-    dataframe = dataframe.copy()
-
-    try:
-        if "Itens" in dataframe.columns:
-            dataframe["Itens"] = dataframe["Itens"].astype(str)
-
-        if "Descrição" in dataframe.columns:
-            dataframe["Descrição"] = dataframe["Descrição"].astype(str)
 
-        if "Soma de Valor Total Corte/Pedido" in dataframe.columns:
-            dataframe["Soma de Valor Total Corte/Pedido"] = dataframe["Soma de Valor Total Corte/Pedido"].apply(converter_valor)
-
-        if "Soma de Qtde" in dataframe.columns:
-            dataframe["Soma de Qtde"] = dataframe["Soma de Qtde"].apply(converter_valor)
-    except Exception as error:
-        print(f"An error occurred while processing the Corte Top10 data: {error}")
+    def build():
+        columns = (
+            _find_column(dataframe, "dia"),
+            _find_column(dataframe, "mes"),
+            "R$ Bloq. no ESTOQUE",
+            "%",
+            "Acumulativo",
+        )
+        source = pd.DataFrame(
+            {name: dataframe[column].to_numpy() for name, column in zip(SOURCE_COLUMNS, columns)}
+        )
+        return BLOQUEADO_SERIES.update(source)
 
-    return dataframe
+    return version.memo(("bloqueado series",), build)
 
 
-def load_bloqueado_top10_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_BLOQ10)
-    if dataframe is None:
+def build_bloqueado_payload(version, layout=ROWS):
+    series = _bloqueado_series(version)
+    if series is None:
         return None
-    dataframe = dataframe.copy()
-
-    try:
-        if "Item" in dataframe.columns:
-            dataframe["Item"] = dataframe["Item"].astype(str)
+    # Not a table: both layouts share one payload per revision.
+    return version.memo(("bloqueado",), series.payload)
 
-        if "Descrição" in dataframe.columns:
-            dataframe["Descrição"] = dataframe["Descrição"].astype(str)
 
-        if "Qtd. Bloq. Estoque" in dataframe.columns:
-            dataframe["Qtd. Bloq. Estoque"] = dataframe["Qtd. Bloq. Estoque"].apply(converter_valor)
+def bloqueado_length(version):
+    series = _bloqueado_series(version)
+    return 0 if series is None else len(series)
 
-        if "Valor Bloquado" in dataframe.columns:
-            dataframe["Valor Bloquado"] = dataframe["Valor Bloquado"].apply(converter_valor)
 
-        if "Motivo do Bloqueio" in dataframe.columns:
-            dataframe["Motivo do Bloqueio"] = dataframe["Motivo do Bloqueio"].astype(str)
-    except Exception as error:
-        print(f"An error occurred while processing the Bloqueado Top10 data: {error}")
-
-    return dataframe
+def build_bloqueado_downsampled(version, points):
+    series = _bloqueado_series(version)
+    if series is None:
+        return None
+    return series.downsampled(points)
 
 
-def load_inventario_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_INVENTARIO)
+def build_inventario_payload(version, layout=ROWS):
+    dataframe = _available_sheet(version, DATA_SHEET_INVENTARIO)
     if dataframe is None:
         return None
-    dataframe = dataframe.copy()
 
-    try:
-        if "Realizado" in dataframe.columns:
-            dataframe["Realizado"] = dataframe["Realizado"].apply(convert_percentage)
+    payload = serialize_dataframe(dataframe, layout)
+    valores_dataframe = _available_sheet(version, DATA_SHEET_INVENTARIO_2)
+    if valores_dataframe is not None:
+        payload["valores"] = serialize_dataframe(valores_dataframe, layout)
+    cancelado_dataframe = _available_sheet(version, DATA_SHEET_INVENTARIO_CANCELADO)
+    if cancelado_dataframe is not None:
+        payload["cancelados"] = serialize_dataframe(cancelado_dataframe, layout)
+    motivo_cancelado_dataframe = _available_sheet(version, DATA_SHEET_INVENTARIO_MOTIVO_CANCELADO)
+    if motivo_cancelado_dataframe is not None:
+        payload["cancelados_motivos"] = serialize_dataframe(motivo_cancelado_dataframe, layout)
+    return payload
+
+
+def _first_observations(dataframe, motivo_column, observacao_column):
+    """First non-empty observation of each motive, keyed like the funnel entries."""
+    observations = dataframe[observacao_column]
+    observations = observations[observations.notna()]
+    if observations.empty:
+        # A column left blank is read as all-NaN floats, which have no .str.
+        return {}
+    texts = observations.map(str).astype(object).str.strip()
+    texts = texts[texts != ""]
+    first = (
+        pd.DataFrame({"motive": dataframe.loc[texts.index, motivo_column], "text": texts})
+        .drop_duplicates("motive", keep="first")
+    )
+    return {
+        None if pd.isna(motive) else motive: text for motive, text in zip(first["motive"], first["text"])
+    }
 
-        if "Meta" in dataframe.columns:
-            dataframe["Meta"] = dataframe["Meta"].apply(convert_percentage)
-    except Exception as error:
-        print(f"An error occurred while processing the Inventario data: {error}")
 
-    return dataframe
+def _funnel_summary(dataframe):
+    motivo_column = _find_column(dataframe, "motivos bloqueio")
+    valor_column = _find_column(dataframe, "soma de valor")
+    try:
+        observacao_column = _find_column(dataframe, "observacao")
+    except KeyError:
+        observacao_column = None
 
+    total = float(dataframe[valor_column].fillna(0).astype(float).sum())
 
-def load_inventario_valores_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_INVENTARIO_2)
-    if dataframe is None:
-        return None
-    dataframe = dataframe.copy()
+    grouped = (
+        dataframe[[motivo_column, valor_column]]
+        .groupby(motivo_column, dropna=False, as_index=False)
+        .sum(numeric_only=True)
+    )
+    grouped[valor_column] = grouped[valor_column].fillna(0).astype(float)
+    grouped.sort_values(by=valor_column, ascending=False, inplace=True)
 
-    try:
-        valor_columns = {
-            "Estoque Contado Acumulado": converter_valor,
-            "11 Ajuste Inv. Falta": converter_valor,
-            "5 Ajuste Inv. Sobra": converter_valor,
-            "Valor Absoluto": converter_valor,
-            "Valor Modular": converter_valor,
+    observation_lookup = {}
+    if observacao_column:
+        observation_lookup = _first_observations(dataframe, motivo_column, observacao_column)
+
+    # One entry per motive, so these loops are as short as the chart.
+    motives = [None if pd.isna(motivo) else motivo for motivo in grouped[motivo_column]]
+    entries = [
+        {
+            "label": "Sem motivo" if motivo is None else str(motivo),
+            "value": valor,
+            "share": (valor / total) if total else 0.0,
+            "observation": observation_lookup.get(motivo),
         }
+        for motivo, valor in zip(motives, grouped[valor_column].tolist())
+    ]
 
-        for column_name, converter in valor_columns.items():
-            if column_name in dataframe.columns:
-                dataframe[column_name] = dataframe[column_name].apply(converter)
-
-        if "% Ajuste" in dataframe.columns:
-            dataframe["% Ajuste"] = dataframe["% Ajuste"].apply(convert_percentage)
-    except Exception as error:
-        print(f"An error occurred while processing the Inventario Valores data: {error}")
-    return dataframe
+    return {
+        "total": total,
+        "entries": entries,
+    }
 
 
-def load_inventario_cancelado_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_INVENTARIO_CANCELADO)
+def build_funnel_payload(version, layout=ROWS):
+    dataframe = _available_sheet(version, DATA_SHEET_FUNNEL)
     if dataframe is None:
         return None
-    dataframe = dataframe.copy()
+    # The funnel is not a table, so both layouts share one summary per revision.
+    return version.memo(("funnel",), lambda: _funnel_summary(dataframe))
+
+
+# Payload builders of every /api section. Each one receives a WorkbookVersion
+# and a table layout (rows or columnar; sections that are not plain tables
+# ignore it) and returns a JSON-ready dict, or None when its sheet is
+# unavailable. Results are memoized on the version, so they are computed once
+# per workbook revision and shared read-only by every request.
+API_SECTIONS = {
+    "bloqueado": build_bloqueado_payload,
+    "bloqueado_top10": _sheet_payload_builder(DATA_SHEET_BLOQ10),
+    "corte": _sheet_payload_builder(DATA_SHEET_CORTE),
+    "corte_motivos": _sheet_payload_builder(DATA_SHEET_CORTE_2),
+    "corte_setores": _sheet_payload_builder(DATA_SHEET_CORTE_SETORES),
+    "corte_top10": _sheet_payload_builder(DATA_SHEET_CORTE_TOP10),
+    "inventario": build_inventario_payload,
+    "funnel": build_funnel_payload,
+    "senha_167": _sheet_payload_builder(DATA_SHEET_SENHA_167),
+    "senha_171": _sheet_payload_builder(DATA_SHEET_SENHA_171),
+    "avaria_setores": _sheet_payload_builder(DATA_SHEET_AVARIA_SETORES),
+    "avaria_top10": _sheet_payload_builder(DATA_SHEET_AVARIA_ITENS),
+    "avaria_motivos": _sheet_payload_builder(DATA_SHEET_AVARIA_MOTIVOS),
+    "avaria_direcionados": _sheet_payload_builder(DATA_SHEET_AVARIA_DIRECIONADOS),
+    "avaria_turnos": _sheet_payload_builder(DATA_SHEET_AVARIA_TURNOS),
+}
 
-    try:
-        if "Motivo de Cancelamento" in dataframe.columns:
-            dataframe["Motivo de Cancelamento"] = dataframe["Motivo de Cancelamento"].astype(str)
+# Sheets each section is built from, used to tell which sections a workbook
+# save actually changed.
+SECTION_SHEETS = {
+    "bloqueado": (DATA_SHEET,),
+    "bloqueado_top10": (DATA_SHEET_BLOQ10,),
+    "corte": (DATA_SHEET_CORTE,),
+    "corte_motivos": (DATA_SHEET_CORTE_2,),
+    "corte_setores": (DATA_SHEET_CORTE_SETORES,),
+    "corte_top10": (DATA_SHEET_CORTE_TOP10,),
+    "inventario": (
+        DATA_SHEET_INVENTARIO,
+        DATA_SHEET_INVENTARIO_2,
+        DATA_SHEET_INVENTARIO_CANCELADO,
+        DATA_SHEET_INVENTARIO_MOTIVO_CANCELADO,
+    ),
+    "funnel": (DATA_SHEET_FUNNEL,),
+    "senha_167": (DATA_SHEET_SENHA_167,),
+    "senha_171": (DATA_SHEET_SENHA_171,),
+    "avaria_setores": (DATA_SHEET_AVARIA_SETORES,),
+    "avaria_top10": (DATA_SHEET_AVARIA_ITENS,),
+    "avaria_motivos": (DATA_SHEET_AVARIA_MOTIVOS,),
+    "avaria_direcionados": (DATA_SHEET_AVARIA_DIRECIONADOS,),
+    "avaria_turnos": (DATA_SHEET_AVARIA_TURNOS,),
+}
 
-        if "Quantidade cancelado" in dataframe.columns:
-            dataframe["Quantidade cancelado"] = dataframe["Quantidade cancelado"].apply(convert_integer)
+SECTION_CHANGES = SectionChangeTracker(SECTION_SHEETS)
+
+
+PAYLOAD_BUILD_SECONDS = Histogram(
+    "painel_payload_build_seconds",
+    "Time to serialize a section's sheets into its JSON-ready payload.",
+    ("section", "layout"),
+)
+PAYLOAD_ENCODE_SECONDS = Histogram(
+    "painel_payload_encode_seconds",
+    "Time to encode a payload to JSON bytes.",
+    ("payload",),
+)
+
+# Sections with long chart series: their builder for a ``points`` resolution
+# and the full length of their series. Longer series are downsampled to that
+# many points while the metrics stay exact.
+DOWNSAMPLED_SECTIONS = {
+    "bloqueado": (build_bloqueado_downsampled, bloqueado_length),
+}
+# The only resolutions served. Requested point counts are snapped up to the
+# next one and larger counts are rejected, so a version caches at most one
+# payload per resolution plus the full series.
+DOWNSAMPLE_RESOLUTIONS = (60, 120, 240, 480, 960)
+
+# Sections served straight from one sheet. Their endpoints also answer
+# limit/offset/columns/sort/filter[<column>] queries, see tables.py.
+TABLE_SECTIONS = {
+    section: builder.sheet_name for section, builder in API_SECTIONS.items() if hasattr(builder, "sheet_name")
+}
 
-        if "Valor cancelado" in dataframe.columns:
-            dataframe["Valor cancelado"] = dataframe["Valor cancelado"].apply(converter_valor)
-    except Exception as error:
-        print(f"An error occurred while processing the Inventario Cancelado data: {error}")
 
-    return dataframe
+def _bloqueado_dates(version, dataframe):
+    # The sheet only names day and month; years are counted back from when
+    # the workbook was last saved.
+    saved = datetime.date.fromtimestamp(version.identity.mtime_ns / 1e9)
+    return day_month_dates(dataframe[_find_column(dataframe, "dia")], dataframe[_find_column(dataframe, "mes")], saved)
+
+
+def _corte_dates(version, dataframe):
+    return label_dates(dataframe[_find_column(dataframe, "rotulos")])
+
+
+# Dated sections served by /api/rollup/<section>: their sheet, how to date its
+# rows and the measures aggregated per day, week and month.
+ROLLUP_SECTIONS = {
+    "bloqueado": (
+        DATA_SHEET,
+        _bloqueado_dates,
+        (
+            Measure("estoque", "R$ Bloq. no ESTOQUE", "last"),
+            Measure("estoque_medio", "R$ Bloq. no ESTOQUE", "mean"),
+            Measure("acumulativo", "Acumulativo", "sum"),
+            Measure("percentual_medio", "%", "mean"),
+        ),
+    ),
+    "corte": (
+        DATA_SHEET_CORTE,
+        _corte_dates,
+        (
+            Measure("valor_total", "Soma de Valor Total", "sum"),
+            Measure("faturamento", "FATURAMENTO", "sum"),
+            Measure("percentual_medio", "%", "mean"),
+        ),
+    ),
+}
 
+UNAVAILABLE_PAYLOAD = {"error": "Dados indisponiveis"}
+UNAVAILABLE_RESPONSE = encode_json(app, UNAVAILABLE_PAYLOAD, 500)
 
-def load_inventario_motivo_cancelado_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_INVENTARIO_MOTIVO_CANCELADO)
-    if dataframe is None:
-        return None
-    dataframe = dataframe.copy()
 
-    try:
-        if "Motivos" in dataframe.columns:
-            dataframe["Motivos"] = dataframe["Motivos"].astype(str)
+def _current_version():
+    # Includes the whole load when the workbook has not been parsed yet.
+    with timed("workbook"):
+        return WORKBOOK.get()
 
-        if "Observação" in dataframe.columns:
-            dataframe["Observação"] = dataframe["Observação"].astype(str)
-    except Exception as error:
-        print(f"An error occurred while processing the Inventario Motivo Cancelado data: {error}")
 
-    return dataframe
+def _requested_layout():
+    if request.args.get("format") == COLUMNAR:
+        return COLUMNAR
+    if request.accept_mimetypes.best == COLUMNAR_MEDIA_TYPE:
+        return COLUMNAR
+    return ROWS
 
 
-def load_avaria_setores_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_AVARIA_SETORES)
-    if dataframe is None:
-        return None
-    dataframe = dataframe.copy()
+def _section_versions(version):
+    return version.memo("section_versions", lambda: SECTION_CHANGES.section_versions(version.sheet_digests))
+
 
+def _requested_points():
+    raw = request.args.get("points")
+    if not raw:
+        return None
     try:
-        if "Setores" in dataframe.columns:
-            dataframe["Setores"] = dataframe["Setores"].astype(str)
+        points = int(raw)
+    except ValueError:
+        points = 0
+    for resolution in DOWNSAMPLE_RESOLUTIONS:
+        if 0 < points <= resolution:
+            return resolution
+    raise ValueError("Parametro invalido: points")
 
-        if "Valor Avariado" in dataframe.columns:
-            dataframe["Valor Avariado"] = dataframe["Valor Avariado"].apply(converter_valor)
 
-        if "Quantidade" in dataframe.columns:
-            dataframe["Quantidade"] = dataframe["Quantidade"].apply(convert_integer)
+def _effective_points(version, sections, points):
+    """``points``, or None when it would not shorten any of ``sections``' series.
 
-    except Exception as error:
-        print(f"An error occurred while processing the Avaria Setores data: {error}")
+    Requests whose resolution covers every day then share the full payload's
+    cache entries instead of adding their own.
+    """
+    if points is None:
+        return None
+    for section in sections:
+        if section not in DOWNSAMPLED_SECTIONS:
+            continue
+        _, length = DOWNSAMPLED_SECTIONS[section]
+        try:
+            if points < length(version):
+                return points
+        except Exception:
+            # The section reports itself as unavailable when it is built.
+            continue
+    return None
 
-    return dataframe
 
+def _section_payload(version, section: str, layout: str = ROWS, points=None):
+    points = _effective_points(version, (section,), points)
+    downsampled = points is not None
 
-def load_avaria_itens_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_AVARIA_ITENS)
-    if dataframe is None:
-        return None
-    dataframe = dataframe.copy()
+    def build():
+        with timed("build", PAYLOAD_BUILD_SECONDS, section=section, layout=layout):
+            if downsampled:
+                builder, _ = DOWNSAMPLED_SECTIONS[section]
+                return builder(version, points)
+            return API_SECTIONS[section](version, layout)
 
-    try:
-        if "ITEM" in dataframe.columns:
-            dataframe["ITEM"] = dataframe["ITEM"].astype(str)
+    key = ("section", section, layout, points) if downsampled else ("section", section, layout)
+    return version.memo(key, build)
 
-        if "DESCRIÇÃO DO ITEM" in dataframe.columns:
-            dataframe["DESCRIÇÃO DO ITEM"] = dataframe["DESCRIÇÃO DO ITEM"].astype(str)
 
-        if "Valor" in dataframe.columns:
-            dataframe["Valor"] = dataframe["Valor"].apply(converter_valor)
+def _encoded_section(version, section: str, layout: str, points=None):
+    points = _effective_points(version, (section,), points)
 
-        if "Quantidade" in dataframe.columns:
-            dataframe["Quantidade"] = dataframe["Quantidade"].apply(convert_integer)
-    except Exception as error:
-        print(f"An error occurred while processing the Avaria Itens data: {error}")
+    def encode():
+        payload = _section_payload(version, section, layout, points)
+        if payload is None:
+            return UNAVAILABLE_RESPONSE
+        with timed("encode", PAYLOAD_ENCODE_SECONDS, payload=section):
+            return encode_json(app, payload)
 
-    return dataframe
+    return version.memo(("response", section, layout, points), encode)
 
 
-def load_avaria_motivos_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_AVARIA_MOTIVOS)
+def _indexed_table(version, sheet_name):
+    dataframe = _available_sheet(version, sheet_name)
+    if dataframe is None:
+        return None
+    return version.memo(("table", sheet_name), lambda: IndexedTable(dataframe))
+
+
+def _queried_table(version, section: str, layout: str):
+    # Pages depend on arbitrary query strings, so they are not memoized; the
+    # indexes they are cut from are.
+    table = _indexed_table(version, TABLE_SECTIONS[section])
+    if table is None:
+        return UNAVAILABLE_RESPONSE
+    query = parse_table_query(request.args, table.columns)
+    with timed("build"):
+        payload = table.query(query, layout)
+    with timed("encode"):
+        return encode_json(app, payload)
+
+
+def _section_response(section: str):
+    version = _current_version()
+    if version is None:
+        encoded = UNAVAILABLE_RESPONSE
+    elif section in TABLE_SECTIONS and is_table_query(request.args):
+        try:
+            encoded = _queried_table(version, section, _requested_layout())
+        except QueryError as error:
+            return jsonify({"error": str(error)}), 400
+    else:
+        points = None
+        if section in DOWNSAMPLED_SECTIONS:
+            try:
+                points = _requested_points()
+            except ValueError as error:
+                return jsonify({"error": str(error)}), 400
+        encoded = _encoded_section(version, section, _requested_layout(), points)
+    response = send_encoded(encoded, request)
+    response.vary.add("Accept")
+    if version is not None:
+        response.headers["X-Data-Version"] = version.version
+        response.headers["X-Section-Version"] = _section_versions(version)[section]
+    return response
+
+
+def _rollup_index(version, section: str):
+    sheet_name, dates, measures = ROLLUP_SECTIONS[section]
+    dataframe = _available_sheet(version, sheet_name)
     if dataframe is None:
         return None
-    dataframe = dataframe.copy()
 
-    try:
-        if "Motivos" in dataframe.columns:
-            dataframe["Motivos"] = dataframe["Motivos"].astype(str)
+    def build():
+        with timed("rollup"):
+            return RollupIndex(dates(version, dataframe), dataframe, measures)
 
-        if "Valor Avariado" in dataframe.columns:
-            dataframe["Valor Avariado"] = dataframe["Valor Avariado"].apply(converter_valor)
+    return version.memo(("rollup", section), build)
 
-        if "Contagem de UNID." in dataframe.columns:
-            dataframe["Contagem de UNID."] = dataframe["Contagem de UNID."].apply(convert_integer)
-    except Exception as error:
-        print(f"An error occurred while processing the Avaria Motivos data: {error}")
 
-    return dataframe
+def _encoded_rollup(version, section: str, bucket: str, layout: str):
+    def encode():
+        index = _rollup_index(version, section)
+        if index is None:
+            return UNAVAILABLE_RESPONSE
+        with timed("encode", PAYLOAD_ENCODE_SECONDS, payload="rollup"):
+            return encode_json(app, index.payload(bucket, layout))
 
+    return version.memo(("rollup response", section, bucket, layout), encode)
 
-def load_avaria_direcionados_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_AVARIA_DIRECIONADOS)
-    if dataframe is None:
-        return None
-    dataframe = dataframe.copy()
 
-    try:
-        if "Direcionados" in dataframe.columns:
-            dataframe["Direcionados"] = dataframe["Direcionados"].astype(str)
+def _requested_sections():
+    requested = request.args.get("sections")
+    if not requested:
+        return tuple(API_SECTIONS), []
+    sections = tuple(dict.fromkeys(name.strip() for name in requested.split(",") if name.strip()))
+    unknown = [name for name in sections if name not in API_SECTIONS]
+    return sections, unknown
 
-        if "Avariado" in dataframe.columns:
-            dataframe["Avariado"] = dataframe["Avariado"].apply(converter_valor)
 
-        if "Recuperado" in dataframe.columns:
-            dataframe["Recuperado"] = dataframe["Recuperado"].apply(converter_valor)
-    except Exception as error:
-        print(f"An error occurred while processing the Avaria Direcionados data: {error}")
-
-    return dataframe
+# The sections Components/app.js requests in its /api/dashboard call.
+FRONTEND_DASHBOARD_SECTIONS = tuple(sorted(section for section in API_SECTIONS if not section.startswith("senha_")))
+# ...and the points parameter it passes along (BLOQUEADO_CHART_POINTS there).
+FRONTEND_CHART_POINTS = 240
+# The only section lists whose bundles are memoized. Other lists are chosen
+# by the client, so their bundles are encoded per request from the memoized
+# section payloads instead of growing the version's cache.
+MEMOIZED_BUNDLES = frozenset({FRONTEND_DASHBOARD_SECTIONS, tuple(sorted(API_SECTIONS))})
 
 
-def load_avaria_turnos_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_AVARIA_TURNOS)
-    if dataframe is None:
-        return None
-    dataframe = dataframe.copy()
-
+def _bundled_section(version, section: str, layout: str, points=None):
+    """A section's slot in a bundle; a section that fails is unavailable without failing the bundle."""
     try:
-        if "Setores" in dataframe.columns:
-            dataframe["Setores"] = dataframe["Setores"].astype(str)
+        payload = _section_payload(version, section, layout, points)
+    except Exception as e:
+        print(f"An error occurred while building the {section} section: {e}")
+        return UNAVAILABLE_PAYLOAD
+    return payload or UNAVAILABLE_PAYLOAD
+
+
+def _encoded_dashboard(version, sections, layout: str, points=None):
+    points = _effective_points(version, sections, points)
+
+    def encode():
+        section_versions = _section_versions(version)
+        payload = {
+            "version": version.version,
+            "section_versions": {section: section_versions[section] for section in sections},
+            "sections": {
+                section: _bundled_section(version, section, layout, points)
+                for section in sections
+            },
+        }
+        with timed("encode", PAYLOAD_ENCODE_SECONDS, payload="dashboard"):
+            return encode_json(app, payload)
 
-        if "Valor Avariado" in dataframe.columns:
-            dataframe["Valor Avariado"] = dataframe["Valor Avariado"].apply(converter_valor)
+    if sections not in MEMOIZED_BUNDLES:
+        return encode()
+    return version.memo(("dashboard", sections, layout, points), encode)
 
-        if "Quantidade" in dataframe.columns:
-            dataframe["Quantidade"] = dataframe["Quantidade"].apply(convert_integer)
-    except Exception as error:
-        print(f"An error occurred while processing the Avaria Turnos data: {error}")
 
-    return dataframe
+@app.route("/api/dashboard", methods=["GET"])
+def get_dashboard():
+    sections, unknown = _requested_sections()
+    if unknown:
+        return jsonify({"error": f"Secoes desconhecidas: {', '.join(unknown)}"}), 400
+    try:
+        points = _requested_points()
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    version = _current_version()
+    if version is None:
+        encoded = UNAVAILABLE_RESPONSE
+    else:
+        encoded = _encoded_dashboard(version, tuple(sorted(sections)), _requested_layout(), points)
+    response = send_encoded(encoded, request)
+    response.vary.add("Accept")
+    return response
+
+
+def _encoded_changes(version, since, changed, sections, layout: str, points=None):
+    points = _effective_points(version, sections, points)
+
+    def encode():
+        section_versions = _section_versions(version)
+        included = sections if changed is None else [section for section in sections if section in changed]
+        payload = {
+            "version": version.version,
+            "since": since,
+            "full": changed is None,
+            "section_versions": {section: section_versions[section] for section in sections},
+            "sections": {
+                section: _bundled_section(version, section, layout, points)
+                for section in included
+            },
+        }
+        with timed("encode", PAYLOAD_ENCODE_SECONDS, payload="changes"):
+            return encode_json(app, payload)
 
+    if sections not in MEMOIZED_BUNDLES:
+        return encode()
+    return version.memo(("changes", since, sections, layout, points), encode)
 
-@app.route("/api/avaria/setores", methods=["GET"])
-def get_avaria_setores():
-    dataframe = load_avaria_setores_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
 
-    payload = _serialize_dataframe(dataframe)
-    return jsonify(payload)
+@app.route("/api/changes", methods=["GET"])
+def get_changes():
+    """Sections whose sheets changed since the workbook version in ``since``.
 
+    Versions too old to be remembered (or no ``since`` at all) get every
+    requested section, flagged with ``"full": true``.
+    """
+    sections, unknown = _requested_sections()
+    if unknown:
+        return jsonify({"error": f"Secoes desconhecidas: {', '.join(unknown)}"}), 400
+    try:
+        points = _requested_points()
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    version = _current_version()
+    if version is None:
+        encoded = UNAVAILABLE_RESPONSE
+    else:
+        since = request.args.get("since") or None
+        changed = SECTION_CHANGES.changes_since(since, version)
+        if changed is None:
+            # Unknown versions all share one cached full response.
+            since = None
+        encoded = _encoded_changes(version, since, changed, tuple(sorted(sections)), _requested_layout(), points)
+    response = send_encoded(encoded, request)
+    response.vary.add("Accept")
+    return response
+
+
+def _warm_up_steps(version):
+    steps = [
+        (f"section {section}", lambda section=section: _encoded_section(version, section, ROWS).precompress())
+        for section in API_SECTIONS
+    ]
+    steps.append(
+        (
+            "dashboard",
+            lambda: _encoded_dashboard(
+                version, FRONTEND_DASHBOARD_SECTIONS, ROWS, FRONTEND_CHART_POINTS
+            ).precompress(),
+        )
+    )
+    for sheet_name in sorted(set(TABLE_SECTIONS.values())):
+        steps.append((f"table {sheet_name}", lambda sheet_name=sheet_name: _prepare_table(version, sheet_name)))
+    for section in ROLLUP_SECTIONS:
+        steps.append((f"rollup {section}", lambda section=section: _rollup_index(version, section)))
+    return steps
+
+
+def _prepare_table(version, sheet_name):
+    table = _indexed_table(version, sheet_name)
+    if table is not None:
+        table.prepare()
+
+
+WARM_UP = WarmUp(
+    WORKBOOK,
+    _warm_up_steps,
+    startup_steps=[("static assets", STATIC_ASSETS.build)],
+    retry_interval=float(os.environ.get("PAINEL_RELOAD_INTERVAL", "2")),
+)
+
+
+# WARM_UP warms each revision before the cache publishes it, and these
+# listeners run after publication, so clients are told about a new version
+# only once it is being served with its payloads ready.
+# Each stream pins a server worker, so the cap follows the server's pool size;
+# entry points apply their command line with configure_events before serving.
+EVENTS = EventBroker(max_clients=stream_capacity(default_server_options()))
+
+
+def configure_events(options):
+    """Cap EVENTS at what the server selected by ``options`` can hold open."""
+    EVENTS.max_clients = stream_capacity(options)
+    if EVENTS.max_clients == 0 and options.event_streams > 0:
+        print(
+            f"Warning: {options.threads} threads leave no worker for /api/events; "
+            "displays will not receive push updates"
+        )
 
-@app.route("/api/avaria/top10", methods=["GET"])
-def get_avaria_top10():
-    dataframe = load_avaria_itens_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
 
-    payload = _serialize_dataframe(dataframe)
-    return jsonify(payload)
+def _publish_workbook_change(version):
+    change = SECTION_CHANGES.record(version)
+    if change["previous"] is not None and not change["sections"]:
+        return
+    EVENTS.publish("workbook", change)
 
 
-@app.route("/api/avaria/motivos", methods=["GET"])
-def get_avaria_motivos():
-    dataframe = load_avaria_motivos_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
+WORKBOOK.subscribe(_publish_workbook_change)
 
-    payload = _serialize_dataframe(dataframe)
-    return jsonify(payload)
 
+def _workbook_info():
+    version = WORKBOOK.peek()
+    if version is None:
+        return {}
+    return {(version.version, version.source): 1}
 
-@app.route("/api/avaria/direcionados", methods=["GET"])
-def get_avaria_direcionados():
-    dataframe = load_avaria_direcionados_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
-
-    payload = _serialize_dataframe(dataframe)
-    return jsonify(payload)
 
+Gauge("painel_ready", "1 once the warm-up has finished, 0 before.", lambda: int(WARM_UP.ready))
+Gauge("painel_workbook_info", "The published workbook revision.", _workbook_info, ("version", "source"))
+Gauge(
+    "painel_workbook_memoized_entries",
+    "Payloads and encoded responses cached for the published workbook revision.",
+    lambda: WORKBOOK.peek().memo_size() if WORKBOOK.peek() is not None else None,
+)
+Gauge("painel_event_streams", "Open /api/events streams.", lambda: EVENTS.client_count)
 
-@app.route("/api/avaria/turnos", methods=["GET"])
-def get_avaria_turnos():
-    dataframe = load_avaria_turnos_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
 
-    payload = _serialize_dataframe(dataframe)
-    return jsonify(payload)
+@app.route("/api/rollup/<section>", methods=["GET"])
+def get_rollup(section):
+    """Per day, week or month (``bucket``) aggregates of a dated section.
 
+    Answered from the section's rollup index, built once per workbook version.
+    """
+    if section not in ROLLUP_SECTIONS:
+        return jsonify({"error": f"Secao sem historico: {section}"}), 404
+    bucket = request.args.get("bucket") or BUCKETS[0]
+    if bucket not in BUCKETS:
+        return jsonify({"error": "Parametro invalido: bucket"}), 400
 
-def load_funnel_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_FUNNEL)
-    if dataframe is None:
-        return None
-    dataframe = dataframe.copy()
+    version = _current_version()
+    if version is None:
+        encoded = UNAVAILABLE_RESPONSE
+    else:
+        encoded = _encoded_rollup(version, section, bucket, _requested_layout())
+    response = send_encoded(encoded, request)
+    response.vary.add("Accept")
+    if version is not None:
+        response.headers["X-Data-Version"] = version.version
+        response.headers["X-Section-Version"] = _section_versions(version)[section]
+    return response
 
-    try:
-        if "Motivos Bloqueio" in dataframe.columns:
-            dataframe["Motivos Bloqueio"] = dataframe["Motivos Bloqueio"].astype(str)
 
-        if "Soma de Valor (BRL)" in dataframe.columns:
-            dataframe["Soma de Valor (BRL)"] = dataframe["Soma de Valor (BRL)"].apply(converter_valor)
-    except Exception as error:
-        print(f"An error occurred while processing the Funnel data: {error}")
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    response = Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+    response.cache_control.no_store = True
+    return response
 
-    return dataframe
 
+@app.route("/api/events", methods=["GET"])
+def get_events():
+    version = _current_version()
+    initial = [("version", {"version": version.version if version is not None else None})]
+    stream = EVENTS.open_stream(initial)
+    if stream is None:
+        response = jsonify({"error": "Limite de conexoes de eventos atingido"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "60"
+        return response
 
-def load_senha_167_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_SENHA_167)
-    if dataframe is None:
-        return None
-    return dataframe.copy()
+    response = Response(stream, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
 
-def load_senha_171_dataframe():
-    dataframe = _load_sheet(DATA_SHEET_SENHA_171)
-    if dataframe is None:
-        return None
-    return dataframe.copy()
+@app.route("/healthz", methods=["GET"])
+def get_health():
+    response = jsonify({"status": "ok"})
+    response.cache_control.no_store = True
+    return response
 
 
-def _coerce_value(value: Any):
-    if isinstance(value, pd.Timestamp):
-        return value.isoformat()
-    if pd.isna(value):
-        return None
-    if isinstance(value, (float, int, str, bool)):
-        return value
-    return str(value)
+@app.route("/readyz", methods=["GET"])
+def get_readiness():
+    status = WARM_UP.status()
+    response = jsonify(status)
+    response.status_code = 200 if status["ready"] else 503
+    response.cache_control.no_store = True
+    return response
 
 
-def _serialize_dataframe(dataframe: pd.DataFrame):
-    return {
-        "columns": list(dataframe.columns),
-        "rows": [
-            {column: _coerce_value(row[column]) for column in dataframe.columns}
-            for _, row in dataframe.iterrows()
-        ],
-    }
+@app.route("/api/avaria/setores", methods=["GET"])
+def get_avaria_setores():
+    return _section_response("avaria_setores")
 
 
-@app.route("/api/bloqueado", methods=["GET"])
-def get_bloqueado_mensal():
-    dataframe = load_processed_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
+@app.route("/api/avaria/top10", methods=["GET"])
+def get_avaria_top10():
+    return _section_response("avaria_top10")
 
-    mes_column = _find_column(dataframe, "mes")
-    dia_column = _find_column(dataframe, "dia")
 
-    labels = [f"{dia} {mes}" for dia, mes in zip(dataframe[dia_column], dataframe[mes_column])]
-    valores = [float(valor) for valor in dataframe["R$ Bloq. no ESTOQUE"].fillna(0)]
-    percentuais = [float(valor) * 100 for valor in dataframe["%"].fillna(0)]
-    acumulativos = [float(valor) for valor in dataframe["Acumulativo"].fillna(0)]
+@app.route("/api/avaria/motivos", methods=["GET"])
+def get_avaria_motivos():
+    return _section_response("avaria_motivos")
 
-    largest_positive_index = max(range(len(percentuais)), key=lambda i: percentuais[i], default=None)
-    largest_negative_index = min(range(len(percentuais)), key=lambda i: percentuais[i], default=None)
 
-    largest_positive = None
-    if largest_positive_index is not None and percentuais[largest_positive_index] > 0:
-        largest_positive = {
-            "label": labels[largest_positive_index],
-            "percent": percentuais[largest_positive_index],
-        }
+@app.route("/api/avaria/direcionados", methods=["GET"])
+def get_avaria_direcionados():
+    return _section_response("avaria_direcionados")
 
-    largest_negative = None
-    if largest_negative_index is not None and percentuais[largest_negative_index] < 0:
-        largest_negative = {
-            "label": labels[largest_negative_index],
-            "percent": percentuais[largest_negative_index],
-        }
 
-    tendencia = {
-        "direction": "Estável",
-        "delta": 0.0,
-        "status": "neutral",
-        "start_label": labels[0] if labels else "",
-        "end_label": labels[-1] if labels else "",
-    }
+@app.route("/api/avaria/turnos", methods=["GET"])
+def get_avaria_turnos():
+    return _section_response("avaria_turnos")
 
-    if len(valores) >= 2:
-        delta = float(valores[-1] - valores[0])
-        referencia = abs(valores[0]) if valores[0] != 0 else abs(valores[-1])
-        tolerancia = max(referencia * 0.005, 1.0)
-
-        if delta > tolerancia:
-            tendencia.update({"direction": "Alta", "status": "bad"})
-        elif delta < -tolerancia:
-            tendencia.update({"direction": "Queda", "status": "good"})
-
-        tendencia["delta"] = delta
-
-    acumulativo_total = float(sum(acumulativos))
-
-    payload = {
-        "labels": labels,
-        "bars": valores,
-        "line": percentuais,
-        "acumulativos": acumulativos,
-        "metrics": {
-            "largest_positive": largest_positive,
-            "largest_negative": largest_negative,
-            "trend": tendencia,
-            "acumulativo_sum": acumulativo_total,
-        },
-    }
 
-    return jsonify(payload)
+@app.route("/api/bloqueado", methods=["GET"])
+def get_bloqueado_mensal():
+    return _section_response("bloqueado")
 
 
 @app.route("/api/corte", methods=["GET"])
 def get_corte():
-    dataframe = load_corte_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
-
-    payload = _serialize_dataframe(dataframe)
-    return jsonify(payload)
+    return _section_response("corte")
 
 
 @app.route("/api/corte/setores", methods=["GET"])
 def get_corte_setores():
-    dataframe = load_corte_setores_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
-
-    payload = _serialize_dataframe(dataframe)
-    return jsonify(payload)
+    return _section_response("corte_setores")
 
 
 @app.route("/api/corte/top10", methods=["GET"])
 def get_corte_top10():
-    dataframe = load_corte_top10_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
-
-    payload = _serialize_dataframe(dataframe)
-    return jsonify(payload)
+    return _section_response("corte_top10")
 
 
 @app.route("/api/bloqueado/top10", methods=["GET"])
 def get_bloqueado_top10():
-    dataframe = load_bloqueado_top10_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
-
-    payload = _serialize_dataframe(dataframe)
-    return jsonify(payload)
+    return _section_response("bloqueado_top10")
 
 
 @app.route("/api/corte/motivos", methods=["GET"])
 def get_corte_motivos():
-    dataframe = load_corte_motivos_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
-
-    payload = _serialize_dataframe(dataframe)
-    return jsonify(payload)
+    return _section_response("corte_motivos")
 
 
 @app.route("/api/inventario", methods=["GET"])
 def get_inventario():
-    dataframe = load_inventario_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
-
-    payload = _serialize_dataframe(dataframe)
-    valores_dataframe = load_inventario_valores_dataframe()
-    if valores_dataframe is not None and not valores_dataframe.empty:
-        payload["valores"] = _serialize_dataframe(valores_dataframe)
-    cancelado_dataframe = load_inventario_cancelado_dataframe()
-    if cancelado_dataframe is not None and not cancelado_dataframe.empty:
-        payload["cancelados"] = _serialize_dataframe(cancelado_dataframe)
-    motivo_cancelado_dataframe = load_inventario_motivo_cancelado_dataframe()
-    if motivo_cancelado_dataframe is not None and not motivo_cancelado_dataframe.empty:
-        payload["cancelados_motivos"] = _serialize_dataframe(motivo_cancelado_dataframe)
-    return jsonify(payload)
+    return _section_response("inventario")
 
 
 @app.route("/api/funnel", methods=["GET"])
 def get_funnel():
-    dataframe = load_funnel_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
-
-    motivo_column = _find_column(dataframe, "motivos bloqueio")
-    valor_column = _find_column(dataframe, "soma de valor")
-    try:
-        observacao_column = _find_column(dataframe, "observacao")
-    except KeyError:
-        observacao_column = None
-
-    safe_values = dataframe[valor_column].fillna(0).astype(float)
-    total = float(safe_values.sum())
-
-    grouped = (
-        dataframe[[motivo_column, valor_column]]
-        .groupby(motivo_column, dropna=False, as_index=False)
-        .sum(numeric_only=True)
-    )
-
-    grouped[valor_column] = grouped[valor_column].fillna(0).astype(float)
-    grouped.sort_values(by=valor_column, ascending=False, inplace=True)
-
-    observation_lookup = {}
-    if observacao_column:
-        for _, row in dataframe[[motivo_column, observacao_column]].iterrows():
-            motive_value = row[motivo_column]
-            observation_value = row[observacao_column]
-            motive_key = None if pd.isna(motive_value) else motive_value
-
-            if motive_key in observation_lookup:
-                continue
-
-            if pd.isna(observation_value):
-                continue
-
-            text = str(observation_value).strip()
-            if not text:
-                continue
-
-            observation_lookup[motive_key] = text
-
-    entries = []
-    for _, row in grouped.iterrows():
-        motivo = row[motivo_column]
-        valor = float(row[valor_column])
-        percentage = (valor / total) if total else 0.0
-        motive_key = None if pd.isna(motivo) else motivo
-        label = "Sem motivo"
-        if motivo is not None and not pd.isna(motivo):
-            label = str(motivo)
-        entries.append(
-            {
-                "label": label,
-                "value": valor,
-                "share": percentage,
-                "observation": observation_lookup.get(motive_key),
-            }
-        )
-
-    payload = {
-        "total": total,
-        "entries": entries,
-    }
-
-    return jsonify(payload)
+    return _section_response("funnel")
 
 
 @app.route("/api/senha/167", methods=["GET"])
 def get_senha_167():
-    dataframe = load_senha_167_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
-
-    payload = _serialize_dataframe(dataframe)
-    return jsonify(payload)
+    return _section_response("senha_167")
 
 
 @app.route("/api/senha/171", methods=["GET"])
 def get_senha_171():
-    dataframe = load_senha_171_dataframe()
-    if dataframe is None or dataframe.empty:
-        return jsonify({"error": "Dados indisponiveis"}), 500
-
-    payload = _serialize_dataframe(dataframe)
-    return jsonify(payload)
+    return _section_response("senha_171")
 
 
 @app.route("/media/senha/<string:kind>", methods=["GET"])
@@ -847,6 +1103,17 @@ def render_senha_placeholder(kind: str):
     )
 
 
+@app.after_request
+def compress_static_assets(response):
+    if request.endpoint == "static":
+        filename = (request.view_args or {}).get("filename", "")
+    elif request.endpoint == "serve_root":
+        filename = "index.html"
+    else:
+        return response
+    return STATIC_ASSETS.compress_response(response, request, filename)
+
+
 @app.route("/")
 def serve_root():
     return app.send_static_file("index.html")
@@ -890,4 +1157,11 @@ def serve_senha_image(filename: str):
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    options = add_server_arguments(argparse.ArgumentParser(description="Painel de apresentação")).parse_args()
+    debug = options.mode == DEVELOPMENT
+    configure_events(options)
+    # With debug=True the code runs twice: in the reloader's watcher process and
+    # in the child that actually serves; only the latter needs warm caches.
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        WARM_UP.start()
+    serve(app, options, debug=debug)
\ No newline at end of file
@@ -0,0 +1,261 @@
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import psutil
+except ImportError:  # optional: only used for process memory on platforms without /proc
+    psutil = None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Sheet parses and whole-workbook loads run from milliseconds to about a minute.
+LOAD_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    """Metrics rendered together in the Prometheus text exposition format."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: List["_Metric"] = []
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines: List[str] = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as error:
+                print(f"An error occurred while collecting the {metric.name} metric: {error}")
+                continue
+            documentation = metric.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+            lines.append(f"# HELP {metric.name} {documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, label_names, label_values, value in samples:
+                lines.append(f"{name}{_format_labels(label_names, label_values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, Sequence[str], LabelValues, float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield self.name, self.labelnames, key, value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum.
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = len(self._buckets)
+        for position, bound in enumerate(self._buckets):
+            if value <= bound:
+                index = position
+                break
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self._buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        bucket_labels = self.labelnames + ("le",)
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self._buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", bucket_labels, key + (_format_value(bound),), cumulative
+            yield f"{self.name}_sum", self.labelnames, key, total
+            yield f"{self.name}_count", self.labelnames, key, cumulative
+
+
+class Gauge(_Metric):
+    """A value read when the metrics are rendered.
+
+    ``function`` returns a number, or with ``labelnames`` a mapping of label
+    value tuples to numbers; None omits the sample.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], object], *args, **kwargs) -> None:
+        super().__init__(name, documentation, *args, **kwargs)
+        self._function = function
+
+    def samples(self):
+        value = self._function()
+        if value is None:
+            return
+        if not self.labelnames:
+            yield self.name, (), (), float(value)
+            return
+        for key, sample in sorted(value.items()):
+            if sample is not None:
+                yield self.name, self.labelnames, tuple(str(part) for part in key), float(sample)
+
+
+class CounterGauge(Gauge):
+    """A monotonically increasing value owned elsewhere and read at render time."""
+
+    kind = "counter"
+
+
+def _resident_memory_bytes() -> Optional[int]:
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS; reported in KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+_STARTED_AT = time.time()
+
+Gauge("process_resident_memory_bytes", "Resident memory size in bytes.", _resident_memory_bytes)
+CounterGauge("process_cpu_seconds_total", "Total user and system CPU time in seconds.", time.process_time)
+Gauge("process_start_time_seconds", "Start time of the process since the epoch in seconds.", lambda: _STARTED_AT)
+Gauge("process_threads", "Number of live Python threads.", threading.active_count)
+
+# Shared by every cache in the application, told apart by the ``cache`` label.
+CACHE_REQUESTS = Counter(
+    "painel_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result"),
+)
+CACHE_EVICTIONS = Counter(
+    "painel_cache_evictions_total",
+    "Entries dropped from a cache, including those replaced by a newer workbook revision.",
+    ("cache",),
+)
+
+REQUESTS = Counter(
+    "painel_http_requests_total",
+    "HTTP requests by route, method and status code.",
+    ("route", "method", "status"),
+)
+REQUEST_SECONDS = Histogram(
+    "painel_http_request_duration_seconds",
+    "Time spent producing the response of each route, excluding streamed bodies.",
+    ("route", "method"),
+)
+
+
+def instrument_app(app) -> None:
+    """Count every request of ``app`` and time it per URL rule.
+
+    Routes are labelled by their rule (``/visual/senha/<tipo>``) rather than
+    the path, so the number of series stays bounded.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("metrics_started", None)
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        REQUESTS.inc(route=route, method=request.method, status=str(response.status_code))
+        if started is not None:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=request.method)
+        return response
@@ -0,0 +1,151 @@
+import io
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Sequence
+
+import pandas as pd
+
+from converters import apply_conversion_plan
+
+
+def LoadWorkbook(source, sheet_names, timings=None):
+    """Open the workbook once and parse every requested sheet from that handle.
+
+    ``source`` is a path or a binary file object. Sheets missing from the
+    workbook map to ``None`` so one absent tab does not prevent the others from
+    loading. When ``timings`` is given, each sheet's parse time is recorded in it.
+    """
+    try:
+        with pd.ExcelFile(source) as workbook:
+            available = set(workbook.sheet_names)
+            sheets = {}
+            for sheet_name in sheet_names:
+                if sheet_name not in available:
+                    print(f"Sheet '{sheet_name}' not found in the workbook")
+                    sheets[sheet_name] = None
+                    continue
+                started = time.perf_counter()
+                sheets[sheet_name] = workbook.parse(sheet_name)
+                if timings is not None:
+                    timings[sheet_name] = time.perf_counter() - started
+            return sheets
+    except Exception as e:
+        print(f"An error occurred while loading the workbook: {e}")
+        return None
+
+
+def convert_sheet(sheet_name, dataframe, plan, strict=False):
+    try:
+        apply_conversion_plan(dataframe, plan, strict=strict)
+    except Exception as error:
+        print(f"An error occurred while processing the {sheet_name} data: {error}")
+        if strict:
+            return None
+    return dataframe
+
+
+def load_sheets(source, sheet_names, plans, strict_sheets=frozenset(), timings=None, conversion_timings=None):
+    """Parse ``sheet_names`` from ``source`` and run each one's conversion plan.
+
+    ``timings`` receives each sheet's parse plus conversion time and
+    ``conversion_timings`` the conversion part alone.
+    """
+    if timings is None:
+        timings = {}
+    sheets = LoadWorkbook(source, sheet_names, timings)
+    if sheets is None:
+        return None
+    converted = {}
+    for sheet_name, dataframe in sheets.items():
+        if dataframe is None:
+            converted[sheet_name] = None
+            continue
+        started = time.perf_counter()
+        converted[sheet_name] = convert_sheet(sheet_name, dataframe, plans[sheet_name], sheet_name in strict_sheets)
+        elapsed = time.perf_counter() - started
+        timings[sheet_name] = timings.get(sheet_name, 0.0) + elapsed
+        if conversion_timings is not None:
+            conversion_timings[sheet_name] = elapsed
+    return converted
+
+
+def _load_group(content: bytes, sheet_names, plans, strict_sheets):
+    timings: Dict[str, float] = {}
+    conversion_timings: Dict[str, float] = {}
+    sheets = load_sheets(io.BytesIO(content), sheet_names, plans, strict_sheets, timings, conversion_timings)
+    return sheets, timings, conversion_timings
+
+
+class SheetPool:
+    """Parses groups of sheets in parallel worker processes.
+
+    openpyxl parsing is CPU-bound and holds the GIL, so threads do not help;
+    each worker process opens its own copy of the workbook bytes and parses and
+    converts only its group of sheets. The converted frames are pickled back to
+    the parent, which costs a fraction of parsing them. Workers are spawned on
+    first use and kept for later reloads.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        groups: Sequence[Sequence[str]],
+        plans,
+        strict_sheets: Iterable[str] = (),
+    ) -> None:
+        self._workers = workers
+        self._groups = [tuple(group) for group in groups if group]
+        self._plans = plans
+        self._strict_sheets = frozenset(strict_sheets)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn rather than fork: the server forks from a multi-threaded
+            # process, and it is what Windows (the frozen executable) uses anyway.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def load(self, content: bytes, timings=None, conversion_timings=None):
+        """Return the converted sheets of every group, or None if the pool failed."""
+        executor = self._get_executor()
+        try:
+            futures = [
+                executor.submit(
+                    _load_group,
+                    content,
+                    group,
+                    {sheet_name: self._plans[sheet_name] for sheet_name in group},
+                    self._strict_sheets & set(group),
+                )
+                for group in self._groups
+            ]
+            results = [future.result() for future in futures]
+        except Exception as error:
+            print(f"An error occurred while parsing sheets in parallel: {error}")
+            self.shutdown()
+            return None
+
+        sheets = {}
+        for group_sheets, group_timings, group_conversion_timings in results:
+            if group_sheets is None:
+                return None
+            sheets.update(group_sheets)
+            if timings is not None:
+                timings.update(group_timings)
+            if conversion_timings is not None:
+                conversion_timings.update(group_conversion_timings)
+        return sheets
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,150 @@
+import cProfile
+import io
+import pstats
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from flask import Response, g, has_request_context, request
+
+# Report lines kept in ?profile=text responses.
+PROFILE_REPORT_LINES = 40
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add ``seconds`` to the ``name`` phase of the current request, if any.
+
+    Work done outside a request (warm-up, background reloads) is not attributed
+    to anyone.
+    """
+    if not has_request_context():
+        return
+    phases = g.setdefault("server_timing", OrderedDict())
+    phases[name] = phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str, histogram=None, **labels: str):
+    """Time the block as a Server-Timing ``phase`` and, optionally, into ``histogram``.
+
+    Phases nest: time spent in an inner phase (e.g. payload builds triggered
+    while the workbook loads) is reported under the inner one only, so the
+    phases of a request add up to at most its total.
+    """
+    in_request = has_request_context()
+    nested = g.setdefault("server_timing_nested", []) if in_request else None
+    if nested is not None:
+        nested.append(0.0)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if histogram is not None:
+            histogram.observe(elapsed, **labels)
+        if nested is not None:
+            inner = nested.pop()
+            if nested:
+                nested[-1] += elapsed
+            record_phase(phase, elapsed - inner)
+
+
+def format_server_timing(phases) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in phases.items())
+
+
+class RequestProfiler:
+    """Server-Timing headers for every matching request, plus opt-in profiling.
+
+    Responses under ``prefix`` carry a ``Server-Timing`` header with each phase
+    recorded through ``timed``/``record_phase`` and the request total, which
+    browser devtools show in the network panel. When ``enabled``, adding
+    ``?profile=1`` runs the request under cProfile and stores the stats in
+    ``directory`` (named in the ``X-Profile`` header); ``?profile=text``
+    returns the report instead of the response body.
+    """
+
+    def __init__(self, prefix: str = "/api/", enabled: bool = False, directory: Optional[Path] = None, keep: int = 50):
+        self._prefix = prefix
+        self._enabled = enabled
+        self._directory = Path(directory) if directory is not None else None
+        self._keep = keep
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def install(self, app) -> None:
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        if not request.path.startswith(self._prefix):
+            return None
+        g.server_timing_started = time.perf_counter()
+        if self._enabled and request.args.get("profile") in ("1", "text"):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as error:
+                # Another profiler (a debugger, coverage) already owns this thread.
+                print(f"An error occurred while starting the request profiler: {error}")
+            else:
+                g.profiler = profiler
+        return None
+
+    def _after_request(self, response: Response) -> Response:
+        started = g.pop("server_timing_started", None)
+        if started is None:
+            return response
+
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+
+        phases = OrderedDict(g.get("server_timing") or ())
+        phases["total"] = time.perf_counter() - started
+        response.headers["Server-Timing"] = format_server_timing(phases)
+
+        if profiler is None:
+            return response
+        name = self._store(profiler)
+        if name is not None:
+            response.headers["X-Profile"] = name
+        if request.args.get("profile") == "text":
+            report = Response(self._report(profiler), mimetype="text/plain")
+            report.headers["Server-Timing"] = response.headers["Server-Timing"]
+            report.cache_control.no_store = True
+            return report
+        response.cache_control.no_store = True
+        return response
+
+    def _report(self, profiler: cProfile.Profile) -> str:
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_REPORT_LINES)
+        return output.getvalue()
+
+    def _store(self, profiler: cProfile.Profile) -> Optional[str]:
+        if self._directory is None:
+            return None
+        route = _SAFE_NAME.sub("_", request.path.strip("/")) or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{route}.prof"
+        try:
+            with self._lock:
+                self._directory.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(str(self._directory / name))
+                stored = sorted(self._directory.glob("*.prof"))
+                for stale in stored[: max(0, len(stored) - self._keep)]:
+                    stale.unlink(missing_ok=True)
+        except OSError as error:
+            print(f"An error occurred while saving the request profile: {error}")
+            return None
+        return name
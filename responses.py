@@ -0,0 +1,184 @@
+import gzip
+import hashlib
+import threading
+from pathlib import Path
+
+from flask import Response
+
+from metrics import CACHE_EVICTIONS, CACHE_REQUESTS
+from profiling import timed
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+JSON_MIMETYPE = "application/json"
+
+AVAILABLE_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Bodies smaller than this gain little from compression.
+MIN_COMPRESS_SIZE = 1024
+
+# API bodies are compressed on first use per workbook version, static assets
+# once per file revision, so the latter can afford the slowest settings.
+DYNAMIC_LEVELS = {"br": 5, "gzip": 6}
+STATIC_LEVELS = {"br": 11, "gzip": 9}
+
+STATIC_SUFFIXES = (".html", ".js", ".css", ".svg", ".json", ".txt")
+
+# Data can change whenever the workbook is saved, so browsers may store the
+# body but must revalidate it; revalidation is a cheap ETag comparison.
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def compress(body: bytes, encoding: str, levels=DYNAMIC_LEVELS) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=levels["br"])
+    return gzip.compress(body, compresslevel=levels["gzip"], mtime=0)
+
+
+def negotiate_encoding(request):
+    """Pick the best content coding the client accepts, or None for identity."""
+    return request.accept_encodings.best_match(AVAILABLE_ENCODINGS)
+
+
+class EncodedResponse:
+    """A response body encoded once and reused for every request of a workbook version."""
+
+    __slots__ = ("body", "status", "etag", "_variants")
+
+    def __init__(self, body: bytes, status: int = 200) -> None:
+        self.body = body
+        self.status = status
+        # Derived from the bytes rather than the workbook version, so a section
+        # whose content survives a reload keeps its ETag and clients keep
+        # getting 304s.
+        self.etag = hashlib.sha256(body).hexdigest()[:32] if status == 200 else None
+        self._variants = {}
+
+    def variant(self, encoding):
+        """Return the body compressed with ``encoding``, or None to send it as is."""
+        if encoding is None or len(self.body) < MIN_COMPRESS_SIZE:
+            return None
+        try:
+            return self._variants[encoding]
+        except KeyError:
+            pass
+        with timed("compress"):
+            compressed = compress(self.body, encoding)
+        if len(compressed) >= len(self.body):
+            compressed = None
+        return self._variants.setdefault(encoding, compressed)
+
+    def precompress(self) -> None:
+        """Build every compressed variant now instead of on first request."""
+        if self.etag is not None:
+            for encoding in AVAILABLE_ENCODINGS:
+                self.variant(encoding)
+
+
+def encode_json(app, payload, status: int = 200) -> EncodedResponse:
+    """Encode ``payload`` exactly as ``jsonify`` would."""
+    return EncodedResponse(app.json.response(payload).get_data(), status)
+
+
+def send_encoded(encoded: EncodedResponse, request) -> Response:
+    encoding = negotiate_encoding(request) if encoded.etag is not None else None
+    compressed = encoded.variant(encoding)
+    response = Response(compressed or encoded.body, status=encoded.status, mimetype=JSON_MIMETYPE)
+    response.vary.add("Accept-Encoding")
+    if encoded.etag is None:
+        response.cache_control.no_store = True
+        return response
+
+    if compressed is not None:
+        # Compressed variants carry the weak form of the ETag: same content,
+        # different bytes. If-None-Match uses weak comparison, so either form
+        # still yields a 304.
+        response.content_encoding = encoding
+        response.set_etag(encoded.etag, weak=True)
+    else:
+        response.set_etag(encoded.etag)
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    return response.make_conditional(request)
+
+
+class PrecompressedAssets:
+    """gzip/brotli variants of the static text assets, built once per file revision.
+
+    ``compress_response`` swaps a plain static file response for the matching
+    precompressed body when the client accepts it.
+    """
+
+    def __init__(self, directory: Path, suffixes=STATIC_SUFFIXES) -> None:
+        self._directory = Path(directory).resolve()
+        self._suffixes = suffixes
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def build(self) -> None:
+        if not self._directory.is_dir():
+            return
+        for path in sorted(self._directory.rglob("*")):
+            if path.is_file() and path.suffix.lower() in self._suffixes:
+                self._variants_for(path)
+
+    def _variants_for(self, path: Path):
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._variants.get(path)
+        if cached is not None and cached[0] == signature:
+            CACHE_REQUESTS.inc(cache="static", result="hit")
+            return cached[1]
+
+        with self._lock:
+            cached = self._variants.get(path)
+            if cached is not None and cached[0] == signature:
+                CACHE_REQUESTS.inc(cache="static", result="hit")
+                return cached[1]
+            CACHE_REQUESTS.inc(cache="static", result="miss")
+            if cached is not None:
+                CACHE_EVICTIONS.inc(cache="static")
+            try:
+                body = path.read_bytes()
+            except OSError:
+                return None
+            variants = {}
+            if len(body) >= MIN_COMPRESS_SIZE:
+                for encoding in AVAILABLE_ENCODINGS:
+                    compressed = compress(body, encoding, STATIC_LEVELS)
+                    if len(compressed) < len(body):
+                        variants[encoding] = compressed
+            self._variants[path] = (signature, variants)
+            return variants
+
+    def compress_response(self, response: Response, request, filename: str) -> Response:
+        response.vary.add("Accept-Encoding")
+        if response.status_code != 200 or response.content_encoding:
+            return response
+        if Path(filename).suffix.lower() not in self._suffixes:
+            return response
+
+        path = (self._directory / filename).resolve()
+        if self._directory not in path.parents:
+            return response
+
+        encoding = negotiate_encoding(request)
+        if encoding is None:
+            return response
+        variants = self._variants_for(path)
+        if not variants or encoding not in variants:
+            return response
+
+        etag, _ = response.get_etag()
+        response.close()
+        response.direct_passthrough = False
+        response.set_data(variants[encoding])
+        response.content_encoding = encoding
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,175 @@
+import datetime
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from serialization import ROWS, serialize_dataframe
+
+# Bucket sizes, finest first; each one is rolled up from the one before it.
+# Weeks start on Monday.
+BUCKETS = ("day", "week", "month")
+
+# Portuguese month names by their first three letters.
+_MONTHS = {
+    name: number
+    for number, name in enumerate(("jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez"), 1)
+}
+
+# The per-bucket values each aggregation keeps, and how a coarser bucket
+# combines them from the finer ones.
+_COMPONENTS = {
+    "sum": ("sum",),
+    "mean": ("sum", "count"),
+    "min": ("min",),
+    "max": ("max",),
+    "last": ("last",),
+}
+_ROLLUP = {"sum": "sum", "count": "sum", "min": "min", "max": "max", "last": "last"}
+
+
+@dataclass(frozen=True)
+class Measure:
+    """One rolled-up value: ``column`` aggregated with ``how`` (a key of ``_COMPONENTS``)."""
+
+    name: str
+    column: str
+    how: str = "sum"
+
+
+def _month_number(value) -> Optional[int]:
+    if isinstance(value, (int, float, np.integer, np.floating)) and not pd.isna(value):
+        return int(value) if 1 <= value <= 12 else None
+    text = unicodedata.normalize("NFKD", str(value)).encode("ascii", "ignore").decode().strip().lower()
+    if text.isdigit():
+        return int(text) if 1 <= int(text) <= 12 else None
+    return _MONTHS.get(text[:3])
+
+
+def day_month_dates(days: pd.Series, months: pd.Series, reference: datetime.date) -> pd.Series:
+    """Dates of rows labelled only by day and month name, listed in chronological order.
+
+    A month lower than the previous row's starts a new year, and the last row
+    falls no later than ``reference`` (when the workbook was saved). Rows
+    whose day or month cannot be read get NaT.
+    """
+    lookup = {value: _month_number(value) for value in months.dropna().unique()}
+    month_numbers = pd.to_numeric(months.map(lookup), errors="coerce")
+    day_numbers = pd.to_numeric(days, errors="coerce")
+    valid = (month_numbers.notna() & day_numbers.notna()).to_numpy()
+    dates = pd.Series(pd.NaT, index=days.index, dtype="datetime64[ns]")
+    if not valid.any():
+        return dates
+
+    month_values = month_numbers[valid].astype(int).to_numpy()
+    year_starts = np.concatenate(([0], np.cumsum(np.diff(month_values) < 0)))
+    last_year = reference.year if month_values[-1] <= reference.month else reference.year - 1
+    parts = pd.DataFrame(
+        {
+            "year": last_year - (year_starts[-1] - year_starts),
+            "month": month_values,
+            "day": day_numbers[valid].astype(int).to_numpy(),
+        }
+    )
+    dates[valid] = pd.to_datetime(parts, errors="coerce").to_numpy()
+    return dates
+
+
+def label_dates(labels: pd.Series) -> pd.Series:
+    """Dates of row labels written as dd/mm/yyyy (or ISO, for cells Excel stored as dates).
+
+    Other labels, such as pivot table totals, get NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(labels):
+        return labels.dt.normalize()
+    text = labels.astype(str).str.strip()
+    dates = pd.to_datetime(text, format="%d/%m/%Y", errors="coerce")
+    pending = dates.isna() & labels.notna()
+    if pending.any():
+        dates[pending] = pd.to_datetime(text[pending], format="ISO8601", errors="coerce")
+    return dates.dt.normalize()
+
+
+def _bucket_starts(days: pd.DatetimeIndex, bucket: str) -> pd.DatetimeIndex:
+    if bucket == "week":
+        return days - pd.to_timedelta(days.dayofweek, unit="D")
+    return days.to_period("M").to_timestamp()
+
+
+def _bucket_ends(starts: pd.DatetimeIndex, bucket: str) -> pd.DatetimeIndex:
+    if bucket == "day":
+        return starts
+    if bucket == "week":
+        return starts + pd.Timedelta(days=6)
+    return starts + pd.offsets.MonthEnd(0)
+
+
+class RollupIndex:
+    """Day, week and month aggregates of a dated sheet, built once.
+
+    Rows are aggregated into days once; weeks and months are rolled up from
+    the days, so answering any bucket never rescans the sheet. Rows without a
+    readable date are left out.
+    """
+
+    def __init__(self, dates: pd.Series, dataframe: pd.DataFrame, measures: Sequence[Measure]) -> None:
+        self.measures = tuple(measure for measure in measures if measure.column in dataframe.columns)
+        dated = dates.notna().to_numpy()
+        rows = pd.DataFrame(
+            {measure.column: pd.to_numeric(dataframe[measure.column], errors="coerce") for measure in self.measures},
+            index=dataframe.index,
+        )[dated]
+        rows.index = pd.DatetimeIndex(dates[dated]).normalize()
+        rows = rows.sort_index(kind="stable")
+
+        # {component column: (measure column, component)}
+        components = {
+            f"{measure.name}:{component}": (measure.column, component)
+            for measure in self.measures
+            for component in _COMPONENTS[measure.how]
+        }
+        grouped = rows.groupby(level=0, sort=True)
+        day = pd.DataFrame(
+            {name: grouped[column].agg(component) for name, (column, component) in components.items()},
+            index=grouped.size().index,
+        )
+        day["days"] = 1
+        rollup = {name: _ROLLUP[component] for name, (_, component) in components.items()}
+        rollup["days"] = "sum"
+
+        self._components: Dict[str, pd.DataFrame] = {"day": day}
+        for bucket in BUCKETS[1:]:
+            self._components[bucket] = day.groupby(_bucket_starts(day.index, bucket), sort=True).agg(rollup)
+        self._tables = {bucket: self._table(bucket) for bucket in BUCKETS}
+
+    def __len__(self) -> int:
+        return len(self._components["day"])
+
+    def _table(self, bucket: str) -> pd.DataFrame:
+        components = self._components[bucket]
+        starts = pd.DatetimeIndex(components.index)
+        columns = {
+            "start": starts.strftime("%Y-%m-%d"),
+            "end": _bucket_ends(starts, bucket).strftime("%Y-%m-%d"),
+            "days": components["days"].to_numpy(dtype=np.int64),
+        }
+        for measure in self.measures:
+            if measure.how == "mean":
+                counts = components[f"{measure.name}:count"].to_numpy(dtype=float)
+                sums = components[f"{measure.name}:sum"].to_numpy(dtype=float)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    columns[measure.name] = np.where(counts > 0, sums / counts, np.nan)
+            else:
+                columns[measure.name] = components[f"{measure.name}:{measure.how}"].to_numpy(dtype=float)
+        return pd.DataFrame(columns)
+
+    def table(self, bucket: str) -> pd.DataFrame:
+        return self._tables[bucket]
+
+    def payload(self, bucket: str, layout: str = ROWS) -> dict:
+        payload = serialize_dataframe(self._tables[bucket], layout)
+        payload["bucket"] = bucket
+        payload["measures"] = {measure.name: {"column": measure.column, "how": measure.how} for measure in self.measures}
+        return payload
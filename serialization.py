@@ -0,0 +1,85 @@
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+ROWS = "rows"
+COLUMNAR = "columnar"
+COLUMNAR_MEDIA_TYPE = "application/vnd.painel.columnar+json"
+
+# Cells of these source dtypes come out of DataFrame.to_numpy() as plain Python
+# values (or NaN), so only missing values need replacing.
+_PLAIN_KINDS = frozenset("biuf")
+
+
+def coerce_value(value: Any):
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if pd.isna(value):
+        return None
+    if isinstance(value, (float, int, str, bool)):
+        return value
+    return str(value)
+
+
+def _replace_missing(values: np.ndarray, cells: list) -> list:
+    for position in np.flatnonzero(pd.isna(values)):
+        cells[position] = None
+    return cells
+
+
+def _serialize_datetimes(values: np.ndarray) -> list:
+    """ISO strings for a tz-naive datetime64 array, as Timestamp.isoformat() renders them."""
+    missing = np.isnat(values)
+    whole_seconds = values.astype("datetime64[s]")
+    if not np.array_equal(whole_seconds[~missing], values[~missing]):
+        return [None if pd.isna(stamp) else stamp.isoformat() for stamp in pd.DatetimeIndex(values)]
+    return _replace_missing(values, np.datetime_as_string(whole_seconds, unit="s").tolist())
+
+
+def _serialize_column(values: np.ndarray, source: pd.Series) -> list:
+    """Coerce one column of the frame's 2-D value array.
+
+    The array is the same one ``DataFrame.iterrows`` walks, so cells are boxed
+    exactly as they were when rows were coerced one by one: numbers of
+    all-numeric frames stay NumPy scalars, which ``coerce_value`` stringifies
+    for integers and booleans, and datetime cells arrive as Timestamps.
+    """
+    kind = values.dtype.kind
+    if kind == "M":
+        return _serialize_datetimes(values)
+    if kind == "f":
+        return _replace_missing(values, values.tolist())
+    if kind in "iub":
+        return values.astype(str).tolist()
+    if kind != "O":
+        return [coerce_value(value) for value in values]
+
+    source_dtype = source.dtype
+    if isinstance(source_dtype, np.dtype) and source_dtype.kind == "M":
+        return _serialize_datetimes(source.to_numpy())
+    if source_dtype.kind in _PLAIN_KINDS or isinstance(source_dtype, pd.StringDtype):
+        return _replace_missing(values, values.tolist())
+    return [coerce_value(value) for value in values]
+
+
+def serialize_dataframe(dataframe: pd.DataFrame, layout: str = ROWS):
+    """Serialize ``dataframe`` for the JSON API.
+
+    ``rows`` (the default) produces ``{"columns": [...], "rows": [{column: value}]}``;
+    ``columnar`` produces ``{"columns": [...], "data": {column: [values]}}``,
+    which is smaller and cheaper to build for wide or long sheets.
+    """
+    columns = list(dataframe.columns)
+    matrix = dataframe.to_numpy()
+    data = [
+        _serialize_column(matrix[:, position], dataframe.iloc[:, position])
+        for position in range(len(columns))
+    ]
+
+    if layout == COLUMNAR:
+        return {"columns": columns, "data": dict(zip(columns, data))}
+    return {
+        "columns": columns,
+        "rows": [dict(zip(columns, cells)) for cells in zip(*data)],
+    }
@@ -0,0 +1,219 @@
+import threading
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Columns of the frame a DailySeries is built from: the day and month that
+# make up each label, then the bars, the percentage line and the running total.
+SOURCE_COLUMNS = ("dia", "mes", "valor", "percentual", "acumulativo")
+
+
+def _floats(values: pd.Series) -> np.ndarray:
+    return values.fillna(0).astype(float).to_numpy()
+
+
+def _labels(source: pd.DataFrame) -> List[str]:
+    return [f"{dia} {mes}" for dia, mes in zip(source["dia"], source["mes"])]
+
+
+def _running_sum(start: float, values: np.ndarray) -> float:
+    # cumsum adds left to right like the built-in sum(), so extending a total
+    # gives the same float as summing the whole column again.
+    if not len(values):
+        return float(start)
+    return float(np.cumsum(np.concatenate(([start], values)))[-1])
+
+
+def lttb_indices(values: np.ndarray, points: int) -> np.ndarray:
+    """Positions of the ``points`` samples Largest-Triangle-Three-Buckets keeps of ``values``.
+
+    The first and last samples are always kept; every bucket in between
+    contributes the sample forming the largest triangle with the previously
+    kept one and the average of the next bucket, which preserves peaks and
+    troughs that plain striding would skip. Samples are evenly spaced (one
+    per day), so their positions serve as the x axis.
+    """
+    count = len(values)
+    if points >= count or points < 3:
+        return np.arange(count)
+
+    every = (count - 2) / (points - 2)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, count - 1
+    kept = 0
+    for bucket in range(points - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        following_end = min(int((bucket + 2) * every) + 1, count)
+        following_x = (end + following_end - 1) / 2
+        following_y = values[end:following_end].mean()
+        positions = np.arange(start, end)
+        areas = np.abs(
+            (kept - following_x) * (values[start:end] - values[kept])
+            - (kept - positions) * (following_y - values[kept])
+        )
+        kept = start + int(np.argmax(areas))
+        selected[bucket + 1] = kept
+    return selected
+
+
+class DailySeries:
+    """The "Bloqueado por Mês" chart series with its summary metrics precomputed.
+
+    ``extend`` derives the series of a later revision that only appends days
+    from this one, updating the metrics from the new rows alone.
+    """
+
+    def __init__(self, source, labels, valores, percentuais, acumulativos, peak, trough, acumulativo_sum):
+        self.source = source
+        self.labels = labels
+        self.valores = valores
+        self.percentuais = percentuais
+        self.acumulativos = acumulativos
+        # Positions of the first largest and smallest percentages.
+        self.peak = peak
+        self.trough = trough
+        self.acumulativo_sum = acumulativo_sum
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @classmethod
+    def build(cls, source: pd.DataFrame) -> "DailySeries":
+        source = source.reset_index(drop=True)
+        percentuais = _floats(source["percentual"]) * 100
+        acumulativos = _floats(source["acumulativo"])
+        return cls(
+            source,
+            _labels(source),
+            _floats(source["valor"]),
+            percentuais,
+            acumulativos,
+            int(np.argmax(percentuais)) if len(percentuais) else None,
+            int(np.argmin(percentuais)) if len(percentuais) else None,
+            _running_sum(0.0, acumulativos),
+        )
+
+    def extend(self, source: pd.DataFrame) -> Optional["DailySeries"]:
+        """The series of ``source``, or None unless it starts with exactly this series' rows."""
+        count = len(self.source)
+        if len(source) < count or list(source.columns) != list(self.source.columns):
+            return None
+        source = source.reset_index(drop=True)
+        if not source.iloc[:count].equals(self.source):
+            return None
+        if len(source) == count:
+            return self
+
+        tail = source.iloc[count:]
+        percentuais = _floats(tail["percentual"]) * 100
+        acumulativos = _floats(tail["acumulativo"])
+
+        peak, trough = self.peak, self.trough
+        tail_peak = int(np.argmax(percentuais))
+        if peak is None or percentuais[tail_peak] > self.percentuais[peak]:
+            peak = count + tail_peak
+        tail_trough = int(np.argmin(percentuais))
+        if trough is None or percentuais[tail_trough] < self.percentuais[trough]:
+            trough = count + tail_trough
+
+        return DailySeries(
+            source,
+            self.labels + _labels(tail),
+            np.concatenate((self.valores, _floats(tail["valor"]))),
+            np.concatenate((self.percentuais, percentuais)),
+            np.concatenate((self.acumulativos, acumulativos)),
+            peak,
+            trough,
+            _running_sum(self.acumulativo_sum, acumulativos),
+        )
+
+    def metrics(self) -> dict:
+        labels = self.labels
+
+        largest_positive = None
+        if self.peak is not None and self.percentuais[self.peak] > 0:
+            largest_positive = {"label": labels[self.peak], "percent": float(self.percentuais[self.peak])}
+
+        largest_negative = None
+        if self.trough is not None and self.percentuais[self.trough] < 0:
+            largest_negative = {"label": labels[self.trough], "percent": float(self.percentuais[self.trough])}
+
+        tendencia = {
+            "direction": "Estável",
+            "delta": 0.0,
+            "status": "neutral",
+            "start_label": labels[0] if labels else "",
+            "end_label": labels[-1] if labels else "",
+        }
+
+        if len(self.valores) >= 2:
+            first, last = float(self.valores[0]), float(self.valores[-1])
+            delta = last - first
+            referencia = abs(first) if first != 0 else abs(last)
+            tolerancia = max(referencia * 0.005, 1.0)
+
+            if delta > tolerancia:
+                tendencia.update({"direction": "Alta", "status": "bad"})
+            elif delta < -tolerancia:
+                tendencia.update({"direction": "Queda", "status": "good"})
+
+            tendencia["delta"] = delta
+
+        return {
+            "largest_positive": largest_positive,
+            "largest_negative": largest_negative,
+            "trend": tendencia,
+            "acumulativo_sum": self.acumulativo_sum,
+        }
+
+    def payload(self) -> dict:
+        return {
+            "labels": list(self.labels),
+            "bars": self.valores.tolist(),
+            "line": self.percentuais.tolist(),
+            "acumulativos": self.acumulativos.tolist(),
+            "metrics": self.metrics(),
+        }
+
+    def downsampled(self, points: int) -> dict:
+        """``payload()`` with at most ``points`` days, picked by LTTB over the bars.
+
+        The metrics still describe every day; ``total_points`` tells how many
+        there are.
+        """
+        if points >= len(self):
+            return self.payload()
+        indices = lttb_indices(self.valores, points)
+        return {
+            "labels": [self.labels[index] for index in indices],
+            "bars": self.valores[indices].tolist(),
+            "line": self.percentuais[indices].tolist(),
+            "acumulativos": self.acumulativos[indices].tolist(),
+            "metrics": self.metrics(),
+            "total_points": len(self),
+        }
+
+
+class IncrementalSeries:
+    """Builds each revision's DailySeries, extending the previous one when possible.
+
+    A workbook reload that only appends days then costs a comparison of the
+    old rows plus work proportional to the new ones, instead of converting
+    and scanning the whole history again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latest: Optional[DailySeries] = None
+
+    def update(self, source: pd.DataFrame) -> DailySeries:
+        with self._lock:
+            latest = self._latest
+        series = latest.extend(source) if latest is not None else None
+        if series is None:
+            series = DailySeries.build(source)
+        with self._lock:
+            self._latest = series
+        return series
@@ -1,14 +1,28 @@
+import argparse
+import json
+import multiprocessing
 import os
 import subprocess
 import sys
 import threading
 import time
+import urllib.error
+import urllib.request
 import webbrowser
 from pathlib import Path
 import tkinter as tk
 from tkinter import messagebox
 import tkinter.ttk as ttk
 
+from serving import DEFAULT_THREADS, DEVELOPMENT, PRODUCTION, RESERVED_WORKERS, add_server_arguments, serve
+
+# Fewer threads than this leave no worker for the displays' event streams.
+MIN_THREADS = RESERVED_WORKERS + 1
+
+READY_URL = "http://127.0.0.1:5000/readyz"
+READY_TIMEOUT = 120.0
+READY_POLL_INTERVAL = 0.5
+
 
 def _is_frozen() -> bool:
     return getattr(sys, "frozen", False)
@@ -33,7 +47,7 @@ class ServerController:
     def __init__(self, master: tk.Tk) -> None:
         self.master = master
         self.master.title("Servidor Apresentação")
-        self.master.geometry("420x460")
+        self.master.geometry("420x520")
         self.master.resizable(False, False)
         self.master.configure(bg="#0f172a")
 
@@ -56,6 +70,8 @@ class ServerController:
         self.style.configure("Status.TLabel", background="#0f172a", foreground="#e2e8f0", font=("Segoe UI", 10))
         self.style.configure("CardLabel.TLabel", background="#1e293b", foreground="#e2e8f0", font=("Segoe UI", 10, "bold"))
         self.style.configure("CardValue.TLabel", background="#1e293b", foreground="#cbd5f5", font=("Segoe UI", 10))
+        self.style.configure("Option.TCheckbutton", background="#0f172a", foreground="#e2e8f0", font=("Segoe UI", 10))
+        self.style.map("Option.TCheckbutton", background=[("active", "#0f172a")])
         self.style.configure("Footer.TLabel", background="#0f172a", foreground="#64748b", font=("Segoe UI", 9))
         self.style.configure(
             "Accent.TButton",
@@ -93,6 +109,8 @@ class ServerController:
             "error": "#ef4444",
             "stopped": "#64748b",
         }
+        self._production_var = tk.BooleanVar(value=os.environ.get("PAINEL_SERVER_MODE", PRODUCTION) == PRODUCTION)
+        self._threads_var = tk.StringVar(value=os.environ.get("PAINEL_SERVER_THREADS", str(DEFAULT_THREADS)))
         self._process = None
         self._lock = threading.Lock()
 
@@ -146,6 +164,28 @@ class ServerController:
         ttk.Label(status_row, text="Status:", style="Status.TLabel").pack(side=tk.LEFT, padx=(8, 4))
         ttk.Label(status_row, textvariable=self._status_var, style="Status.TLabel").pack(side=tk.LEFT)
 
+        options_row = ttk.Frame(container, style="Root.TFrame")
+        options_row.pack(fill=tk.X, pady=(0, 8))
+
+        self._production_check = ttk.Checkbutton(
+            options_row,
+            text="Modo produção (multi-thread)",
+            variable=self._production_var,
+            style="Option.TCheckbutton",
+        )
+        self._production_check.pack(side=tk.LEFT)
+
+        self._threads_spinbox = ttk.Spinbox(
+            options_row,
+            from_=MIN_THREADS,
+            to=256,
+            width=5,
+            textvariable=self._threads_var,
+            font=("Segoe UI", 10),
+        )
+        self._threads_spinbox.pack(side=tk.RIGHT)
+        ttk.Label(options_row, text="Threads:", style="Status.TLabel").pack(side=tk.RIGHT, padx=(0, 6))
+
         button_row = ttk.Frame(container, style="Root.TFrame")
         button_row.pack(fill=tk.X, pady=(4, 12))
 
@@ -203,6 +243,7 @@ class ServerController:
                     messagebox.showerror("Erro", f"main.py não encontrado em {self._base_path}")
                     return
                 command = [sys.executable, str(main_script)]
+            command.extend(self._server_arguments())
 
             env = os.environ.copy()
             env.setdefault("PYTHONUNBUFFERED", "1")
@@ -231,8 +272,23 @@ class ServerController:
             self._set_status("Iniciando servidor...", "starting")
             self._start_button.config(state=tk.DISABLED)
             self._stop_button.config(state=tk.NORMAL)
+            self._set_options_state(tk.DISABLED)
             threading.Thread(target=self._auto_open_browser, daemon=True).start()
 
+    def _server_arguments(self) -> list:
+        if not self._production_var.get():
+            return ["--mode", DEVELOPMENT]
+        try:
+            threads = max(MIN_THREADS, int(self._threads_var.get()))
+        except ValueError:
+            threads = DEFAULT_THREADS
+        self._threads_var.set(str(threads))
+        return ["--mode", PRODUCTION, "--threads", str(threads)]
+
+    def _set_options_state(self, state: str) -> None:
+        self._production_check.config(state=state)
+        self._threads_spinbox.config(state=state)
+
     def _monitor_process(self) -> None:
         process = self._process
         if not process:
@@ -243,14 +299,51 @@ class ServerController:
         self.master.after(0, self._on_process_stopped)
 
     def _auto_open_browser(self) -> None:
-        time.sleep(2)
-        self.open_browser()
-        self.master.after(0, lambda: self._set_status("Servidor em execução", "running"))
+        if self._wait_until_ready():
+            self.open_browser()
+            self.master.after(0, lambda: self._set_status("Servidor em execução", "running"))
+
+    def _wait_until_ready(self) -> bool:
+        """Poll /readyz until the server has warmed its caches; False if it exits first."""
+        deadline = time.monotonic() + READY_TIMEOUT
+        while time.monotonic() < deadline:
+            with self._lock:
+                process = self._process
+            if process is None or process.poll() is not None:
+                return False
+            try:
+                with urllib.request.urlopen(READY_URL, timeout=2) as response:
+                    if response.status == 200:
+                        return True
+            except urllib.error.HTTPError as error:
+                # 503 while warming up; the body reports progress.
+                self._show_warm_up_progress(error)
+            except (OSError, ValueError):
+                pass
+            time.sleep(READY_POLL_INTERVAL)
+        # Still warming up: open anyway, the first requests will just be slower.
+        return True
+
+    def _show_warm_up_progress(self, error) -> None:
+        try:
+            status = json.loads(error.read().decode("utf-8"))
+        except (OSError, ValueError):
+            return
+        workbook = status.get("workbook") or {}
+        payloads = workbook.get("payloads")
+        if status.get("state") == "finishing":
+            text = "Preparando arquivos estáticos..."
+        elif payloads:
+            text = f"Carregando dados ({payloads['done']}/{payloads['total']})..."
+        else:
+            text = "Carregando planilha..."
+        self.master.after(0, lambda: self._set_status(text, "starting"))
 
     def _on_process_stopped(self) -> None:
         self._set_status("Servidor parado", "stopped")
         self._start_button.config(state=tk.NORMAL)
         self._stop_button.config(state=tk.DISABLED)
+        self._set_options_state(tk.NORMAL)
 
     def stop_server(self) -> None:
         with self._lock:
@@ -260,6 +353,7 @@ class ServerController:
                 self._set_status("Servidor parado", "stopped")
                 self._start_button.config(state=tk.NORMAL)
                 self._stop_button.config(state=tk.DISABLED)
+                self._set_options_state(tk.NORMAL)
                 return
 
             process.terminate()
@@ -273,6 +367,7 @@ class ServerController:
         self._set_status("Servidor parado", "stopped")
         self._start_button.config(state=tk.NORMAL)
         self._stop_button.config(state=tk.DISABLED)
+        self._set_options_state(tk.NORMAL)
 
     def open_browser(self) -> None:
         url = self._url_var.get()
@@ -294,12 +389,20 @@ class ServerController:
 
 def _run_server_mode() -> None:
     os.chdir(str(_get_resource_root()))
-    from main import app
+    parser = argparse.ArgumentParser(description="Servidor Apresentação")
+    parser.add_argument("--run-server", action="store_true")
+    options = add_server_arguments(parser).parse_args()
+
+    from main import WARM_UP, app, configure_events
 
-    app.run(host="0.0.0.0", port=5000, debug=False, use_reloader=False)
+    configure_events(options)
+    WARM_UP.start()
+    serve(app, options)
 
 
 def main() -> None:
+    # The sheet parsing pool re-launches this executable for its workers.
+    multiprocessing.freeze_support()
     if "--run-server" in sys.argv:
         _run_server_mode()
         return
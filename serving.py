@@ -0,0 +1,174 @@
+import argparse
+import os
+import queue
+import threading
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+DEVELOPMENT = "development"
+PRODUCTION = "production"
+SERVER_MODES = (DEVELOPMENT, PRODUCTION)
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 5000
+# Every display keeps a connection open, so the pool is sized for a dozen
+# kiosks plus office browsers rather than for CPU count.
+DEFAULT_THREADS = 32
+DEFAULT_BACKLOG = 128
+DEFAULT_KEEP_ALIVE = 5.0
+# Seconds a client gets to send its request when keep-alive is off.
+REQUEST_TIMEOUT = 5.0
+DEFAULT_EVENT_STREAMS = 24
+# Pool workers never taken by long-lived event streams, so ordinary requests
+# are still answered while every stream slot is in use.
+RESERVED_WORKERS = 4
+
+
+class _PooledRequestHandler(WSGIRequestHandler):
+    """HTTP/1.1 handler that keeps connections alive and skips per-request access logs."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_request(self, code="-", size="-") -> None:
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """A WSGI server that hands accepted connections to a fixed pool of worker threads.
+
+    Werkzeug's threaded server starts a new thread for every connection; this
+    one reuses ``threads`` long-lived workers, queues connections while they are
+    all busy, and listens with a ``backlog``-sized accept queue. A connection is
+    kept open between requests for up to ``keep_alive`` seconds of inactivity;
+    with ``keep_alive`` at 0 (or below) every connection is closed after one
+    response.
+    """
+
+    multithread = True
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        app,
+        threads: int = DEFAULT_THREADS,
+        backlog: int = DEFAULT_BACKLOG,
+        keep_alive: float = DEFAULT_KEEP_ALIVE,
+    ) -> None:
+        self.request_queue_size = backlog
+        if keep_alive > 0:
+            attributes = {"timeout": keep_alive}
+        else:
+            # HTTP/1.0 responses close the connection, so no worker waits on an
+            # idle client; the timeout still bounds reading the one request.
+            attributes = {"timeout": REQUEST_TIMEOUT, "protocol_version": "HTTP/1.0"}
+        handler = type("RequestHandler", (_PooledRequestHandler,), attributes)
+        super().__init__(host, port, app, handler=handler)
+        self._connections = queue.Queue()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"wsgi-worker-{number}", daemon=True)
+            for number in range(max(1, threads))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def process_request(self, request, client_address) -> None:
+        self._connections.put((request, client_address))
+
+    def _work(self) -> None:
+        while True:
+            item = self._connections.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        for _ in getattr(self, "_workers", ()):
+            self._connections.put(None)
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    """Register the serving options; defaults come from ``PAINEL_SERVER_*`` variables."""
+    parser.add_argument(
+        "--mode",
+        choices=SERVER_MODES,
+        default=os.environ.get("PAINEL_SERVER_MODE", DEVELOPMENT),
+        help="development uses Flask's built-in server; production a pooled multi-threaded server",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=int(os.environ.get("PAINEL_SERVER_THREADS", DEFAULT_THREADS)),
+        help="worker threads in production mode",
+    )
+    parser.add_argument(
+        "--backlog",
+        type=int,
+        default=int(os.environ.get("PAINEL_SERVER_BACKLOG", DEFAULT_BACKLOG)),
+        help="pending connections the socket queues in production mode",
+    )
+    parser.add_argument(
+        "--keep-alive",
+        type=float,
+        default=float(os.environ.get("PAINEL_SERVER_KEEP_ALIVE", DEFAULT_KEEP_ALIVE)),
+        help="seconds an idle connection is kept open in production mode (0 closes it after each response)",
+    )
+    parser.add_argument(
+        "--event-streams",
+        type=int,
+        default=int(os.environ.get("PAINEL_EVENT_STREAMS", DEFAULT_EVENT_STREAMS)),
+        help=f"most /api/events streams open at once; in production mode also at most threads - {RESERVED_WORKERS}",
+    )
+    return parser
+
+
+def default_server_options() -> argparse.Namespace:
+    """The options ``add_server_arguments`` yields without command-line arguments."""
+    return add_server_arguments(argparse.ArgumentParser()).parse_args([])
+
+
+def stream_capacity(options) -> int:
+    """How many event streams the server selected by ``options`` can hold open.
+
+    Every open stream pins a pool worker for as long as it lasts, so production
+    mode keeps ``RESERVED_WORKERS`` of its threads out of reach of the streams.
+    The development server starts a thread per connection.
+    """
+    requested = max(0, options.event_streams)
+    if options.mode != PRODUCTION:
+        return requested
+    return max(0, min(requested, options.threads - RESERVED_WORKERS))
+
+
+def serve(app, options, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, debug: bool = False) -> None:
+    """Run ``app`` with the server selected by ``options`` until interrupted."""
+    if options.mode != PRODUCTION:
+        app.run(host=host, port=port, debug=debug, use_reloader=debug)
+        return
+
+    server = PooledWSGIServer(
+        host,
+        port,
+        app,
+        threads=options.threads,
+        backlog=options.backlog,
+        keep_alive=options.keep_alive,
+    )
+    keep_alive = f"{options.keep_alive:g}s" if options.keep_alive > 0 else "off"
+    print(
+        f"Serving on http://{host}:{port} with {options.threads} threads "
+        f"(backlog {options.backlog}, keep-alive {keep_alive}, {stream_capacity(options)} event streams)"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from metrics import CACHE_EVICTIONS
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional; snapshots fall back to pickle
+    pa = None
+    feather = None
+
+# Bump whenever the on-disk layout changes so old snapshots are ignored.
+SNAPSHOT_FORMAT = 1
+
+MANIFEST_NAME = "manifest.json"
+STAGING_PREFIX = ".staging-"
+# Staging directories older than this were left behind by an interrupted save.
+STALE_STAGING_SECONDS = 600
+ARROW = "arrow"
+PICKLE = "pickle"
+
+
+def schema_fingerprint(*parts: Any) -> str:
+    """Hash of whatever determines the converted sheets besides the workbook bytes."""
+    material = repr((SNAPSHOT_FORMAT, pd.__version__) + parts).encode("utf-8")
+    return hashlib.sha256(material).hexdigest()[:16]
+
+
+def _frame_to_arrow(dataframe: pd.DataFrame):
+    """Arrow table for ``dataframe``, or None when it would not read back identical."""
+    if pa is None:
+        return None
+    try:
+        table = pa.Table.from_pandas(dataframe)
+        restored = table.to_pandas()
+    except Exception:
+        return None
+    if not restored.dtypes.equals(dataframe.dtypes) or not restored.equals(dataframe):
+        return None
+    return table
+
+
+def _write_sheet(directory: Path, position: int, dataframe: pd.DataFrame) -> Dict[str, str]:
+    table = _frame_to_arrow(dataframe)
+    if table is not None:
+        file_name = f"{position:03d}.arrow"
+        # Uncompressed so the file can be memory-mapped on load.
+        feather.write_feather(table, str(directory / file_name), compression="uncompressed")
+        return {"format": ARROW, "file": file_name}
+
+    # Mixed-type columns cannot be stored in Arrow without changing values.
+    file_name = f"{position:03d}.pickle"
+    with open(directory / file_name, "wb") as handle:
+        pickle.dump(dataframe, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    return {"format": PICKLE, "file": file_name}
+
+
+def _read_sheet(directory: Path, entry: Dict[str, str]) -> pd.DataFrame:
+    path = directory / entry["file"]
+    if entry["format"] == ARROW:
+        if feather is None:
+            raise RuntimeError("pyarrow is required to read this snapshot")
+        return feather.read_table(str(path), memory_map=True).to_pandas()
+    with open(path, "rb") as handle:
+        return pickle.load(handle)
+
+
+class SnapshotStore:
+    """Converted sheets persisted per workbook hash, so restarts skip the Excel parse.
+
+    Each snapshot is a directory named after the workbook digest and the schema
+    fingerprint holding one Arrow (Feather) file per sheet, or a pickle for
+    sheets Arrow cannot round-trip, plus a manifest. Snapshots are written to a
+    temporary directory and renamed into place, so a crash never leaves a
+    partial snapshot behind. Only the ``keep`` most recent snapshots are kept.
+    """
+
+    def __init__(self, directory: Path, fingerprint: str, keep: int = 3) -> None:
+        self._directory = Path(directory)
+        self._fingerprint = fingerprint
+        self._keep = keep
+        self._write_lock = threading.Lock()
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def _snapshot_dir(self, digest: str) -> Path:
+        return self._directory / f"{digest[:32]}-{self._fingerprint}"
+
+    def load(self, digest: str, timings: Optional[Dict[str, float]] = None) -> Optional[Dict[str, Optional[pd.DataFrame]]]:
+        snapshot_dir = self._snapshot_dir(digest)
+        manifest_path = snapshot_dir / MANIFEST_NAME
+        if not manifest_path.is_file():
+            return None
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            if manifest.get("digest") != digest:
+                return None
+            sheets = {}
+            for sheet_name, entry in manifest["sheets"]:
+                started = time.perf_counter()
+                sheets[sheet_name] = None if entry is None else _read_sheet(snapshot_dir, entry)
+                if timings is not None:
+                    timings[sheet_name] = time.perf_counter() - started
+        except Exception as e:
+            print(f"An error occurred while loading the snapshot: {e}")
+            return None
+        # Refresh the mtime so pruning keeps the snapshot in use.
+        try:
+            os.utime(manifest_path)
+        except OSError:
+            pass
+        return sheets
+
+    def save(self, digest: str, sheets: Dict[str, Optional[pd.DataFrame]]) -> bool:
+        snapshot_dir = self._snapshot_dir(digest)
+        with self._write_lock:
+            if (snapshot_dir / MANIFEST_NAME).is_file():
+                return True
+            try:
+                self._directory.mkdir(parents=True, exist_ok=True)
+                staging = Path(tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=self._directory))
+            except OSError as e:
+                print(f"An error occurred while saving the snapshot: {e}")
+                return False
+
+            try:
+                entries = []
+                for position, (sheet_name, dataframe) in enumerate(sheets.items()):
+                    entry = None if dataframe is None else _write_sheet(staging, position, dataframe)
+                    entries.append([sheet_name, entry])
+                manifest = {"digest": digest, "fingerprint": self._fingerprint, "sheets": entries}
+                (staging / MANIFEST_NAME).write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+                os.replace(staging, snapshot_dir)
+            except Exception as e:
+                print(f"An error occurred while saving the snapshot: {e}")
+                shutil.rmtree(staging, ignore_errors=True)
+                return False
+
+            self._prune()
+            return True
+
+    def save_in_background(self, digest: str, sheets: Dict[str, Optional[pd.DataFrame]]) -> threading.Thread:
+        thread = threading.Thread(target=self.save, args=(digest, sheets), name="snapshot-save", daemon=True)
+        thread.start()
+        return thread
+
+    def _prune(self) -> None:
+        snapshots = []
+        try:
+            for path in self._directory.iterdir():
+                if not path.is_dir():
+                    continue
+                if path.name.startswith(STAGING_PREFIX):
+                    if time.time() - path.stat().st_mtime > STALE_STAGING_SECONDS:
+                        shutil.rmtree(path, ignore_errors=True)
+                    continue
+                manifest_path = path / MANIFEST_NAME
+                if manifest_path.is_file():
+                    snapshots.append((manifest_path.stat().st_mtime_ns, path))
+        except OSError:
+            return
+        snapshots.sort(reverse=True)
+        for _, stale in snapshots[self._keep:]:
+            shutil.rmtree(stale, ignore_errors=True)
+            CACHE_EVICTIONS.inc(cache="snapshot")
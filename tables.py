@@ -0,0 +1,224 @@
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from serialization import COLUMNAR, ROWS, serialize_dataframe
+
+# Query parameters understood by the tabular endpoints; ``filter[<column>]``
+# adds equality filters.
+QUERY_PARAMETERS = ("limit", "offset", "columns", "sort")
+_FILTER_PARAMETER = re.compile(r"^filter\[(.+)\]$")
+
+
+class QueryError(ValueError):
+    """A table query that cannot be answered; the message is shown to the client."""
+
+
+@dataclass(frozen=True)
+class TableQuery:
+    limit: Optional[int] = None
+    offset: int = 0
+    columns: Optional[Tuple[Any, ...]] = None
+    # (column, ascending) pairs, most significant first.
+    sort: Tuple[Tuple[Any, bool], ...] = ()
+    # (column, accepted values) pairs; a row must match every column.
+    filters: Tuple[Tuple[Any, Tuple[str, ...]], ...] = ()
+
+
+def _split(value: str) -> Tuple[str, ...]:
+    return tuple(part.strip() for part in value.split(",") if part.strip())
+
+
+def _non_negative(args, name: str) -> Optional[int]:
+    raw = args.get(name)
+    if raw is None or raw == "":
+        return None
+    try:
+        value = int(raw)
+    except ValueError:
+        raise QueryError(f"Parametro invalido: {name}") from None
+    if value < 0:
+        raise QueryError(f"Parametro invalido: {name}")
+    return value
+
+
+def is_table_query(args) -> bool:
+    return any(name in args for name in QUERY_PARAMETERS) or any(_FILTER_PARAMETER.match(name) for name in args)
+
+
+def parse_table_query(args, columns: Sequence[str]) -> TableQuery:
+    """Build a ``TableQuery`` from request arguments, validating column names against ``columns``.
+
+    ``sort`` lists columns separated by commas, ``-`` in front for descending
+    order; ``filter[<column>]`` may repeat, matching any of its values.
+    """
+    # Headers that Excel holds as numbers or dates are matched by their text.
+    known = {str(column): column for column in columns}
+
+    def check(column: str):
+        if column not in known:
+            raise QueryError(f"Coluna desconhecida: {column}")
+        return known[column]
+
+    selected = None
+    if args.get("columns"):
+        selected = tuple(dict.fromkeys(check(column) for column in _split(args["columns"])))
+
+    sort = []
+    for item in _split(args.get("sort", "")):
+        ascending = not item.startswith("-")
+        sort.append((check(item.lstrip("+-").strip()), ascending))
+
+    filters = []
+    for name in args:
+        match = _FILTER_PARAMETER.match(name)
+        if match:
+            values = args.getlist(name) if hasattr(args, "getlist") else [args[name]]
+            filters.append((check(match.group(1)), tuple(values)))
+
+    return TableQuery(
+        limit=_non_negative(args, "limit"),
+        offset=_non_negative(args, "offset") or 0,
+        columns=selected,
+        sort=tuple(sort),
+        filters=tuple(sorted(filters, key=lambda item: str(item[0]))),
+    )
+
+
+def _filter_key(value) -> str:
+    """The text a filter value must equal to match a serialized cell."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _request_keys(value: str) -> Tuple[str, ...]:
+    value = value.strip()
+    try:
+        number = float(value)
+    except ValueError:
+        return (value,)
+    # "10" and "10.0" both match a cell holding the number 10.
+    return (value, _filter_key(number)) if np.isfinite(number) else (value,)
+
+
+class IndexedTable:
+    """One converted sheet plus lazily built per-column sort keys and equality indexes.
+
+    Instances are memoized per workbook version, so the indexes are built at
+    most once per column and revision; a query then costs roughly the size of
+    the rows it matches and returns rather than the size of the sheet.
+    """
+
+    def __init__(self, dataframe: pd.DataFrame) -> None:
+        self._frame = dataframe
+        self._columns = list(dataframe.columns)
+        self._positions = {column: position for position, column in enumerate(self._columns)}
+        self._lock = threading.Lock()
+        self._sort_keys: Dict[str, np.ndarray] = {}
+        self._orders: Dict[Tuple[str, bool], np.ndarray] = {}
+        self._indexes: Dict[str, Dict[str, np.ndarray]] = {}
+        self._missing_rank = len(dataframe) + 1
+
+    @property
+    def columns(self):
+        return self._columns
+
+    def __len__(self) -> int:
+        return len(self._frame)
+
+    def prepare(self) -> None:
+        """Build every column's sort keys and equality index now instead of on first query."""
+        for column in self._columns:
+            self._sort_key(column, True)
+            self._index(column)
+
+    def _sort_key(self, column: str, ascending: bool) -> np.ndarray:
+        """Dense ranks of the column's values; missing values sort last in either direction."""
+        keys = self._sort_keys.get(column)
+        if keys is None:
+            series = self._frame.iloc[:, self._positions[column]].reset_index(drop=True)
+            try:
+                ordered = series.sort_values(kind="stable", na_position="last")
+            except TypeError:
+                # Mixed types (e.g. numbers and text in one column) sort by their text.
+                ordered = series.sort_values(kind="stable", na_position="last", key=lambda values: values.astype(str))
+            # Factorizing sorted values numbers them in sort order, equal values alike.
+            ranks, _ = pd.factorize(ordered.to_numpy(), use_na_sentinel=True)
+            ranks[ranks < 0] = self._missing_rank
+            keys = np.empty(len(ranks), dtype=np.int64)
+            keys[ordered.index.to_numpy()] = ranks
+            with self._lock:
+                keys = self._sort_keys.setdefault(column, keys)
+        if ascending:
+            return keys
+        return np.where(keys == self._missing_rank, self._missing_rank, -keys)
+
+    def _order(self, column: str, ascending: bool) -> np.ndarray:
+        order = self._orders.get((column, ascending))
+        if order is None:
+            order = np.argsort(self._sort_key(column, ascending), kind="stable")
+            with self._lock:
+                order = self._orders.setdefault((column, ascending), order)
+        return order
+
+    def _index(self, column: str) -> Dict[str, np.ndarray]:
+        index = self._indexes.get(column)
+        if index is None:
+            cells = serialize_dataframe(self._frame.iloc[:, [self._positions[column]]], COLUMNAR)["data"][column]
+            keys = pd.Series([_filter_key(cell) for cell in cells], dtype=object)
+            index = {key: np.asarray(positions) for key, positions in keys.groupby(keys, sort=False).indices.items()}
+            with self._lock:
+                index = self._indexes.setdefault(column, index)
+        return index
+
+    def _matching(self, filters) -> Optional[np.ndarray]:
+        matched = None
+        for column, values in filters:
+            index = self._index(column)
+            parts = [index[key] for value in values for key in _request_keys(value) if key in index]
+            positions = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+            matched = positions if matched is None else np.intersect1d(matched, positions, assume_unique=True)
+        return matched
+
+    def select(self, query: TableQuery) -> Tuple[np.ndarray, int]:
+        """Row positions of the requested page, in order, plus the number of matching rows."""
+        matched = self._matching(query.filters)
+        total = len(self._frame) if matched is None else len(matched)
+        stop = None if query.limit is None else query.offset + query.limit
+
+        if not query.sort:
+            if matched is None:
+                return np.arange(len(self._frame))[query.offset:stop], total
+            return matched[query.offset:stop], total
+        if matched is None and len(query.sort) == 1:
+            column, ascending = query.sort[0]
+            return self._order(column, ascending)[query.offset:stop], total
+
+        candidates = np.arange(len(self._frame)) if matched is None else matched
+        keys = [self._sort_key(column, ascending)[candidates] for column, ascending in reversed(query.sort)]
+        return candidates[np.lexsort(keys)][query.offset:stop], total
+
+    def query(self, query: TableQuery, layout: str = ROWS):
+        positions, total = self.select(query)
+        # Serialize every column of the page and project afterwards: cells are
+        # coerced according to the dtypes of the whole frame, so the values
+        # match the unfiltered endpoint's whatever columns are picked.
+        payload = serialize_dataframe(self._frame.iloc[positions], layout)
+        if query.columns is not None:
+            columns = list(query.columns)
+            payload["columns"] = columns
+            if layout == COLUMNAR:
+                payload["data"] = {column: payload["data"][column] for column in columns}
+            else:
+                payload["rows"] = [{column: row[column] for column in columns} for row in payload["rows"]]
+        payload.update({"total": total, "offset": query.offset, "limit": query.limit})
+        return payload
@@ -0,0 +1,27 @@
+import hashlib
+import itertools
+import sys
+from pathlib import Path
+
+import pytest
+
+# The application modules live at the repository root.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from workbook import StaticWorkbook, WorkbookIdentity, WorkbookVersion  # noqa: E402
+
+_REVISIONS = itertools.count()
+
+
+@pytest.fixture
+def static_workbook(monkeypatch):
+    """Serve ``sheets`` from main.WORKBOOK as one fixed revision, which is returned."""
+    import main
+
+    def serve(sheets):
+        digest = hashlib.sha256(str(next(_REVISIONS)).encode()).hexdigest()
+        version = WorkbookVersion(WorkbookIdentity("test.xlsx", 0, 0, digest), sheets)
+        monkeypatch.setattr(main, "WORKBOOK", StaticWorkbook(version))
+        return version
+
+    return serve
@@ -0,0 +1,42 @@
+"""Only the front-end's and the full section lists cache whole bundles."""
+
+import itertools
+
+import pandas as pd
+import pytest
+
+import main
+
+_SHEETS = {
+    main.DATA_SHEET_FUNNEL: pd.DataFrame(
+        {"Motivos Bloqueio": ["Avaria", "Vencido"], "Soma de Valor (BRL)": [10.0, 30.0], "Observação": ["a", None]}
+    ),
+}
+
+
+@pytest.mark.parametrize("path", ["/api/dashboard", "/api/changes"])
+def test_client_chosen_subsets_are_not_memoized(static_workbook, path):
+    version = static_workbook(_SHEETS)
+    client = main.app.test_client()
+    client.get(f"{path}?sections=funnel")
+    baseline = version.memo_size()
+
+    subsets = itertools.islice(itertools.combinations(sorted(main.API_SECTIONS), 3), 50)
+    for subset in subsets:
+        response = client.get(f"{path}?sections={','.join(subset)}")
+        assert response.status_code == 200
+    # Only the payloads of the sections themselves were added.
+    assert version.memo_size() - baseline <= len(main.API_SECTIONS)
+
+
+@pytest.mark.parametrize("path", ["/api/dashboard", "/api/changes"])
+def test_front_end_and_full_bundles_are_memoized(static_workbook, path):
+    version = static_workbook(_SHEETS)
+    client = main.app.test_client()
+    front_end = ",".join(main.FRONTEND_DASHBOARD_SECTIONS)
+    for query in (f"sections={front_end}", ""):
+        first = client.get(f"{path}?{query}")
+        size = version.memo_size()
+        second = client.get(f"{path}?{query}")
+        assert second.get_data() == first.get_data()
+        assert version.memo_size() == size
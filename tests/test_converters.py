@@ -0,0 +1,138 @@
+"""The column converters must match ``Series.apply`` of the scalar converters bit for bit."""
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from converters import (
+    convert_currency_column,
+    convert_integer,
+    convert_integer_column,
+    convert_percentage,
+    convert_percentage_column,
+    converter_valor,
+)
+
+CONVERTERS = [
+    pytest.param(convert_currency_column, converter_valor, id="currency"),
+    pytest.param(convert_percentage_column, convert_percentage, id="percentage"),
+    pytest.param(convert_integer_column, convert_integer, id="integer"),
+]
+
+STRINGS = [
+    "R$ 1.234,56",
+    "R$ 207.491,40",
+    "1.000",
+    "-19,62%",
+    "2,93%",
+    "0,5%",
+    "150%",
+    " 42 ",
+    "12,7",
+    "-0",
+    "1e3",
+    "nan",
+    "inf",
+    "-inf",
+    "",
+    "   ",
+    "-",
+    "R$",
+    "abc",
+    "1,2,3",
+    "12.345.678.901.234.567.890",
+    "99999999999999999999",
+    "Total geral",
+]
+NUMBERS = [0, 1, -1, 7, 10**15, 2**53, 2**53 + 1, 10**20, -(10**30), 0.0, -0.0, 0.5, 1.5, 150.0, 1e300]
+SPECIAL = [None, float("nan"), np.nan, float("inf"), float("-inf"), pd.NaT, True, False]
+
+
+def _apply(series, scalar):
+    try:
+        return series.apply(scalar), None
+    except Exception as error:
+        return None, type(error)
+
+
+def _convert(series, column_converter):
+    try:
+        return column_converter(series), None
+    except Exception as error:
+        return None, type(error)
+
+
+def assert_same_conversion(series, column_converter, scalar):
+    expected, expected_error = _apply(series, scalar)
+    actual, actual_error = _convert(series, column_converter)
+    assert actual_error is expected_error
+    if expected is None:
+        return
+    assert actual.dtype == expected.dtype
+    assert actual.index.equals(expected.index)
+    assert actual.name == expected.name
+    if expected.dtype.kind == "f":
+        # Compare the bits, so -0.0 and 0.0 or different NaNs would not pass.
+        assert np.array_equal(actual.to_numpy().view(np.int64), expected.to_numpy().view(np.int64))
+    else:
+        assert [(type(value), value) for value in actual] == [(type(value), value) for value in expected]
+
+
+@pytest.mark.parametrize("column_converter, scalar", CONVERTERS)
+@pytest.mark.parametrize(
+    "values, dtype",
+    [
+        pytest.param(STRINGS, object, id="object-strings"),
+        pytest.param([value for value in STRINGS if value], "string", id="string-dtype"),
+        pytest.param(["1.234,56", "7", "-3,5"], "str", id="str"),
+        pytest.param([1, 2, 3, -4], "int64", id="int64"),
+        pytest.param([1.0, -2.5, 150.0, np.nan, -0.0], "float64", id="float64"),
+        pytest.param([True, False, True], "bool", id="bool"),
+        pytest.param(NUMBERS, object, id="object-numbers"),
+        pytest.param(["1,5", 2, 3.25, "R$ 4,00"], object, id="mixed"),
+        pytest.param(["10", None, "20"], object, id="none"),
+        pytest.param(["10", np.nan, "20"], object, id="nan"),
+        pytest.param([np.nan, np.nan], "float64", id="all-nan"),
+        pytest.param(["abc", "", "-"], object, id="malformed"),
+        pytest.param([10**20, 5], object, id="huge-integer"),
+        pytest.param(["1", float("inf")], object, id="infinity"),
+        pytest.param([], object, id="empty"),
+    ],
+)
+def test_column_matches_scalar(column_converter, scalar, values, dtype):
+    series = pd.Series(values, dtype=dtype, name="coluna", index=range(10, 10 + len(values)))
+    assert_same_conversion(series, column_converter, scalar)
+
+
+@pytest.mark.parametrize("column_converter, scalar", CONVERTERS)
+@pytest.mark.parametrize("special", SPECIAL, ids=repr)
+def test_special_values_match_scalar(column_converter, scalar, special):
+    series = pd.Series(["1,5", special, "2"], dtype=object)
+    assert_same_conversion(series, column_converter, scalar)
+
+
+@pytest.mark.parametrize("column_converter, scalar", CONVERTERS)
+def test_randomized_columns_match_scalar(column_converter, scalar):
+    rng = random.Random(0)
+    pool = STRINGS + NUMBERS + SPECIAL
+
+    def cell():
+        kind = rng.random()
+        if kind < 0.4:
+            return rng.choice(pool)
+        if kind < 0.7:
+            # Brazilian format: "." groups thousands, "," marks the decimals.
+            amount = f"{rng.randint(-(10**7), 10**7) / 100:,.2f}"
+            return "R$ " + amount.replace(",", "_").replace(".", ",").replace("_", ".")
+        if kind < 0.85:
+            return f"{rng.uniform(-200, 200):.2f}%".replace(".", ",")
+        return rng.uniform(-1e6, 1e6)
+
+    for _ in range(300):
+        series = pd.Series([cell() for _ in range(rng.randint(1, 12))], dtype=object)
+        assert_same_conversion(series, column_converter, scalar)
+        strings = series[series.map(lambda value: isinstance(value, str))]
+        if len(strings):
+            assert_same_conversion(strings.astype("string"), column_converter, scalar)
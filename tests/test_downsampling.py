@@ -0,0 +1,66 @@
+"""Bounds on the bloqueado resolutions a workbook version caches."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+
+
+def _bloqueado(days):
+    bloqueado = pd.DataFrame(
+        {
+            "Dia": [day % 28 + 1 for day in range(days)],
+            "Mês": ["jan"] * days,
+            "R$ Bloq. no ESTOQUE": np.sin(np.arange(days) / 7.0) * 1000,
+            "%": np.cos(np.arange(days) / 5.0) / 10,
+            "Acumulativo": np.arange(days, dtype=float),
+        }
+    )
+    return {main.DATA_SHEET: bloqueado}
+
+
+@pytest.fixture
+def client(static_workbook):
+    def use(days):
+        version = static_workbook(_bloqueado(days))
+        return main.app.test_client(), version
+
+    return use
+
+
+def test_distinct_points_share_few_cache_entries(client):
+    test_client, version = client(2000)
+    test_client.get("/api/bloqueado")
+    baseline = version.memo_size()
+    for points in range(1, 961):
+        assert test_client.get(f"/api/bloqueado?points={points}").status_code == 200
+    # One payload and one response per resolution.
+    assert version.memo_size() - baseline == 2 * len(main.DOWNSAMPLE_RESOLUTIONS)
+
+
+def test_points_covering_the_series_use_the_full_payload(client):
+    test_client, version = client(100)
+    full = test_client.get("/api/bloqueado").get_json()
+    baseline = version.memo_size()
+    for points in (120, 240, 960):
+        assert test_client.get(f"/api/bloqueado?points={points}").get_json() == full
+    assert test_client.get("/api/dashboard?sections=bloqueado&points=240").status_code == 200
+    # A bloqueado-only bundle is encoded from the cached payload, not memoized.
+    assert version.memo_size() == baseline
+
+
+def test_snapped_resolution(client):
+    test_client, _ = client(2000)
+    payload = test_client.get("/api/bloqueado?points=100").get_json()
+    assert len(payload["labels"]) == 120
+    assert payload["total_points"] == 2000
+
+
+@pytest.mark.parametrize("points", ["0", "-5", "abc", "961", "100000"])
+def test_invalid_points(client, points):
+    test_client, _ = client(2000)
+    for path in ("/api/bloqueado", "/api/dashboard", "/api/changes"):
+        response = test_client.get(f"{path}?points={points}")
+        assert response.status_code == 400
+        assert response.get_json() == {"error": "Parametro invalido: points"}
@@ -0,0 +1,45 @@
+"""Regression checks for the /api/funnel summary."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+
+MOTIVO = "Motivos Bloqueio"
+VALOR = "Soma de Valor (BRL)"
+OBSERVACAO = "Observação"
+
+
+def _funnel(observations):
+    return pd.DataFrame(
+        {
+            MOTIVO: ["Avaria", "Vencido", "Avaria", None],
+            VALOR: [10.0, 30.0, 5.0, 1.0],
+            OBSERVACAO: observations,
+        }
+    )
+
+
+def test_blank_observation_column():
+    # pandas reads a column with no values as all-NaN float64.
+    summary = main._funnel_summary(_funnel([np.nan] * 4))
+    assert summary["total"] == 46.0
+    assert [entry["label"] for entry in summary["entries"]] == ["Vencido", "Avaria", "Sem motivo"]
+    assert all(entry["observation"] is None for entry in summary["entries"])
+
+
+def test_first_non_empty_observation_per_motive():
+    summary = main._funnel_summary(_funnel(["  ", " Revisar ", "Outra", 3.5]))
+    observations = {entry["label"]: entry["observation"] for entry in summary["entries"]}
+    assert observations == {"Vencido": "Revisar", "Avaria": "Outra", "Sem motivo": "3.5"}
+
+
+@pytest.mark.parametrize("path", ["/api/funnel", "/api/dashboard?sections=funnel"])
+def test_endpoints_serve_blank_observations(static_workbook, path):
+    static_workbook({main.DATA_SHEET_FUNNEL: _funnel([np.nan] * 4)})
+    response = main.app.test_client().get(path)
+    assert response.status_code == 200
+    payload = response.get_json()
+    funnel = payload["sections"]["funnel"] if "sections" in payload else payload
+    assert [entry["observation"] for entry in funnel["entries"]] == [None, None, None]
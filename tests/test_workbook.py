@@ -0,0 +1,71 @@
+"""WorkbookCache retries revisions it failed to read or parse."""
+
+import os
+
+import workbook
+from workbook import WorkbookCache
+
+
+def _write(path, content, mtime_ns):
+    path.write_bytes(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _flaky_loader(failures):
+    calls = []
+
+    def load(handle, timings):
+        calls.append(None)
+        if len(calls) <= failures:
+            return None
+        return {"content": handle.read()}
+
+    return load, calls
+
+
+def test_startup_parse_failure_is_retried(tmp_path):
+    path = tmp_path / "Apresentação.xlsx"
+    _write(path, b"v1", 1_000_000_000)
+    loader, calls = _flaky_loader(failures=1)
+    cache = WorkbookCache(path, loader, check_interval=0)
+
+    assert cache.get() is None
+    version = cache.get()
+    assert version is not None and version.sheets == {"content": b"v1"}
+    assert len(calls) == 2
+
+
+def test_reload_parse_failure_is_retried(tmp_path):
+    path = tmp_path / "Apresentação.xlsx"
+    _write(path, b"v1", 1_000_000_000)
+    loader, _ = _flaky_loader(failures=0)
+    cache = WorkbookCache(path, loader, check_interval=0)
+    assert cache.get().sheets == {"content": b"v1"}
+
+    _write(path, b"v2", 2_000_000_000)
+    failing, _ = _flaky_loader(failures=1)
+    cache._loader = failing
+    assert cache.reload().sheets == {"content": b"v1"}
+    assert cache.reload().sheets == {"content": b"v2"}
+
+
+def test_read_failure_is_retried(tmp_path, monkeypatch):
+    path = tmp_path / "Apresentação.xlsx"
+    _write(path, b"v1", 1_000_000_000)
+    loader, _ = _flaky_loader(failures=0)
+    cache = WorkbookCache(path, loader, check_interval=0)
+
+    monkeypatch.setattr(workbook, "read_workbook_bytes", lambda path: None)
+    assert cache.reload() is None
+    monkeypatch.undo()
+    assert cache.reload().sheets == {"content": b"v1"}
+
+
+def test_unchanged_file_is_not_reread(tmp_path):
+    path = tmp_path / "Apresentação.xlsx"
+    _write(path, b"v1", 1_000_000_000)
+    loader, calls = _flaky_loader(failures=0)
+    cache = WorkbookCache(path, loader, check_interval=0)
+    first = cache.reload()
+    assert cache.reload() is first
+    assert len(calls) == 1
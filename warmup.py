@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from workbook import WorkbookCache, WorkbookVersion
+
+Step = Tuple[str, Callable[[], Any]]
+
+STARTING = "starting"
+LOADING = "loading"
+WARMING = "warming"
+FINISHING = "finishing"
+READY = "ready"
+
+
+class WarmUp:
+    """Loads the workbook and precomputes its payloads ahead of the first request.
+
+    ``steps`` maps a freshly loaded ``WorkbookVersion`` to named callables
+    that fill its caches. They run for the first revision and again for every
+    reload, before the cache publishes the revision, so requests after a
+    workbook save do not pay for the rebuild either. ``startup_steps`` run
+    once, after the first revision is warm. The service is ready once both
+    have completed; it stays ready across reloads, since the previous
+    revision keeps serving until the next is warm.
+    """
+
+    def __init__(
+        self,
+        cache: WorkbookCache,
+        steps: Callable[[WorkbookVersion], Sequence[Step]],
+        startup_steps: Iterable[Step] = (),
+        retry_interval: float = 2.0,
+    ) -> None:
+        self._cache = cache
+        self._steps = steps
+        self._startup_steps = tuple(startup_steps)
+        self._retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = time.time()
+        self._state = STARTING
+        self._ready = False
+        self._startup_done = False
+        self._error: Optional[str] = None
+        self._progress: Optional[Dict[str, Any]] = None
+        self._warm_version: Optional[str] = None
+        self._startup_seconds: Dict[str, float] = {}
+        cache.subscribe(self._warm, before_publish=True)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def start(self) -> threading.Thread:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="warm-up", daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def _run(self) -> None:
+        self._set_state(LOADING)
+        while self._cache.get() is None:
+            self._error = f"Workbook not available at {self._cache.path}"
+            time.sleep(self._retry_interval)
+        self._error = None
+
+        # The first revision may have been loaded (and warmed) by a request
+        # thread; make sure its payloads are warm before the one-off steps.
+        version = self._cache.peek()
+        progress = self._progress
+        if version is not None and (progress is None or progress["version"] != version.version):
+            self._warm(version)
+
+        self._set_state(FINISHING)
+        for name, step in self._startup_steps:
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as error:
+                print(f"An error occurred while warming up {name}: {error}")
+            self._startup_seconds[name] = round(time.perf_counter() - started, 4)
+
+        with self._lock:
+            self._startup_done = True
+            self._update_readiness()
+
+    def _set_state(self, state: str) -> None:
+        with self._lock:
+            if not self._ready:
+                self._state = state
+
+    def _update_readiness(self) -> None:
+        if self._startup_done and self._warm_version is not None:
+            self._ready = True
+            self._state = READY
+
+    def _warm(self, version: WorkbookVersion) -> None:
+        steps = list(self._steps(version))
+        progress = {
+            "version": version.version,
+            "source": version.source,
+            "load_seconds": None if version.load_seconds is None else round(version.load_seconds, 4),
+            "sheets": {
+                sheet_name: {
+                    "rows": None if dataframe is None else len(dataframe),
+                    "load_seconds": round(version.sheet_seconds[sheet_name], 4)
+                    if sheet_name in version.sheet_seconds
+                    else None,
+                }
+                for sheet_name, dataframe in version.sheets.items()
+            },
+            "payloads": {"done": 0, "total": len(steps)},
+            "warm_seconds": None,
+        }
+        with self._lock:
+            self._progress = progress
+            if not self._ready:
+                self._state = WARMING
+
+        started = time.perf_counter()
+        for name, step in steps:
+            try:
+                step()
+            except Exception as error:
+                print(f"An error occurred while warming up {name}: {error}")
+            progress["payloads"]["done"] += 1
+        progress["warm_seconds"] = round(time.perf_counter() - started, 4)
+
+        with self._lock:
+            self._warm_version = version.version
+            self._update_readiness()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self._ready,
+                "state": self._state,
+                "error": self._error,
+                "uptime_seconds": round(time.time() - self._started_at, 3),
+                "workbook": self._progress,
+                "startup": dict(self._startup_seconds),
+            }
@@ -0,0 +1,345 @@
+import hashlib
+import io
+import pickle
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+from metrics import CACHE_EVICTIONS, CACHE_REQUESTS
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for it and receive the same result, or the same exception. Once
+    the call completes the key is forgotten, so later callers run it again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return ``(result, leader)``; ``leader`` is True for the caller that ran ``function``."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, False
+
+        try:
+            flight.result = function()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, True
+
+
+def frame_digest(dataframe) -> Optional[str]:
+    """Content hash of a converted sheet: columns, dtypes, index and every cell."""
+    if dataframe is None:
+        return None
+    hasher = hashlib.sha256()
+    hasher.update(repr((list(dataframe.columns), [str(dtype) for dtype in dataframe.dtypes])).encode("utf-8"))
+    try:
+        hasher.update(pd.util.hash_pandas_object(dataframe, index=True).to_numpy().tobytes())
+    except TypeError:
+        # Cells pandas cannot hash (e.g. lists) fall back to their pickled form.
+        hasher.update(pickle.dumps(dataframe, protocol=pickle.HIGHEST_PROTOCOL))
+    return hasher.hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class WorkbookIdentity:
+    path: str
+    mtime_ns: int
+    size: int
+    digest: str
+
+    @property
+    def version(self) -> str:
+        return self.digest[:16]
+
+
+class WorkbookVersion:
+    """Parsed sheets of one workbook revision plus everything derived from them.
+
+    Instances are shared between request threads and must be treated as
+    read-only; a new revision is published as a new instance, which also drops
+    every memoized result of the previous one.
+    """
+
+    def __init__(
+        self,
+        identity: WorkbookIdentity,
+        sheets: Dict[str, Any],
+        source: str = "workbook",
+        load_seconds: Optional[float] = None,
+        sheet_seconds: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.identity = identity
+        self.sheets = sheets
+        self.source = source
+        self.load_seconds = load_seconds
+        self.sheet_seconds = sheet_seconds or {}
+        self.loaded_at = time.time()
+        self._memo: Dict[Hashable, Any] = {}
+        self._memo_flights = SingleFlight()
+
+    @property
+    def version(self) -> str:
+        return self.identity.version
+
+    @property
+    def sheet_digests(self) -> Dict[str, Optional[str]]:
+        """Content hash of every sheet, None for sheets that failed to load."""
+        return self.memo(
+            "sheet_digests",
+            lambda: {sheet_name: frame_digest(dataframe) for sheet_name, dataframe in self.sheets.items()},
+        )
+
+    def memo(self, key: Hashable, builder: Callable[[], Any]) -> Any:
+        """Return the value cached under ``key``, building it on first use.
+
+        Concurrent first uses of a key share a single ``builder`` call.
+        """
+        try:
+            value = self._memo[key]
+        except KeyError:
+            pass
+        else:
+            CACHE_REQUESTS.inc(cache="payload", result="hit")
+            return value
+
+        def build():
+            # A flight for this key may have finished between the lookup above
+            # and this one starting.
+            try:
+                return self._memo[key], "hit"
+            except KeyError:
+                pass
+            value = self._memo[key] = builder()
+            return value, "miss"
+
+        (value, result), leader = self._memo_flights.do(key, build)
+        CACHE_REQUESTS.inc(cache="payload", result=result if leader else "hit")
+        return value
+
+    def memo_size(self) -> int:
+        return len(self._memo)
+
+
+class StaticWorkbook:
+    """Stands in for a WorkbookCache serving one fixed revision (benchmarks, tests)."""
+
+    def __init__(self, version: WorkbookVersion) -> None:
+        self._version = version
+
+    def get(self) -> WorkbookVersion:
+        return self._version
+
+    def peek(self) -> WorkbookVersion:
+        return self._version
+
+
+def _stat_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_workbook_bytes(path: Path) -> Optional[Tuple[WorkbookIdentity, bytes]]:
+    """Read the workbook in one go so the hash and the parsed content always match."""
+    try:
+        stat = path.stat()
+        content = path.read_bytes()
+    except OSError as error:
+        print(f"An error occurred while reading the workbook: {error}")
+        return None
+
+    identity = WorkbookIdentity(
+        path=str(path),
+        mtime_ns=stat.st_mtime_ns,
+        size=len(content),
+        digest=hashlib.sha256(content).hexdigest(),
+    )
+    return identity, content
+
+
+class WorkbookCache:
+    """Keeps the current parsed workbook and swaps in new revisions as the file changes.
+
+    The file is only stat()ed at most once every ``check_interval`` seconds. When
+    its mtime or size changes, the workbook is re-read on a background thread and
+    the new ``WorkbookVersion`` replaces the old one in a single reference
+    assignment, so requests keep being answered from the previous revision while
+    the reload (and any ``before_publish`` listener) is in progress. Saving
+    identical content does not trigger a re-parse.
+
+    ``loader`` receives the workbook as a binary file object plus a dict in which
+    it may record per-sheet load times. With a ``snapshots`` store, converted
+    sheets are looked up by workbook digest before parsing, and freshly parsed
+    revisions are persisted to it in the background.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        loader: Callable[[Any, Dict[str, float]], Optional[Dict[str, Any]]],
+        check_interval: float = 2.0,
+        snapshots=None,
+    ) -> None:
+        self._path = Path(path)
+        self._loader = loader
+        self._check_interval = check_interval
+        self._snapshots = snapshots
+        self._current: Optional[WorkbookVersion] = None
+        self._state_lock = threading.Lock()
+        self._load_flights = SingleFlight()
+        self._reloading = False
+        self._last_check = 0.0
+        self._last_signature: Optional[Tuple[int, int]] = None
+        self._listeners = []
+        self._preparers = []
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def peek(self) -> Optional[WorkbookVersion]:
+        return self._current
+
+    def subscribe(self, listener: Callable[[WorkbookVersion], None], before_publish: bool = False) -> None:
+        """Call ``listener`` with every revision published from now on, on the loading thread.
+
+        ``before_publish`` listeners run while the previous revision is still
+        the one served (e.g. to warm the new one's caches); the others run
+        once the new revision has replaced it.
+        """
+        (self._preparers if before_publish else self._listeners).append(listener)
+
+    def get(self) -> Optional[WorkbookVersion]:
+        current = self._current
+        if current is None:
+            CACHE_REQUESTS.inc(cache="workbook", result="miss")
+            return self.reload()
+        CACHE_REQUESTS.inc(cache="workbook", result="hit")
+        self._schedule_reload_if_changed()
+        return current
+
+    def reload(self) -> Optional[WorkbookVersion]:
+        """Synchronously load the workbook if it differs from the published revision.
+
+        Callers arriving while a load is in progress wait for it and share its
+        result instead of parsing the workbook again.
+        """
+        (version, published), leader = self._load_flights.do("workbook", self._load_if_changed)
+        if published and leader:
+            for listener in list(self._listeners):
+                try:
+                    listener(version)
+                except Exception as error:
+                    print(f"An error occurred while publishing the workbook: {error}")
+        return version
+
+    def _load_if_changed(self) -> Tuple[Optional[WorkbookVersion], bool]:
+        signature = _stat_signature(self._path)
+        current = self._current
+        if signature is None:
+            return current, False
+        if signature == self._last_signature:
+            return current, False
+
+        # The signature is only recorded once this revision is handled, so a
+        # read or parse that fails (e.g. while Excel is still saving) is
+        # retried on the next check.
+        result = read_workbook_bytes(self._path)
+        if result is None:
+            return current, False
+
+        identity, content = result
+        if current is not None and current.identity.digest == identity.digest:
+            self._last_signature = signature
+            return current, False
+
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        source = "snapshot"
+        sheets = None
+        if self._snapshots is not None:
+            sheets = self._snapshots.load(identity.digest, timings)
+            CACHE_REQUESTS.inc(cache="snapshot", result="miss" if sheets is None else "hit")
+        if sheets is None:
+            source = "workbook"
+            timings.clear()
+            sheets = self._loader(io.BytesIO(content), timings)
+            if sheets is None:
+                return current, False
+
+        version = WorkbookVersion(identity, sheets, source, time.perf_counter() - started, timings)
+        self._last_signature = signature
+        print(f"Workbook version {version.version} loaded from {self._path} ({source})")
+        if source == "workbook" and self._snapshots is not None:
+            self._snapshots.save_in_background(identity.digest, sheets)
+        for preparer in list(self._preparers):
+            try:
+                preparer(version)
+            except Exception as error:
+                print(f"An error occurred while preparing the workbook: {error}")
+
+        self._current = version
+        if current is not None:
+            CACHE_EVICTIONS.inc(cache="workbook")
+            CACHE_EVICTIONS.inc(current.memo_size(), cache="payload")
+        return version, True
+
+    def _schedule_reload_if_changed(self) -> None:
+        now = time.monotonic()
+        if now - self._last_check < self._check_interval:
+            return
+
+        with self._state_lock:
+            if self._reloading or now - self._last_check < self._check_interval:
+                return
+            self._last_check = now
+            signature = _stat_signature(self._path)
+            if signature is None or signature == self._last_signature:
+                return
+            self._reloading = True
+
+        threading.Thread(target=self._reload_in_background, name="workbook-reload", daemon=True).start()
+
+    def _reload_in_background(self) -> None:
+        try:
+            self.reload()
+        except Exception as error:
+            print(f"An error occurred while reloading the workbook: {error}")
+        finally:
+            with self._state_lock:
+                self._reloading = False